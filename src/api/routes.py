@@ -1,9 +1,12 @@
+import json
 import logging
-from typing import Optional
-from flask import Blueprint, request, send_from_directory
+from contextlib import closing
+from typing import List, Optional
+from flask import Blueprint, Response, request, send_from_directory, stream_with_context
 import yaml
 
-from src.services.gallery import GalleryService
+from src.config.settings import Settings
+from src.services.gallery import GalleryService, WARMING_UP
 from src.api.responses import error_response, success_response, json_response, APIResponse
 
 logger = logging.getLogger(__name__)
@@ -25,6 +28,23 @@ def init_routes(gallery_service: GalleryService) -> None:
     global _gallery_service
     _gallery_service = gallery_service
 
+def _upstream_response(data, status: int):
+    """
+    Create the response for a lookup that may need upstream
+    
+    Args:
+        data: Response data
+        status: HTTP status code
+        
+    Returns:
+        Response: Flask response object, advising a retry while warming up
+    """
+    response = json_response(data, status=status)
+    # Other 503s are upstream's own and say nothing about when to retry
+    if status == 503 and isinstance(data, dict) and data.get("reason") == WARMING_UP:
+        response.headers['Retry-After'] = str(Settings.WARMUP_RETRY_AFTER)
+    return response
+
 @api_bp.route("/", methods=["GET"])
 def get_main():
     """Root endpoint"""
@@ -34,16 +54,42 @@ def get_main():
 def health_check():
     """Health check endpoint"""
     try:
-        cookies_ok = _gallery_service.cookie_manager.ensure_valid_cookies()
+        session_health = _gallery_service.cookie_manager.session_health
         return success_response({
             "service": "nhApiod-proxy",
             "timestamp": _gallery_service.cookie_manager.last_renewal,
-            "cookies_ok": cookies_ok
+            "cookies_ok": not session_health.is_stale,
+            "ready": _gallery_service.cookie_manager.is_ready,
+            "session": session_health.snapshot()
         })
     except Exception as e:
         logger.error(f"Health check failed: {str(e)}")
         return error_response(f"Health check failed: {str(e)}")
 
+@api_bp.route("/ready", methods=["GET"])
+def readiness_check():
+    """Readiness endpoint; fails until the upstream session has been warmed up"""
+    cookie_manager = _gallery_service.cookie_manager
+    if cookie_manager.is_ready:
+        return success_response({"ready": True})
+    
+    response = json_response({
+        "status": False,
+        "reason": "Service is warming up",
+        "warmup_error": cookie_manager.warmup_error
+    }, status=503)
+    response.headers['Retry-After'] = str(Settings.WARMUP_RETRY_AFTER)
+    return response
+
+@api_bp.route("/stats", methods=["GET"])
+def get_stats():
+    """Service statistics endpoint"""
+    try:
+        return success_response(_gallery_service.stats())
+    except Exception as e:
+        logger.error(f"Failed to collect stats: {str(e)}")
+        return error_response(f"Failed to collect stats: {str(e)}")
+
 @api_bp.route("/get", methods=["GET"])
 def get_data():
     """Get gallery data endpoint"""
@@ -63,19 +109,61 @@ def get_data():
         # Get gallery data
         data, status = _gallery_service.get_gallery(gallery_id, check_status)
         
-        return json_response(data, status=status)
+        return _upstream_response(data, status)
         
     except Exception as e:
         logger.error(f"Failed to get gallery data: {str(e)}")
         return error_response(str(e))
 
+def _batch_ids() -> Optional[List[int]]:
+    """
+    Read the gallery IDs of a batch request
+    
+    Returns:
+        Optional[List[int]]: IDs from ``?ids=1,2,3`` or a JSON body ``{"ids": [...]}``,
+        None if they are missing or not integers
+    """
+    try:
+        if request.method == 'POST' and request.is_json:
+            ids = (request.get_json(silent=True) or {}).get('ids')
+        else:
+            ids = [part for part in request.args.get('ids', '').split(',') if part.strip()]
+        if not ids:
+            return None
+        return [int(gallery_id) for gallery_id in ids]
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+@api_bp.route("/get-batch", methods=["GET", "POST"])
+def get_batch():
+    """Get several galleries, streamed back as NDJSON lines in completion order"""
+    gallery_ids = _batch_ids()
+    if gallery_ids is None:
+        return error_response("Invalid or missing gallery IDs", status=400)
+    if len(gallery_ids) > Settings.BATCH_MAX_IDS:
+        return error_response(
+            f"At most {Settings.BATCH_MAX_IDS} gallery IDs per request",
+            status=400
+        )
+    
+    def generate():
+        # Closing the lookups when the client disconnects cancels the fetches not yet started
+        with closing(_gallery_service.get_galleries(gallery_ids)) as galleries:
+            for gallery_id, data, status in galleries:
+                yield json.dumps({"id": gallery_id, "http_status": status, "response": data}) + "\n"
+    
+    response = Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+    response.headers['X-Accel-Buffering'] = 'no'
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
 @api_bp.route("/pdf-status/<int:gallery_id>", methods=["GET"])
 def check_pdf_status(gallery_id: int):
     """Check PDF processing status endpoint"""
     try:
         # Get gallery data with status check
         data, status = _gallery_service.get_gallery(gallery_id, check_pdf_status=True)
-        return json_response(data, status=status)
+        return _upstream_response(data, status)
         
     except Exception as e:
         logger.error(f"Failed to check PDF status: {str(e)}")
@@ -33,8 +33,10 @@ def create_app(gallery_service: Optional[GalleryService] = None) -> Flask:
     try:
         if gallery_service is None:
             # Initialize services
-            # Core services
-            cookie_manager = CookieManager()
+            # Core services; the browser session is warmed up in the background
+            # so the app can serve cached galleries immediately
+            cookie_manager = CookieManager(warm_up=False)
+            cookie_manager.start_warmup()
             gallery_cache = GalleryCache()
             
             # Optional services
@@ -1,5 +1,5 @@
 import os
-from typing import Optional
+from typing import List, Optional
 from dotenv import load_dotenv
 
 # Load environment variables from .env file in development
@@ -22,9 +22,75 @@ class Settings:
     MAX_WORKERS: int = min(32, (os.cpu_count() or 1) * 4)
     REQUEST_DELAY: float = float(os.getenv('CLOUDSCRAPER_DELAY', '0.1'))
     MAX_RETRIES: int = int(os.getenv('CLOUDSCRAPER_RETRIES', '3'))
+    WARMUP_RETRY_AFTER: int = int(os.getenv('WARMUP_RETRY_AFTER', '10'))
+    
+    # Browser pool settings
+    BROWSER_POOL_SIZE: int = int(os.getenv('BROWSER_POOL_SIZE', '1'))
+    BROWSER_LEASE_TIMEOUT: float = float(os.getenv('BROWSER_LEASE_TIMEOUT', '30'))
+    BROWSER_MAX_FAILURES: int = int(os.getenv('BROWSER_MAX_FAILURES', '3'))
+    BROWSER_MAX_NAVIGATIONS: int = int(os.getenv('BROWSER_MAX_NAVIGATIONS', '200'))  # 0 disables
+    BROWSER_MAX_RSS_MB: int = int(os.getenv('BROWSER_MAX_RSS_MB', '300'))  # 0 disables
+    BROWSER_RSS_CHECK_INTERVAL: float = float(os.getenv('BROWSER_RSS_CHECK_INTERVAL', '15'))
+    BROWSER_STANDBY: bool = os.getenv('BROWSER_STANDBY', 'false').lower() == 'true'
+    RENEWAL_WAIT_TIMEOUT: float = float(os.getenv('RENEWAL_WAIT_TIMEOUT', '90'))
+    
+    # Persistent Chrome profiles (empty directory launches with temporary profiles)
+    BROWSER_PROFILE_DIR: str = os.getenv('BROWSER_PROFILE_DIR', os.path.join(os.getcwd(), "cache", "chrome-profiles"))
+    BROWSER_PROFILE_COMPACT_INTERVAL: float = float(os.getenv('BROWSER_PROFILE_COMPACT_INTERVAL', '21600'))
+    BROWSER_PROFILE_MAX_MB: int = int(os.getenv('BROWSER_PROFILE_MAX_MB', '150'))
+    
+    # Background session refresh ahead of the cf_clearance expiry
+    COOKIE_REFRESH: bool = os.getenv('COOKIE_REFRESH', 'true').lower() == 'true'
+    COOKIE_REFRESH_LEAD: float = float(os.getenv('COOKIE_REFRESH_LEAD', '300'))
+    COOKIE_REFRESH_JITTER: float = float(os.getenv('COOKIE_REFRESH_JITTER', '60'))
+    COOKIE_REFRESH_FALLBACK: float = float(os.getenv('COOKIE_REFRESH_FALLBACK', '1800'))
+    COOKIE_REFRESH_RETRY: float = float(os.getenv('COOKIE_REFRESH_RETRY', '60'))
+    
+    # Request blocking settings (DevTools Network.setBlockedURLs)
+    REQUEST_BLOCKING: bool = os.getenv('REQUEST_BLOCKING', 'true').lower() == 'true'
+    BLOCKED_RESOURCE_TYPES: List[str] = os.getenv('BLOCKED_RESOURCE_TYPES', 'image,stylesheet,font,media').split(',')
+    BLOCKED_URL_PATTERNS: List[str] = [p for p in os.getenv('BLOCKED_URL_PATTERNS', '').split(',') if p]
+    
+    # Fetch settings
+    FETCH_MODE: str = os.getenv('FETCH_MODE', 'hybrid').lower()  # 'hybrid' or 'browser'
+    HTTP_POOL_SIZE: int = int(os.getenv('HTTP_POOL_SIZE', '16'))
+    GALLERY_FETCH_STRATEGIES: List[str] = os.getenv('GALLERY_FETCH_STRATEGIES', 'api,html').split(',')
+    THUMBNAIL_HOST: str = os.getenv('THUMBNAIL_HOST', 'https://t.nhentai.net')
+    GALLERY_EXTRACTOR: str = os.getenv('GALLERY_EXTRACTOR', 'scan').lower()  # 'scan' or 'soup'
+    GALLERY_STREAMING: bool = os.getenv('GALLERY_STREAMING', 'true').lower() == 'true'
+    GALLERY_MAX_PAGE_BYTES: int = int(os.getenv('GALLERY_MAX_PAGE_BYTES', str(4 * 1048576)))
+    
+    # Shared session settings (empty path disables sharing between workers)
+    COOKIE_STORE_PATH: str = os.getenv('COOKIE_STORE_PATH', os.path.join(os.getcwd(), "cache", "session.json"))
+    COOKIE_STORE_TTL: int = int(os.getenv('COOKIE_STORE_TTL', '1800'))
+    COOKIE_STORE_WAIT: float = float(os.getenv('COOKIE_STORE_WAIT', '60'))
+    
+    # Browser broker settings (empty URL runs browsers inside each worker)
+    BROWSER_BROKER_URL: str = os.getenv('BROWSER_BROKER_URL', '')
+    BROKER_HOST: str = os.getenv('BROKER_HOST', '127.0.0.1')
+    BROKER_PORT: int = int(os.getenv('BROKER_PORT', '5050'))
+    BROKER_TIMEOUT: float = float(os.getenv('BROKER_TIMEOUT', '120'))
+    
+    # Seconds a request waits for another request's fetch of the same gallery
+    GALLERY_COALESCE_TIMEOUT: float = float(os.getenv('GALLERY_COALESCE_TIMEOUT', '60'))
+    
+    # Batch lookups (/get-batch)
+    BATCH_MAX_IDS: int = int(os.getenv('BATCH_MAX_IDS', '100'))
+    BATCH_CONCURRENCY: int = int(os.getenv('BATCH_CONCURRENCY', '4'))
+    BATCH_RATE_LIMIT: float = float(os.getenv('BATCH_RATE_LIMIT', '5'))  # Upstream fetches per second, 0 disables
     
     # Cache settings
     CACHE_DURATION: int = 60 * 60 * 24  # 24 hours
+    CACHE_MAX_STALE: int = int(os.getenv('CACHE_MAX_STALE', str(60 * 60 * 24 * 7)))  # Seconds past expiry an entry may still be served
+    CACHE_BACKEND: str = os.getenv('CACHE_BACKEND', 'file').lower()  # 'file' (JSON per gallery) or 'sqlite'
+    CACHE_COMPRESSION: bool = os.getenv('CACHE_COMPRESSION', 'false').lower() == 'true'  # zstd, needs zstandard
+    CACHE_COMPRESSION_LEVEL: int = int(os.getenv('CACHE_COMPRESSION_LEVEL', '3'))
+    CACHE_MEMORY_MAX_MB: int = int(os.getenv('CACHE_MEMORY_MAX_MB', '32'))  # Serialized size of entries held in memory, 0 disables
+    CACHE_REFRESH_RETRY: float = float(os.getenv('CACHE_REFRESH_RETRY', '60'))  # Seconds between refreshes of one stale entry
+    NEGATIVE_CACHE_TTL: float = float(os.getenv('NEGATIVE_CACHE_TTL', '3600'))  # Seconds a 404 is remembered
+    NEGATIVE_CACHE_FAILED_TTL: float = float(os.getenv('NEGATIVE_CACHE_FAILED_TTL', '600'))  # Seconds a failing gallery is remembered
+    NEGATIVE_CACHE_FAILURES: int = int(os.getenv('NEGATIVE_CACHE_FAILURES', '3'))  # Extraction failures before it is remembered
+    NEGATIVE_CACHE_SAVE_INTERVAL: float = float(os.getenv('NEGATIVE_CACHE_SAVE_INTERVAL', '30'))
     
     # R2 Storage settings
     R2_ACCOUNT_ID: Optional[str] = os.environ.get('CF_ACCOUNT_ID')
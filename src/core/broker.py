@@ -0,0 +1,166 @@
+import json
+import logging
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from src.config.settings import Settings
+from src.core.cookie_manager import CookieManager
+
+logger = logging.getLogger(__name__)
+
+class BrokerRequestHandler(BaseHTTPRequestHandler):
+    """Serves session and browser operations of the broker's cookie manager"""
+
+    server: "BrokerServer"
+
+    def do_GET(self) -> None:
+        """Handle session and statistics requests"""
+        url = urlparse(self.path)
+        manager = self.server.cookie_manager
+
+        if url.path == '/session':
+            newer_than = self._float_param(url.query, 'newer_than')
+            manager.ensure_valid_cookies()
+            if newer_than is not None and manager.last_harvest <= newer_than:
+                manager.harvest_cookies(since=newer_than)
+            self._send_json(manager.export_session())
+        elif url.path == '/stats':
+            self._send_json(manager.stats())
+        else:
+            self._send_json({"reason": "Resource not found"}, status=404)
+
+    def do_POST(self) -> None:
+        """Handle browser fetch and renewal requests"""
+        url = urlparse(self.path)
+        manager = self.server.cookie_manager
+
+        if url.path == '/fetch':
+            target = self._read_json().get('url', '')
+            if not isinstance(target, str) or not self._on_target_site(target):
+                self._send_json({"reason": "URL outside of the target site"}, status=400)
+                return
+            response = manager.get(target)
+            if response is None:
+                self._send_json({"reason": "Browser fetch failed"}, status=502)
+                return
+            self._send_json(response.to_dict())
+        elif url.path == '/renew':
+            renewed = manager.renewal.renew()
+            self._send_json({"renewed": renewed, **manager.export_session()})
+        else:
+            self._send_json({"reason": "Resource not found"}, status=404)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        """Route access logs through the application logger"""
+        logger.debug(f"{self.address_string()} - {format % args}")
+
+    @staticmethod
+    def _on_target_site(target: str) -> bool:
+        """
+        Check that a URL points at the target site
+
+        The scheme and host are compared rather than a string prefix, which
+        would also accept hosts such as nhentai.net.example.com.
+
+        Args:
+            target: URL requested by a client
+
+        Returns:
+            bool: True if the URL has the scheme and host of WEB_TARGET
+        """
+        site = urlparse(Settings.WEB_TARGET)
+        url = urlparse(target)
+        return (url.scheme, url.netloc) == (site.scheme, site.netloc)
+
+    def _read_json(self) -> Dict[str, Any]:
+        """
+        Read the JSON request body
+
+        Returns:
+            Dict[str, Any]: Decoded body, empty if missing or invalid
+        """
+        length = int(self.headers.get('Content-Length') or 0)
+        if not length:
+            return {}
+        try:
+            body = json.loads(self.rfile.read(length))
+            return body if isinstance(body, dict) else {}
+        except ValueError:
+            return {}
+
+    def _float_param(self, query: str, name: str) -> Optional[float]:
+        """
+        Read a numeric query parameter
+
+        Args:
+            query: Raw query string
+            name: Parameter name
+
+        Returns:
+            Optional[float]: Parameter value if present and numeric
+        """
+        try:
+            return float(parse_qs(query)[name][0])
+        except (KeyError, IndexError, ValueError):
+            return None
+
+    def _send_json(self, payload: Dict[str, Any], status: int = 200) -> None:
+        """
+        Write a JSON response
+
+        Args:
+            payload: Response body
+            status: HTTP status code
+        """
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+class BrokerServer(ThreadingHTTPServer):
+    """Long-lived process owning the browsers on behalf of all web workers"""
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], cookie_manager: CookieManager):
+        """
+        Initialize the broker server
+
+        Args:
+            address: Host and port to listen on
+            cookie_manager: Cookie manager owning the browser pool
+        """
+        super().__init__(address, BrokerRequestHandler)
+        self.cookie_manager = cookie_manager
+
+def run_broker(host: str = Settings.BROKER_HOST, port: int = Settings.BROKER_PORT) -> None:
+    """
+    Launch the browsers and serve them until interrupted
+
+    Args:
+        host: Interface to listen on
+        port: Port to listen on
+    """
+    # The broker owns the browsers itself rather than delegating to another broker
+    cookie_manager = CookieManager(broker_url='')
+    cookie_manager.pool.warm()
+
+    server = BrokerServer((host, port), cookie_manager)
+    logger.info(f"Browser broker listening on {host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        cookie_manager.pool.close()
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+    run_broker()
@@ -0,0 +1,97 @@
+import logging
+from typing import Any, Dict, Optional
+import requests
+
+from src.config.settings import Settings
+from src.core.browser_response import BrowserResponse
+
+logger = logging.getLogger(__name__)
+
+class BrokerClient:
+    """Client for the browser broker process serving sessions over localhost HTTP"""
+
+    def __init__(self, base_url: str, timeout: float = Settings.BROKER_TIMEOUT):
+        """
+        Initialize the broker client
+
+        Args:
+            base_url: Base URL of the broker, e.g. http://127.0.0.1:5050
+            timeout: Seconds to wait for the broker, which may be solving a challenge
+        """
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.http = requests.Session()
+
+    def session(self, newer_than: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Get valid session cookies from the broker
+
+        Args:
+            newer_than: Ask the broker to harvest again unless its session is newer
+
+        Returns:
+            Optional[Dict[str, Any]]: Cookies, user agent and publish time
+        """
+        params = {'newer_than': newer_than} if newer_than else None
+        return self._request('GET', '/session', params=params)
+
+    def fetch(self, url: str) -> Optional[BrowserResponse]:
+        """
+        Fetch a URL with one of the broker's browsers
+
+        Args:
+            url: The URL to request
+
+        Returns:
+            Optional[BrowserResponse]: The raw HTTP response if successful
+        """
+        payload = self._request('POST', '/fetch', json={'url': url})
+        return BrowserResponse.from_dict(payload) if payload else None
+
+    def renew(self) -> Optional[Dict[str, Any]]:
+        """
+        Force the broker to renew its session
+
+        Returns:
+            Optional[Dict[str, Any]]: The renewed session if successful
+        """
+        payload = self._request('POST', '/renew')
+        if not payload or not payload.get('renewed'):
+            return None
+        return payload
+
+    def stats(self) -> Optional[Dict[str, Any]]:
+        """
+        Get the broker's browser and session statistics
+
+        Returns:
+            Optional[Dict[str, Any]]: Broker statistics
+        """
+        return self._request('GET', '/stats')
+
+    def _request(self, method: str, path: str, **kwargs) -> Optional[Dict[str, Any]]:
+        """
+        Send a request to the broker
+
+        Args:
+            method: HTTP method
+            path: Endpoint path
+            **kwargs: Additional arguments for requests
+
+        Returns:
+            Optional[Dict[str, Any]]: Decoded JSON body if successful
+        """
+        try:
+            response = self.http.request(
+                method,
+                f"{self.base_url}{path}",
+                timeout=self.timeout,
+                **kwargs
+            )
+            if response.status_code != 200:
+                logger.error(f"Broker {path} returned {response.status_code}")
+                return None
+            return response.json()
+        except (requests.RequestException, ValueError) as e:
+            logger.error(f"Broker {path} request failed: {str(e)}")
+            return None
@@ -0,0 +1,489 @@
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+
+from src.config.settings import Settings
+from src.core.process_memory import driver_rss
+
+logger = logging.getLogger(__name__)
+
+class BrowserPoolTimeout(Exception):
+    """Raised when no browser instance could be leased before the deadline"""
+
+class PooledBrowser:
+    """A browser instance owned by the pool together with its health data"""
+
+    def __init__(self, driver: Any, slot: int):
+        """
+        Initialize the pooled browser
+
+        Args:
+            driver: The WebDriver instance
+            slot: Sequence number of the instance within the pool
+        """
+        self.driver = driver
+        self.slot = slot
+        self.created_at = time.time()
+        self.navigations = 0
+        self.failures = 0
+        self.leased_at: Optional[float] = None
+        self.retired = False
+        self.draining = False
+        self.rss: Optional[int] = None
+        self.rss_checked_at = 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Get the instance's resource usage
+
+        Returns:
+            Dict[str, Any]: Navigations, memory and age of the instance
+        """
+        return {
+            "slot": self.slot,
+            "navigations": self.navigations,
+            "rss_mb": round(self.rss / 1048576, 1) if self.rss is not None else None,
+            "age": round(time.time() - self.created_at, 1),
+            "leased": self.leased_at is not None,
+            "draining": self.draining
+        }
+
+class BrowserPool:
+    """Pool of browser instances handed out to callers through leases"""
+
+    def __init__(
+        self,
+        factory: Callable[[], Any],
+        size: int = Settings.BROWSER_POOL_SIZE,
+        lease_timeout: float = Settings.BROWSER_LEASE_TIMEOUT,
+        max_failures: int = Settings.BROWSER_MAX_FAILURES,
+        max_navigations: int = Settings.BROWSER_MAX_NAVIGATIONS,
+        max_rss_mb: int = Settings.BROWSER_MAX_RSS_MB,
+        rss_check_interval: float = Settings.BROWSER_RSS_CHECK_INTERVAL,
+        memory: Callable[[Any], Optional[int]] = driver_rss,
+        dispose: Optional[Callable[[Any], None]] = None
+    ):
+        """
+        Initialize the browser pool
+
+        Args:
+            factory: Callable that launches a ready-to-use WebDriver
+            size: Maximum number of concurrent browser instances
+            lease_timeout: Default seconds to wait for a free instance
+            max_failures: Consecutive failed leases before an instance is recycled
+            max_navigations: Navigations after which an instance is replaced (0 disables)
+            max_rss_mb: Process tree memory after which an instance is replaced (0 disables)
+            rss_check_interval: Minimum seconds between memory readings of an instance
+            memory: Callable measuring a driver's resident memory in bytes
+            dispose: Callable shutting a driver down (defaults to ``driver.quit()``)
+        """
+        self._factory = factory
+        self.size = max(1, size)
+        self.lease_timeout = lease_timeout
+        self.max_failures = max_failures
+        self.max_navigations = max_navigations
+        self.max_rss = max_rss_mb * 1048576
+        self.rss_check_interval = rss_check_interval
+        self._memory = memory
+        self._dispose = dispose or (lambda driver: driver.quit())
+
+        self._cond = threading.Condition()
+        self._instances: List[PooledBrowser] = []
+        self._idle: List[PooledBrowser] = []
+        self._starting = 0
+        self._warm_target = 0
+        self._next_slot = 0
+        self._closed = False
+
+        # Counters
+        self.leases = 0
+        self.lease_timeouts = 0
+        self.launches = 0
+        self.launch_failures = 0
+        self.recycled = 0
+        self.navigation_recycles = 0
+        self.memory_recycles = 0
+
+    @property
+    def primary(self) -> Optional[PooledBrowser]:
+        """The oldest live instance, if any"""
+        with self._cond:
+            return self._instances[0] if self._instances else None
+
+    def instances(self) -> List[PooledBrowser]:
+        """Snapshot of all live instances, idle and leased"""
+        with self._cond:
+            return list(self._instances)
+
+    def warm(self, count: Optional[int] = None) -> None:
+        """
+        Launch instances until the requested number is available
+
+        Args:
+            count: Number of instances to keep warm (defaults to the pool size)
+        """
+        target = self.size if count is None else min(count, self.size)
+        with self._cond:
+            self._warm_target = max(self._warm_target, target)
+
+        while True:
+            with self._cond:
+                if self._closed or len(self._instances) + self._starting >= target:
+                    return
+                self._starting += 1
+            self._launch(leased=False)
+
+    def acquire(self, timeout: Optional[float] = None) -> PooledBrowser:
+        """
+        Lease a browser instance, launching one if the pool is below capacity
+
+        Args:
+            timeout: Seconds to wait for a free instance
+
+        Returns:
+            PooledBrowser: The leased instance
+
+        Raises:
+            BrowserPoolTimeout: If no instance became available in time
+        """
+        timeout = self.lease_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+
+        while True:
+            with self._cond:
+                browser = self._wait_for_slot(deadline)
+
+            if browser is None:
+                return self._launch(leased=True)
+
+            if self._is_alive(browser):
+                return browser
+
+            logger.warning(f"Browser instance {browser.slot} is unresponsive, recycling")
+            self._retire(browser)
+
+    def release(self, browser: PooledBrowser, healthy: bool = True) -> None:
+        """
+        Return a leased instance to the pool
+
+        Args:
+            browser: The instance being returned
+            healthy: Whether the lease completed without errors
+        """
+        reason = self._recycle_reason(browser)
+        replace = False
+
+        with self._cond:
+            browser.leased_at = None
+            browser.failures = 0 if healthy else browser.failures + 1
+
+            if browser.failures >= self.max_failures:
+                logger.warning(
+                    f"Browser instance {browser.slot} failed {browser.failures} times, recycling"
+                )
+                browser.retired = True
+
+            if reason and not (browser.draining or browser.retired or self._closed):
+                if self._over_memory(browser):
+                    # Launching beside an instance already over the limit could run
+                    # the host out of memory, so free it first and relaunch after
+                    logger.info(f"Browser instance {browser.slot} {reason}, retiring before relaunch")
+                    browser.retired = True
+                else:
+                    # Keep serving from the instance until its replacement is ready
+                    logger.info(f"Browser instance {browser.slot} {reason}, replacing")
+                    browser.draining = True
+                    replace = True
+
+            retire = browser.retired or self._closed
+            if not retire:
+                self._idle.append(browser)
+                self._cond.notify()
+
+        if retire:
+            self._retire(browser)
+        elif replace:
+            threading.Thread(target=self._replace, args=(browser,), daemon=True).start()
+
+    @contextmanager
+    def lease(self, timeout: Optional[float] = None) -> Iterator[PooledBrowser]:
+        """
+        Context manager leasing an instance for the duration of the block
+
+        Args:
+            timeout: Seconds to wait for a free instance
+
+        Yields:
+            PooledBrowser: The leased instance
+        """
+        browser = self.acquire(timeout)
+        healthy = True
+        try:
+            yield browser
+        except Exception:
+            healthy = False
+            raise
+        finally:
+            self.release(browser, healthy)
+
+    def recycle_all(self) -> None:
+        """Retire every instance; leased ones are shut down once returned"""
+        with self._cond:
+            for browser in self._instances:
+                browser.retired = True
+            idle, self._idle = self._idle, []
+
+        for browser in idle:
+            self._retire(browser, refill=False)
+
+    def replace_all(self) -> bool:
+        """
+        Swap every instance for a freshly launched one without a gap in service
+
+        Replacements are launched one at a time, each before the instance it
+        replaces is retired; leased instances finish their lease first.
+
+        Returns:
+            bool: True if every instance was replaced
+        """
+        with self._cond:
+            current = [b for b in self._instances if not (b.retired or b.draining)]
+            for browser in current:
+                browser.draining = True
+
+        return all([self._replace(browser) for browser in current])
+
+    def close(self) -> None:
+        """Shut the pool down and quit all idle instances"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+
+        for browser in idle:
+            self._retire(browser, refill=False)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get pool usage counters
+
+        Returns:
+            Dict[str, Any]: Pool statistics
+        """
+        with self._cond:
+            return {
+                "size": self.size,
+                "live": len(self._instances),
+                "idle": len(self._idle),
+                "starting": self._starting,
+                "leases": self.leases,
+                "lease_timeouts": self.lease_timeouts,
+                "launches": self.launches,
+                "launch_failures": self.launch_failures,
+                "recycled": self.recycled,
+                "navigation_recycles": self.navigation_recycles,
+                "memory_recycles": self.memory_recycles,
+                "instances": [browser.snapshot() for browser in self._instances]
+            }
+
+    def _wait_for_slot(self, deadline: float) -> Optional[PooledBrowser]:
+        """
+        Wait for an idle instance or free capacity; must hold the condition
+
+        Args:
+            deadline: Monotonic time after which to give up
+
+        Returns:
+            Optional[PooledBrowser]: An idle instance, or None if the caller
+            should launch a new one
+        """
+        while True:
+            if self._closed:
+                raise BrowserPoolTimeout("Browser pool is closed")
+
+            if self._idle:
+                browser = self._idle.pop()
+                browser.leased_at = time.time()
+                self.leases += 1
+                return browser
+
+            if len(self._instances) + self._starting < self.size:
+                self._starting += 1
+                return None
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self.lease_timeouts += 1
+                raise BrowserPoolTimeout(
+                    f"No browser available within {self.lease_timeout}s"
+                )
+            self._cond.wait(remaining)
+
+    def _launch(self, leased: bool) -> PooledBrowser:
+        """
+        Launch a new instance; the caller must have reserved a starting slot
+
+        Args:
+            leased: Whether the new instance goes straight to the caller
+
+        Returns:
+            PooledBrowser: The launched instance
+        """
+        try:
+            driver = self._factory()
+        except Exception:
+            with self._cond:
+                self._starting -= 1
+                self.launch_failures += 1
+                self._cond.notify()
+            raise
+
+        with self._cond:
+            self._starting -= 1
+            self.launches += 1
+            browser = PooledBrowser(driver, self._next_slot)
+            self._next_slot += 1
+            self._instances.append(browser)
+            if leased:
+                browser.leased_at = time.time()
+                self.leases += 1
+            else:
+                self._idle.append(browser)
+                self._cond.notify()
+
+        logger.info(f"Launched browser instance {browser.slot}")
+        return browser
+
+    def _retire(self, browser: PooledBrowser, refill: bool = True) -> None:
+        """
+        Remove an instance from the pool and quit its driver
+
+        Args:
+            browser: The instance to retire
+            refill: Whether to launch a replacement in the background
+        """
+        with self._cond:
+            if browser in self._instances:
+                self._instances.remove(browser)
+                self.recycled += 1
+            refill = refill and not self._closed and len(self._instances) < self._warm_target
+            self._cond.notify()
+
+        try:
+            self._dispose(browser.driver)
+        except Exception:
+            pass
+
+        if refill:
+            threading.Thread(target=self._refill, daemon=True).start()
+
+    def _refill(self) -> None:
+        """Bring the pool back to its warm target after a recycle"""
+        try:
+            self.warm(self._warm_target)
+        except Exception as e:
+            logger.error(f"Failed to replace browser instance: {str(e)}")
+
+    def _recycle_reason(self, browser: PooledBrowser) -> Optional[str]:
+        """
+        Check an instance against the navigation and memory limits
+
+        Memory is read at most once per check interval, as walking the
+        process tree is not free.
+
+        Args:
+            browser: The instance being returned
+
+        Returns:
+            Optional[str]: Why the instance should be replaced, None if it may stay
+        """
+        if browser.draining or browser.retired:
+            return None
+
+        if self.max_navigations and browser.navigations >= self.max_navigations:
+            with self._cond:
+                self.navigation_recycles += 1
+            return f"reached {browser.navigations} navigations"
+
+        if not self.max_rss or time.monotonic() - browser.rss_checked_at < self.rss_check_interval:
+            return None
+        browser.rss_checked_at = time.monotonic()
+        rss = browser.rss = self._memory(browser.driver)
+        if rss is not None and self._over_memory(browser):
+            with self._cond:
+                self.memory_recycles += 1
+            return f"uses {rss / 1048576:.0f} MB"
+        return None
+
+    def _over_memory(self, browser: PooledBrowser) -> bool:
+        """
+        Check the last memory reading of an instance against the limit
+
+        Args:
+            browser: The instance to check
+
+        Returns:
+            bool: True if the instance was last seen above the memory limit
+        """
+        return bool(self.max_rss) and browser.rss is not None and browser.rss >= self.max_rss
+
+    def _replace(self, browser: PooledBrowser) -> bool:
+        """
+        Launch a replacement for a draining instance, then retire the instance
+
+        The replacement is started before the old instance is shut down so
+        that callers never wait for a cold browser launch. Instances over the
+        memory limit are retired on release instead and never get here.
+
+        Args:
+            browser: The draining instance
+
+        Returns:
+            bool: True if the replacement was launched
+        """
+        with self._cond:
+            if self._closed:
+                return False
+            # The replacement briefly runs beside the instance it replaces
+            self._starting += 1
+
+        try:
+            self._launch(leased=False)
+        except Exception as e:
+            logger.error(f"Failed to launch replacement for browser instance {browser.slot}: {str(e)}")
+            with self._cond:
+                browser.draining = False
+            return False
+
+        with self._cond:
+            browser.retired = True
+            idle = browser in self._idle
+            if idle:
+                self._idle.remove(browser)
+
+        # A leased instance is shut down when it is returned
+        if idle:
+            self._retire(browser, refill=False)
+        return True
+
+    def _is_alive(self, browser: PooledBrowser) -> bool:
+        """
+        Check that the browser process still answers WebDriver commands
+
+        A dead chromedriver surfaces as urllib3 or socket errors rather than
+        WebDriverException, so any failure counts as unresponsive.
+
+        Args:
+            browser: The instance to check
+
+        Returns:
+            bool: True if the instance is usable
+        """
+        try:
+            browser.driver.current_url
+            return True
+        except Exception:
+            return False
@@ -0,0 +1,110 @@
+import base64
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, Mapping, Optional
+
+from requests.structures import CaseInsensitiveDict
+
+@dataclass
+class BrowserResponse:
+    """Raw HTTP response of a browser navigation, shaped like a requests response"""
+    url: str
+    status_code: int
+    headers: Mapping[str, str] = field(default_factory=dict)
+    content: bytes = b''
+
+    def __post_init__(self):
+        """Normalize headers for case-insensitive lookup"""
+        self.headers = CaseInsensitiveDict(self.headers)
+
+    @property
+    def ok(self) -> bool:
+        """Whether the status code indicates success"""
+        return 200 <= self.status_code < 400
+
+    @property
+    def encoding(self) -> str:
+        """Character set declared by the Content-Type header"""
+        content_type = self.headers.get('Content-Type', '')
+        for param in content_type.split(';')[1:]:
+            name, _, value = param.strip().partition('=')
+            if name.lower() == 'charset' and value:
+                return value.strip('"\'')
+        return 'utf-8'
+
+    @property
+    def text(self) -> str:
+        """Body decoded with the declared character set"""
+        try:
+            return self.content.decode(self.encoding, errors='replace')
+        except LookupError:
+            return self.content.decode('utf-8', errors='replace')
+
+    def iter_content(self, chunk_size: int = 1) -> Iterator[bytes]:
+        """
+        Iterate over the body in chunks, as a streamed requests response would
+
+        Args:
+            chunk_size: Bytes per chunk
+
+        Returns:
+            Iterator[bytes]: Parts of the body
+        """
+        for start in range(0, len(self.content), chunk_size):
+            yield self.content[start:start + chunk_size]
+
+    def close(self) -> None:
+        """Release the response; the body is already in memory"""
+
+    @classmethod
+    def from_page_source(cls, url: str, page_source: str) -> "BrowserResponse":
+        """
+        Build a response from the serialized DOM when no network data was captured
+
+        Args:
+            url: The requested URL
+            page_source: The browser's page source
+
+        Returns:
+            BrowserResponse: Response assumed to be successful
+        """
+        return cls(
+            url=url,
+            status_code=200,
+            headers={'Content-Type': 'text/html; charset=utf-8'},
+            content=page_source.encode('utf-8')
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Serialize the response for JSON transport
+
+        Returns:
+            Dict[str, Any]: Response fields with a base64 encoded body
+        """
+        return {
+            "url": self.url,
+            "status_code": self.status_code,
+            "headers": dict(self.headers),
+            "body": base64.b64encode(self.content).decode('ascii')
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> Optional["BrowserResponse"]:
+        """
+        Deserialize a response produced by ``to_dict``
+
+        Args:
+            data: Serialized response
+
+        Returns:
+            Optional[BrowserResponse]: The response, or None if malformed
+        """
+        try:
+            return cls(
+                url=data['url'],
+                status_code=int(data['status_code']),
+                headers=data.get('headers') or {},
+                content=base64.b64decode(data.get('body') or '')
+            )
+        except (KeyError, TypeError, ValueError):
+            return None
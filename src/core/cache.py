@@ -1,42 +1,86 @@
 import os
-import json
 import time
 import logging
 import threading
-from typing import Dict, Optional, Any
+from contextlib import ExitStack
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Any
 
 from src.config.settings import Settings
+from src.core.cache_store import CacheStore, create_store
+from src.core.memory_cache import MemoryCache
+from src.core.negative_cache import NegativeCache
 
 logger = logging.getLogger(__name__)
 
+# Writer locks shared by gallery IDs with the same remainder
+LOCK_STRIPES = 64
+
+@dataclass
+class CacheEntry:
+    """Cached gallery data with the time it was stored"""
+    data: Dict[str, Any]
+    cached_at: float
+
+    @property
+    def age(self) -> float:
+        """Seconds since the entry was stored"""
+        return time.time() - self.cached_at
+
+    @property
+    def is_stale(self) -> bool:
+        """Whether the entry has outlived CACHE_DURATION"""
+        return self.age >= Settings.CACHE_DURATION
+
 class GalleryCache:
     """Cache manager for gallery data"""
     
-    def __init__(self, cache_dir: str = Settings.GALLERY_CACHE_DIR):
+    def __init__(
+        self,
+        cache_dir: str = Settings.GALLERY_CACHE_DIR,
+        memory_bytes: int = Settings.CACHE_MEMORY_MAX_MB * 1048576,
+        store: Optional[CacheStore] = None
+    ):
         """
         Initialize the gallery cache
         
         Args:
             cache_dir: Directory to store cache files
+            memory_bytes: Serialized size of the entries held in memory (0 disables the memory tier)
+            store: Storage engine (defaults to the configured CACHE_BACKEND in cache_dir)
         """
         self.cache_dir = cache_dir
         logger.info(f"Initializing gallery cache at: {cache_dir}")
         os.makedirs(cache_dir, exist_ok=True)
-        self.lock = threading.Lock()
+        self.store = store or create_store(cache_dir=cache_dir)
+        
+        # 404s and repeatedly failing galleries, kept apart from the gallery entries
+        self.negative = NegativeCache(os.path.join(cache_dir, 'negative.bin'))
+        
+        # Hot entries are served from memory; every entry is also written to the store
+        self.memory = MemoryCache(memory_bytes)
+        self.disk_hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+        
+        # Reads take no lock: the stores publish entries atomically, so a reader sees
+        # either the previous or the new entry. Writers of one gallery are serialized.
+        self._locks: List[threading.Lock] = [threading.Lock() for _ in range(LOCK_STRIPES)]
+        # Bumped under the stripe lock by every write and removal, so a reader can tell
+        # that the entry it read from the store was replaced before it promoted it
+        self._generations: List[int] = [0] * LOCK_STRIPES
     
-    def _get_cache_path(self, gallery_id: int) -> str:
+    def _lock_for(self, gallery_id: int) -> threading.Lock:
         """
-        Get the cache file path for a gallery
+        Get the writer lock of a gallery
         
         Args:
             gallery_id: The gallery ID
             
         Returns:
-            str: Path to the cache file
+            threading.Lock: The lock of the gallery's stripe
         """
-        path = os.path.join(self.cache_dir, f"{gallery_id}.json")
-        logger.debug(f"Cache path for gallery {gallery_id}: {path}")
-        return path
+        return self._locks[gallery_id % LOCK_STRIPES]
     
     def get(self, gallery_id: int) -> Optional[Dict[str, Any]]:
         """
@@ -46,106 +90,190 @@ class GalleryCache:
             gallery_id: The gallery ID
             
         Returns:
-            Optional[Dict[str, Any]]: Cached data if available and valid, None otherwise
+            Optional[Dict[str, Any]]: Cached data if available and fresh, None otherwise
+        """
+        entry = self.lookup(gallery_id)
+        if entry and not entry.is_stale:
+            return entry.data
+        return None
+    
+    def lookup(self, gallery_id: int) -> Optional[CacheEntry]:
+        """
+        Get the cache entry of a gallery, including one past CACHE_DURATION
+        
+        Entries are kept for CACHE_MAX_STALE seconds after they expire so they can
+        be served while a refresh runs or upstream is failing; older ones are removed.
+        Entries found on disk are promoted to the memory tier.
+        
+        Args:
+            gallery_id: The gallery ID
+            
+        Returns:
+            Optional[CacheEntry]: The entry if available and within the max-stale bound, None otherwise
         """
-        cache_path = self._get_cache_path(gallery_id)
+        entry = self.memory.get(gallery_id)
+        if entry is not None:
+            if entry.age < Settings.CACHE_DURATION + Settings.CACHE_MAX_STALE:
+                return entry
+            self.memory.discard(gallery_id)
+        
         logger.info(f"Checking cache for gallery {gallery_id}")
         
-        with self.lock:
+        generation = self._generations[gallery_id % LOCK_STRIPES]
+        try:
+            stored = self.store.read(gallery_id)
+        except ValueError as e:
+            logger.error(f"Cache read error for gallery {gallery_id}: {str(e)}")
+            self._discard_unusable(gallery_id)
+            stored = None
+        except Exception as e:
+            logger.error(f"Unexpected cache read error: {str(e)}")
+            return None
+        
+        if stored:
+            cached_at, data, size = stored
+            entry = CacheEntry(data=data, cached_at=cached_at)
+            if entry.age < Settings.CACHE_DURATION + Settings.CACHE_MAX_STALE:
+                with self._stats_lock:
+                    self.disk_hits += 1
+                self._promote(gallery_id, entry, size, generation)
+                return entry
+            self._discard_unusable(gallery_id)
+        with self._stats_lock:
+            self.misses += 1
+        return None
+    
+    def _promote(self, gallery_id: int, entry: CacheEntry, size: int, generation: int) -> None:
+        """
+        Hold an entry read from the store in memory, unless a writer replaced or removed it since
+        
+        Without the check, a reader racing set() or delete() could put the
+        entry it read before the write back into memory after it.
+        
+        Args:
+            gallery_id: The gallery ID
+            entry: The entry read from the store
+            size: Serialized size of the entry in bytes
+            generation: The stripe's generation before the entry was read
+        """
+        stripe = gallery_id % LOCK_STRIPES
+        with self._locks[stripe]:
+            if self._generations[stripe] == generation:
+                self.memory.put(gallery_id, entry, size)
+    
+    def _changed(self, gallery_id: int) -> None:
+        """Mark the entries of a gallery's stripe as replaced (stripe lock held)"""
+        self._generations[gallery_id % LOCK_STRIPES] += 1
+    
+    def _discard_unusable(self, gallery_id: int) -> None:
+        """
+        Remove an entry found corrupt or past the max-stale bound, unless a writer replaced it meanwhile
+        
+        Args:
+            gallery_id: The gallery ID
+        """
+        with self._lock_for(gallery_id):
             try:
-                if os.path.exists(cache_path):
-                    try:
-                        with open(cache_path, 'r', encoding='utf-8') as f:
-                            cached_data = json.load(f)
-                            if time.time() - cached_data['cached_at'] < Settings.CACHE_DURATION:
-                                return cached_data['data']
-                            else:
-                                self._remove_cache_file(cache_path)
-                    except (json.JSONDecodeError, KeyError) as e:
-                        logger.error(f"Cache read error for gallery {gallery_id}: {str(e)}")
-                        self._remove_cache_file(cache_path)
-                return None
+                stored = self.store.read(gallery_id)
+                if stored and time.time() - stored[0] < Settings.CACHE_DURATION + Settings.CACHE_MAX_STALE:
+                    return
+            except ValueError:
+                pass
+            self._changed(gallery_id)
+            try:
+                self.store.delete(gallery_id)
             except Exception as e:
-                logger.error(f"Unexpected cache read error: {str(e)}")
-                return None
+                logger.error(f"Failed to remove cache entry {gallery_id}: {str(e)}")
     
-    def set(self, gallery_id: int, data: Dict[str, Any]) -> bool:
+    def set(self, gallery_id: int, data: Dict[str, Any], cached_at: Optional[float] = None) -> bool:
         """
         Cache data for a gallery
         
         Args:
             gallery_id: The gallery ID
             data: The data to cache
+            cached_at: Time the data was fetched (defaults to now)
             
         Returns:
             bool: True if cache was successful, False otherwise
         """
-        cache_path = self._get_cache_path(gallery_id)
         logger.info(f"Caching gallery {gallery_id}")
+        self.negative.discard(gallery_id)
+        entry = CacheEntry(data=data, cached_at=time.time() if cached_at is None else cached_at)
         
-        with self.lock:
+        with self._lock_for(gallery_id):
+            self._changed(gallery_id)
             try:
-                cache_data = {
-                    'cached_at': time.time(),
-                    'data': data
-                }
-                
-                temp_path = cache_path + '.tmp'
-                try:
-                    with open(temp_path, 'w', encoding='utf-8') as f:
-                        json.dump(cache_data, f, ensure_ascii=False)
-                    
-                    if os.path.exists(cache_path):
-                        os.remove(cache_path)
-                    os.rename(temp_path, cache_path)
-                    return True
-                finally:
-                    if os.path.exists(temp_path):
-                        self._remove_cache_file(temp_path)
+                size = self.store.write(gallery_id, entry.cached_at, data)
+                self.memory.put(gallery_id, entry, size)
+                return True
             except Exception as e:
                 logger.error(f"Cache write error: {str(e)}")
-                self._remove_cache_file(cache_path)
+                self.memory.discard(gallery_id)
+                try:
+                    self.store.delete(gallery_id)
+                except Exception:
+                    pass
                 return False
     
-    def _remove_cache_file(self, path: str) -> None:
+    def delete(self, gallery_id: int) -> None:
         """
-        Safely remove a cache file
+        Remove the cached data of a gallery
         
         Args:
-            path: Path to the cache file
+            gallery_id: The gallery ID
         """
-        try:
-            if os.path.exists(path):
-                os.remove(path)
-        except OSError as e:
-            logger.error(f"Failed to remove cache file {path}: {str(e)}")
+        with self._lock_for(gallery_id):
+            self._changed(gallery_id)
+            self.memory.discard(gallery_id)
+            try:
+                self.store.delete(gallery_id)
+            except Exception as e:
+                logger.error(f"Failed to remove cache entry {gallery_id}: {str(e)}")
     
     def clear(self) -> None:
         """Clear all cached data"""
-        with self.lock:
+        self.negative.clear()
+        # Every writer lock is held so no reader promotes an entry read before the clear
+        with ExitStack() as stack:
+            for stripe, lock in enumerate(self._locks):
+                stack.enter_context(lock)
+                self._generations[stripe] += 1
+            self.memory.clear()
             try:
-                for filename in os.listdir(self.cache_dir):
-                    if filename.endswith('.json'):
-                        self._remove_cache_file(os.path.join(self.cache_dir, filename))
+                self.store.clear()
             except Exception as e:
                 logger.error(f"Failed to clear cache: {str(e)}")
     
     def cleanup_expired(self) -> None:
-        """Remove expired cache entries"""
-        with self.lock:
-            try:
-                current_time = time.time()
-                for filename in os.listdir(self.cache_dir):
-                    if not filename.endswith('.json'):
-                        continue
-                        
-                    file_path = os.path.join(self.cache_dir, filename)
-                    try:
-                        with open(file_path, 'r', encoding='utf-8') as f:
-                            cached_data = json.load(f)
-                            if current_time - cached_data['cached_at'] >= Settings.CACHE_DURATION:
-                                self._remove_cache_file(file_path)
-                    except (json.JSONDecodeError, KeyError, OSError):
-                        self._remove_cache_file(file_path)
-            except Exception as e:
-                logger.error(f"Failed to cleanup expired cache: {str(e)}") 
\ No newline at end of file
+        """
+        Remove cache entries past the max-stale bound
+        
+        The sweep removes entries one at a time (or one batch at a time) under
+        their own writer lock, so requests keep being served while it runs.
+        """
+        self.negative.prune()
+        try:
+            removed = self.store.delete_older_than(
+                time.time() - Settings.CACHE_DURATION - Settings.CACHE_MAX_STALE,
+                lock_for=self._lock_for
+            )
+            logger.info(f"Removed {removed} expired cache entries")
+        except Exception as e:
+            logger.error(f"Failed to cleanup expired cache: {str(e)}")
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics
+        
+        Returns:
+            Dict[str, Any]: Hits per tier, misses, memory tier usage and negative cache counters
+        """
+        return {
+            **self.store.stats(),
+            "memory_hits": self.memory.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "memory": self.memory.stats(),
+            "negative": self.negative.stats()
+        }
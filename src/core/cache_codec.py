@@ -0,0 +1,251 @@
+import os
+import random
+import struct
+import logging
+import argparse
+import threading
+from typing import Dict, List
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None  # type: ignore[assignment]
+
+from src.config.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+# Compressed entries start with a magic, a format version and the ID of the
+# dictionary they were compressed with (0 for none). Anything else is a plain
+# JSON entry as written before compression existed.
+MAGIC = b'NHZ'
+FORMAT_VERSION = 1
+_HEADER = struct.Struct('<3sBI')
+
+class CacheCodec:
+    """Encodes cache entries, compressing them with zstd and a trained dictionary when enabled"""
+
+    def __init__(
+        self,
+        dictionary_dir: str = '',
+        compress: bool = Settings.CACHE_COMPRESSION,
+        level: int = Settings.CACHE_COMPRESSION_LEVEL
+    ):
+        """
+        Initialize the codec
+
+        Args:
+            dictionary_dir: Directory holding trained dictionaries (empty compresses without one)
+            compress: Whether new entries are compressed; existing ones are read either way
+            level: zstd compression level
+        """
+        self.dictionary_dir = dictionary_dir
+        self.level = level
+        self.compress = compress and zstandard is not None
+        if compress and zstandard is None:
+            logger.warning("CACHE_COMPRESSION is enabled but zstandard is not installed, writing plain entries")
+
+        self.lock = threading.Lock()
+        self._dictionaries: Dict[int, "zstandard.ZstdCompressionDict"] = {}
+        # zstd contexts must not be shared between threads
+        self._local = threading.local()
+        self.dictionary_id = self._load_current() if self.compress else 0
+
+    def encode(self, record: bytes) -> bytes:
+        """
+        Encode a serialized entry for storage
+
+        Args:
+            record: The entry as UTF-8 JSON
+
+        Returns:
+            bytes: The compressed entry, or the JSON itself if compression is off
+        """
+        if not self.compress:
+            return record
+        compressor = getattr(self._local, 'compressor', None)
+        if compressor is None:
+            dictionary = self._dictionaries.get(self.dictionary_id)
+            compressor = zstandard.ZstdCompressor(level=self.level, dict_data=dictionary)
+            self._local.compressor = compressor
+        return _HEADER.pack(MAGIC, FORMAT_VERSION, self.dictionary_id) + compressor.compress(record)
+
+    def decode(self, payload: bytes) -> bytes:
+        """
+        Decode a stored entry of any format version
+
+        Args:
+            payload: The stored bytes
+
+        Returns:
+            bytes: The entry as UTF-8 JSON
+
+        Raises:
+            ValueError: If the entry is compressed in a way this process cannot read
+        """
+        if not payload.startswith(MAGIC):
+            return payload
+        if len(payload) < _HEADER.size:
+            raise ValueError("Truncated compressed cache entry")
+        _, version, dictionary_id = _HEADER.unpack_from(payload)
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unknown cache entry format version {version}")
+        if zstandard is None:
+            raise ValueError("Compressed cache entry but zstandard is not installed")
+        try:
+            return self._decompressor(dictionary_id).decompress(payload[_HEADER.size:])
+        except zstandard.ZstdError as e:
+            raise ValueError(f"Corrupt compressed cache entry: {str(e)}") from e
+
+    def stats(self) -> Dict[str, object]:
+        """
+        Get codec settings
+
+        Returns:
+            Dict[str, object]: Whether new entries are compressed and the dictionary used
+        """
+        return {
+            "compression": self.compress,
+            "dictionary_id": self.dictionary_id
+        }
+
+    def _decompressor(self, dictionary_id: int) -> "zstandard.ZstdDecompressor":
+        """
+        Get the calling thread's decompressor for a dictionary
+
+        Args:
+            dictionary_id: ID of the dictionary the entry was compressed with
+
+        Returns:
+            zstandard.ZstdDecompressor: The decompressor
+
+        Raises:
+            ValueError: If the dictionary is not available
+        """
+        decompressors = getattr(self._local, 'decompressors', None)
+        if decompressors is None:
+            decompressors = self._local.decompressors = {}
+        decompressor = decompressors.get(dictionary_id)
+        if decompressor is None:
+            dictionary = self._dictionary(dictionary_id) if dictionary_id else None
+            decompressor = zstandard.ZstdDecompressor(dict_data=dictionary)
+            decompressors[dictionary_id] = decompressor
+        return decompressor
+
+    def _dictionary(self, dictionary_id: int) -> "zstandard.ZstdCompressionDict":
+        """
+        Load a dictionary by ID, keeping it for later entries
+
+        Args:
+            dictionary_id: The dictionary ID
+
+        Returns:
+            zstandard.ZstdCompressionDict: The dictionary
+
+        Raises:
+            ValueError: If no such dictionary was saved
+        """
+        with self.lock:
+            dictionary = self._dictionaries.get(dictionary_id)
+            if dictionary is not None:
+                return dictionary
+            path = dictionary_path(self.dictionary_dir, dictionary_id)
+            try:
+                with open(path, 'rb') as f:
+                    dictionary = zstandard.ZstdCompressionDict(f.read())
+            except OSError as e:
+                raise ValueError(f"Missing compression dictionary {dictionary_id}") from e
+            self._dictionaries[dictionary_id] = dictionary
+            return dictionary
+
+    def _load_current(self) -> int:
+        """
+        Load the most recently trained dictionary for compressing new entries
+
+        Returns:
+            int: Its ID, 0 if none was trained
+        """
+        if not self.dictionary_dir or not os.path.isdir(self.dictionary_dir):
+            return 0
+        trained = [
+            entry for entry in os.scandir(self.dictionary_dir)
+            if entry.name.endswith('.dict') and entry.name[:-5].isdigit()
+        ]
+        if not trained:
+            return 0
+        newest = max(trained, key=lambda entry: entry.stat().st_mtime)
+        try:
+            return self._dictionary(int(newest.name[:-5])).dict_id()
+        except ValueError as e:
+            logger.warning(f"Compressing without a dictionary: {str(e)}")
+            return 0
+
+def dictionary_path(dictionary_dir: str, dictionary_id: int) -> str:
+    """
+    Get the file a dictionary is saved to
+
+    Args:
+        dictionary_dir: Directory holding trained dictionaries
+        dictionary_id: The dictionary ID
+
+    Returns:
+        str: Path of the dictionary file
+    """
+    return os.path.join(dictionary_dir, f"{dictionary_id}.dict")
+
+def train_dictionary(samples: List[bytes], dictionary_dir: str, size: int = 112640) -> int:
+    """
+    Train a dictionary from serialized entries and save it as the current one
+
+    Dictionaries are never overwritten, so entries compressed with an earlier
+    one stay readable.
+
+    Args:
+        samples: Serialized cache entries
+        dictionary_dir: Directory holding trained dictionaries
+        size: Dictionary size in bytes
+
+    Returns:
+        int: ID of the new dictionary
+    """
+    if zstandard is None:
+        raise RuntimeError("zstandard is not installed")
+    dictionary = zstandard.train_dictionary(size, samples)
+    os.makedirs(dictionary_dir, exist_ok=True)
+    path = dictionary_path(dictionary_dir, dictionary.dict_id())
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(dictionary.as_bytes())
+    os.replace(temp_path, path)
+    return dictionary.dict_id()
+
+if __name__ == "__main__":
+    import json
+    from src.core.cache_store import create_store
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+    parser = argparse.ArgumentParser(description="Train the zstd dictionary for cache entries from the cache itself")
+    parser.add_argument('--cache-dir', default=Settings.GALLERY_CACHE_DIR)
+    parser.add_argument('--backend', default=Settings.CACHE_BACKEND)
+    parser.add_argument('--samples', type=int, default=5000, help="Entries sampled at most")
+    parser.add_argument('--size', type=int, default=112640, help="Dictionary size in bytes")
+    args = parser.parse_args()
+
+    # Reservoir sample so large caches are never held in memory at once
+    samples: List[bytes] = []
+    for seen, (_, cached_at, data) in enumerate(create_store(args.backend, args.cache_dir).entries()):
+        sample = json.dumps({'cached_at': cached_at, 'data': data}, ensure_ascii=False).encode('utf-8')
+        if len(samples) < args.samples:
+            samples.append(sample)
+        else:
+            slot = random.randint(0, seen)
+            if slot < args.samples:
+                samples[slot] = sample
+    if len(samples) < 10:
+        parser.error(f"Only {len(samples)} cached entries found, cache more galleries before training")
+
+    dictionary_id = train_dictionary(samples, os.path.join(args.cache_dir, 'dictionaries'), args.size)
+    logger.info(f"Trained dictionary {dictionary_id} from {len(samples)} entries; restart the workers to use it")
@@ -0,0 +1,495 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import argparse
+import threading
+from abc import ABC, abstractmethod
+from contextlib import nullcontext
+from typing import Any, Callable, ContextManager, Dict, Iterator, Optional, Tuple
+
+from src.config.settings import Settings
+from src.core.cache_codec import CacheCodec
+
+logger = logging.getLogger(__name__)
+
+# Cached time, gallery data and serialized size of a stored entry
+StoredEntry = Tuple[float, Dict[str, Any], int]
+
+# Returns the writer lock of a gallery ID
+LockFor = Callable[[int], ContextManager]
+
+# Rows removed per statement by the SQLite sweep
+SWEEP_BATCH = 500
+
+class CacheStore(ABC):
+    """Storage engine holding the serialized gallery cache entries"""
+
+    name = 'base'
+    codec: CacheCodec
+
+    @abstractmethod
+    def read(self, gallery_id: int) -> Optional[StoredEntry]:
+        """
+        Read the entry of a gallery
+
+        Args:
+            gallery_id: The gallery ID
+
+        Returns:
+            Optional[StoredEntry]: Cached time, data and serialized size, None if not stored
+
+        Raises:
+            ValueError: If the stored entry is corrupt
+        """
+
+    @abstractmethod
+    def write(self, gallery_id: int, cached_at: float, data: Dict[str, Any]) -> int:
+        """
+        Store the entry of a gallery, replacing any previous one
+
+        Args:
+            gallery_id: The gallery ID
+            cached_at: Time the data was fetched
+            data: Gallery data
+
+        Returns:
+            int: Serialized size of the entry in bytes
+        """
+
+    @abstractmethod
+    def delete(self, gallery_id: int) -> None:
+        """
+        Remove the entry of a gallery if it is stored
+
+        Args:
+            gallery_id: The gallery ID
+        """
+
+    @abstractmethod
+    def delete_older_than(self, cutoff: float, lock_for: Optional[LockFor] = None) -> int:
+        """
+        Remove every entry cached before a point in time
+
+        Args:
+            cutoff: Unix time entries must have been cached at or after to be kept
+            lock_for: Writer lock of a gallery, held while its entry is removed
+
+        Returns:
+            int: Number of entries removed
+        """
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Remove every entry"""
+
+    @abstractmethod
+    def entries(self) -> Iterator[Tuple[int, float, Dict[str, Any]]]:
+        """
+        Iterate over the stored entries
+
+        Returns:
+            Iterator[Tuple[int, float, Dict[str, Any]]]: Gallery ID, cached time and data of
+            each readable entry
+        """
+
+    def close(self) -> None:
+        """Release the store's resources"""
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get store settings
+
+        Returns:
+            Dict[str, Any]: Storage engine and entry encoding
+        """
+        return {"backend": self.name, **self.codec.stats()}
+
+class FileStore(CacheStore):
+    """One JSON file per gallery in a directory"""
+
+    name = 'file'
+
+    def __init__(self, cache_dir: str, codec: Optional[CacheCodec] = None):
+        """
+        Initialize the file store
+
+        Args:
+            cache_dir: Directory holding the cache files
+            codec: Entry encoding (defaults to the configured one, with dictionaries in cache_dir)
+        """
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+        self.codec = codec or CacheCodec(os.path.join(cache_dir, 'dictionaries'))
+
+    def _get_cache_path(self, gallery_id: int) -> str:
+        """
+        Get the cache file path for a gallery
+
+        Args:
+            gallery_id: The gallery ID
+
+        Returns:
+            str: Path to the cache file
+        """
+        return os.path.join(self.cache_dir, f"{gallery_id}.json")
+
+    def read(self, gallery_id: int) -> Optional[StoredEntry]:
+        """
+        Read the cache file of a gallery
+
+        Args:
+            gallery_id: The gallery ID
+
+        Returns:
+            Optional[StoredEntry]: Cached time, data and size of the entry's JSON, None if there is no file
+
+        Raises:
+            ValueError: If the file is not a cache entry
+        """
+        cache_path = self._get_cache_path(gallery_id)
+        try:
+            with open(cache_path, 'rb') as f:
+                content = self.codec.decode(f.read())
+        except FileNotFoundError:
+            return None
+        try:
+            cached_data = json.loads(content)
+            return cached_data['cached_at'], cached_data['data'], len(content)
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"Malformed cache file {cache_path}") from e
+
+    def write(self, gallery_id: int, cached_at: float, data: Dict[str, Any]) -> int:
+        """
+        Write the cache file of a gallery through a temporary file
+
+        The file is published with an atomic rename, so readers never see a partial
+        entry, and its modification time is set to the cached time for the sweep.
+
+        Args:
+            gallery_id: The gallery ID
+            cached_at: Time the data was fetched
+            data: Gallery data
+
+        Returns:
+            int: Size of the entry's JSON
+        """
+        cache_path = self._get_cache_path(gallery_id)
+        content = json.dumps({'cached_at': cached_at, 'data': data}, ensure_ascii=False).encode('utf-8')
+        temp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp_path, 'wb') as f:
+                f.write(self.codec.encode(content))
+            os.replace(temp_path, cache_path)
+            os.utime(cache_path, (cached_at, cached_at))
+            return len(content)
+        finally:
+            if os.path.exists(temp_path):
+                self._remove_cache_file(temp_path)
+
+    def delete(self, gallery_id: int) -> None:
+        """
+        Remove the cache file of a gallery
+
+        Args:
+            gallery_id: The gallery ID
+        """
+        self._remove_cache_file(self._get_cache_path(gallery_id))
+
+    def delete_older_than(self, cutoff: float, lock_for: Optional[LockFor] = None) -> int:
+        """
+        Remove cache files cached before a point in time, one file at a time
+
+        Files are selected by modification time, which write() sets to the cached
+        time, so the sweep never opens a file. Leftover temporary files are removed too.
+
+        Args:
+            cutoff: Unix time entries must have been cached at or after to be kept
+            lock_for: Writer lock of a gallery, held while its file is checked and removed
+
+        Returns:
+            int: Number of files removed
+        """
+        removed = 0
+        with os.scandir(self.cache_dir) as scan:
+            for dir_entry in scan:
+                stem, extension = os.path.splitext(dir_entry.name)
+                try:
+                    if dir_entry.stat().st_mtime >= cutoff:
+                        continue
+                except FileNotFoundError:
+                    continue
+                if extension == '.tmp':
+                    self._remove_cache_file(dir_entry.path)
+                    continue
+                if extension != '.json' or not stem.isdigit():
+                    continue
+
+                with lock_for(int(stem)) if lock_for else nullcontext():
+                    # A writer may have replaced the file since it was listed
+                    try:
+                        if os.stat(dir_entry.path).st_mtime >= cutoff:
+                            continue
+                    except FileNotFoundError:
+                        continue
+                    self._remove_cache_file(dir_entry.path)
+                    removed += 1
+        return removed
+
+    def clear(self) -> None:
+        """Remove every cache file"""
+        for filename in os.listdir(self.cache_dir):
+            if filename.endswith('.json'):
+                self._remove_cache_file(os.path.join(self.cache_dir, filename))
+
+    def entries(self) -> Iterator[Tuple[int, float, Dict[str, Any]]]:
+        """
+        Iterate over the cache files
+
+        Returns:
+            Iterator[Tuple[int, float, Dict[str, Any]]]: Gallery ID, cached time and data of
+            each readable file
+        """
+        for filename in os.listdir(self.cache_dir):
+            stem, extension = os.path.splitext(filename)
+            if extension != '.json' or not stem.isdigit():
+                continue
+            try:
+                entry = self.read(int(stem))
+            except (ValueError, OSError) as e:
+                logger.warning(f"Skipping unreadable cache file {filename}: {str(e)}")
+                continue
+            if entry:
+                yield int(stem), entry[0], entry[1]
+
+    def _remove_cache_file(self, path: str) -> None:
+        """
+        Safely remove a cache file
+
+        Args:
+            path: Path to the cache file
+        """
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.error(f"Failed to remove cache file {path}: {str(e)}")
+
+class SqliteStore(CacheStore):
+    """All entries in one SQLite database in WAL mode, indexed by cached time"""
+
+    name = 'sqlite'
+
+    def __init__(self, path: str, codec: Optional[CacheCodec] = None):
+        """
+        Initialize the SQLite store, creating the database if needed
+
+        Args:
+            path: Path of the database file
+            codec: Entry encoding (defaults to the configured one, with dictionaries beside the database)
+        """
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.codec = codec or CacheCodec(os.path.join(os.path.dirname(path), 'dictionaries'))
+        # Connections are per thread; WAL lets readers run alongside the writer
+        self._local = threading.local()
+        conn = self._connection()
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.executescript(
+            'CREATE TABLE IF NOT EXISTS galleries ('
+            ' id INTEGER PRIMARY KEY,'
+            ' cached_at REAL NOT NULL,'
+            ' data TEXT NOT NULL'
+            ');'
+            'CREATE INDEX IF NOT EXISTS galleries_cached_at ON galleries (cached_at);'
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        """
+        Get the calling thread's connection
+
+        Returns:
+            sqlite3.Connection: Connection in autocommit mode
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def read(self, gallery_id: int) -> Optional[StoredEntry]:
+        """
+        Read the row of a gallery
+
+        Args:
+            gallery_id: The gallery ID
+
+        Returns:
+            Optional[StoredEntry]: Cached time, data and size of the stored JSON, None if there is no row
+
+        Raises:
+            ValueError: If the stored JSON is corrupt
+        """
+        row = self._connection().execute(
+            'SELECT cached_at, data FROM galleries WHERE id = ?', (gallery_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        content = self._decode(row[1])
+        return row[0], json.loads(content), len(content)
+
+    def write(self, gallery_id: int, cached_at: float, data: Dict[str, Any]) -> int:
+        """
+        Insert or replace the row of a gallery
+
+        Args:
+            gallery_id: The gallery ID
+            cached_at: Time the data was fetched
+            data: Gallery data
+
+        Returns:
+            int: Size of the stored JSON
+        """
+        content = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        encoded = self.codec.encode(content)
+        self._connection().execute(
+            'INSERT OR REPLACE INTO galleries (id, cached_at, data) VALUES (?, ?, ?)',
+            # Uncompressed rows stay TEXT as before; compressed ones are stored as BLOBs
+            (gallery_id, cached_at, encoded.decode('utf-8') if encoded is content else encoded)
+        )
+        return len(content)
+
+    def delete(self, gallery_id: int) -> None:
+        """
+        Remove the row of a gallery
+
+        Args:
+            gallery_id: The gallery ID
+        """
+        self._connection().execute('DELETE FROM galleries WHERE id = ?', (gallery_id,))
+
+    def delete_older_than(self, cutoff: float, lock_for: Optional[LockFor] = None) -> int:
+        """
+        Remove rows cached before a point in time with indexed bulk deletes
+
+        Rows are removed SWEEP_BATCH at a time so the database's write lock is
+        released between statements. Each statement only removes rows that are
+        still old, so writers need no other coordination.
+
+        Args:
+            cutoff: Unix time entries must have been cached at or after to be kept
+            lock_for: Unused; kept for the common interface
+
+        Returns:
+            int: Number of rows removed
+        """
+        conn = self._connection()
+        removed = 0
+        while True:
+            count = conn.execute(
+                'DELETE FROM galleries WHERE id IN '
+                '(SELECT id FROM galleries WHERE cached_at < ? LIMIT ?)',
+                (cutoff, SWEEP_BATCH)
+            ).rowcount
+            removed += count
+            if count < SWEEP_BATCH:
+                return removed
+
+    def clear(self) -> None:
+        """Remove every row"""
+        self._connection().execute('DELETE FROM galleries')
+
+    def entries(self) -> Iterator[Tuple[int, float, Dict[str, Any]]]:
+        """
+        Iterate over the rows
+
+        Returns:
+            Iterator[Tuple[int, float, Dict[str, Any]]]: Gallery ID, cached time and data of
+            each readable row
+        """
+        for gallery_id, cached_at, content in self._connection().execute(
+            'SELECT id, cached_at, data FROM galleries ORDER BY id'
+        ):
+            try:
+                yield gallery_id, cached_at, json.loads(self._decode(content))
+            except ValueError:
+                logger.warning(f"Skipping unreadable cache row {gallery_id}")
+
+    def _decode(self, content: Any) -> bytes:
+        """
+        Decode a stored row value
+
+        Args:
+            content: TEXT of a plain entry or BLOB of a compressed one
+
+        Returns:
+            bytes: The entry's JSON
+        """
+        if isinstance(content, str):
+            return content.encode('utf-8')
+        return self.codec.decode(content)
+
+    def close(self) -> None:
+        """Close the calling thread's connection"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+def create_store(backend: str = Settings.CACHE_BACKEND, cache_dir: str = Settings.GALLERY_CACHE_DIR) -> CacheStore:
+    """
+    Build the configured cache store
+
+    Args:
+        backend: 'file' or 'sqlite'
+        cache_dir: Directory holding the cache files or database
+
+    Returns:
+        CacheStore: The store, the file store if the backend is unknown
+    """
+    if backend == SqliteStore.name:
+        return SqliteStore(os.path.join(cache_dir, 'galleries.db'))
+    if backend != FileStore.name:
+        logger.warning(f"Unknown cache backend: {backend}")
+    return FileStore(cache_dir)
+
+def migrate(source: CacheStore, target: CacheStore) -> int:
+    """
+    Copy the entries of one store into another, skipping those past the max-stale bound
+
+    Args:
+        source: Store to read from
+        target: Store to write to
+
+    Returns:
+        int: Number of entries copied
+    """
+    cutoff = time.time() - Settings.CACHE_DURATION - Settings.CACHE_MAX_STALE
+    copied = 0
+    for gallery_id, cached_at, data in source.entries():
+        if cached_at < cutoff:
+            continue
+        target.write(gallery_id, cached_at, data)
+        copied += 1
+        if copied % 1000 == 0:
+            logger.info(f"Migrated {copied} cache entries")
+    return copied
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+    parser = argparse.ArgumentParser(description="Copy gallery cache entries between storage engines")
+    parser.add_argument('--from', dest='source', default=FileStore.name, choices=[FileStore.name, SqliteStore.name])
+    parser.add_argument('--to', dest='target', default=SqliteStore.name, choices=[FileStore.name, SqliteStore.name])
+    parser.add_argument('--cache-dir', default=Settings.GALLERY_CACHE_DIR)
+    args = parser.parse_args()
+    if args.source == args.target:
+        parser.error("--from and --to must differ")
+
+    count = migrate(create_store(args.source, args.cache_dir), create_store(args.target, args.cache_dir))
+    logger.info(f"Migrated {count} cache entries from {args.source} to {args.target}")
@@ -1,28 +1,63 @@
 import time
+import json
+import base64
 import threading
 import logging
+import requests
+from requests.adapters import HTTPAdapter
 import undetected_chromedriver as uc
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.by import By
-from selenium.common.exceptions import TimeoutException, WebDriverException
-from typing import Optional
+from selenium.common.exceptions import TimeoutException
+from typing import Any, Callable, Dict, List, Optional, Union
 
 from src.config.settings import Settings
+from src.core.browser_pool import BrowserPool, BrowserPoolTimeout
+from src.core.session_health import SessionHealth
+from src.core.renewal import RenewalCoordinator
+from src.core.cookie_store import CookieStore, clearance_expiry
+from src.core.broker_client import BrokerClient
+from src.core.request_blocking import RequestBlocker
+from src.core.browser_response import BrowserResponse
+from src.core.refresher import SessionRefresher
+from src.core.profile import BrowserProfile, ProfileManager
 
 logger = logging.getLogger(__name__)
 
+# Markers identifying a Cloudflare challenge page instead of real content
+CHALLENGE_MARKERS = (
+    'challenge-form',
+    'cf-chl-',
+    '_cf_chl_opt',
+    '<title>Just a moment...</title>',
+)
+
 class CookieManager:
     """Manages browser session and cookies for web scraping using undetected-chromedriver"""
     
-    def __init__(self):
-        """Initialize the cookie manager with undetected Chrome browser"""
-        self.driver = None
+    def __init__(
+        self,
+        pool_size: int = Settings.BROWSER_POOL_SIZE,
+        broker_url: Optional[str] = None,
+        warm_up: bool = True
+    ):
+        """
+        Initialize the cookie manager with a pool of undetected Chrome browsers
+        
+        Args:
+            pool_size: Number of browser instances to keep warm
+            broker_url: Browser broker to delegate browser work to; defaults to
+                ``Settings.BROWSER_BROKER_URL``, an empty string runs browsers locally
+            warm_up: Establish the session before returning; when False call
+                ``start_warmup()`` to establish it in the background
+        """
         self.target = Settings.WEB_TARGET
-        self.last_renewal = 0
-        self.renewal_interval = 30
-        self.lock = threading.Lock()
-        self._renewing = False
+        self.last_renewal = 0.0
+        self.renewal = RenewalCoordinator(self._renew_session)
+        
+        # Renews the session off the request path before the clearance expires
+        self.refresher = SessionRefresher(self.session_expiry, self._refresh_session)
         self.max_retries = Settings.MAX_RETRIES
         
         # Browser fingerprint data
@@ -32,69 +67,262 @@ class CookieManager:
             'resolution': '1920x1080'
         }
         
-        # Initialize browser with fingerprinting
-        self._init_browser()
+        # Subresources Chrome skips when loading pages
+        self.request_blocker = RequestBlocker()
+        
+        # Keep-alive HTTP session carrying the cookies harvested by the browser
+        self.session = self._create_session()
+        self.cookies: List[Dict[str, Any]] = []
+        self.last_harvest = 0.0
+        self._harvest_lock = threading.Lock()
+        self.session_health = SessionHealth()
+        
+        # Set once a session has been established for the first time
+        self.ready = threading.Event()
+        self.warmup_error: Optional[str] = None
+        
+        # Session shared with other worker processes
+        self.cookie_store = (
+            CookieStore(Settings.COOKIE_STORE_PATH) if Settings.COOKIE_STORE_PATH else None
+        )
+        
+        # Browser broker process owning the browsers for all workers
+        broker_url = Settings.BROWSER_BROKER_URL if broker_url is None else broker_url
+        self.broker = BrokerClient(broker_url) if broker_url else None
+        
+        # Persistent Chrome profiles, keyed by the id of the driver using them
+        self.profiles = (
+            ProfileManager(Settings.BROWSER_PROFILE_DIR)
+            if Settings.BROWSER_PROFILE_DIR and not self.broker else None
+        )
+        self._driver_profiles: Dict[int, BrowserProfile] = {}
+        self._profiles_lock = threading.Lock()
+        self._clearance_margin = Settings.COOKIE_REFRESH_LEAD + Settings.COOKIE_REFRESH_JITTER
+        
+        # In hybrid mode one browser is enough to harvest cookies; further
+        # instances are launched on demand for browser fallbacks
+        self.pool = BrowserPool(self._init_browser, size=pool_size, dispose=self._quit_browser)
+        self._warm_count = 1 if Settings.FETCH_MODE == 'hybrid' else pool_size
+        if warm_up:
+            try:
+                self._warm_up()
+            except Exception as e:
+                self.warmup_error = str(e)
+                logger.error(f"Initial warm-up failed, retrying in the background: {str(e)}")
+            if not self.is_ready:
+                self.start_warmup()
     
-    def _init_browser(self):
-        """Initialize undetected Chrome with fingerprinting"""
-        try:
-            options = uc.ChromeOptions()
-            
-            # Set fingerprinting headers and preferences
-            options.add_argument(f'--user-agent={self.browser_data["user_agent"]}')
-            options.add_argument('--disable-blink-features=AutomationControlled')
-            options.add_argument('--disable-infobars')
-            options.add_argument('--disable-web-security')
-            options.add_argument('--disable-site-isolation-trials')
-            options.add_argument('--disable-features=IsolateOrigins,site-per-process')
-            
-            # Add headless mode arguments
-            options.add_argument('--headless=new')  # New headless mode
-            options.add_argument('--disable-gpu')
-            options.add_argument('--no-sandbox')
-            options.add_argument('--window-size=1920,1080')
+    @property
+    def is_ready(self) -> bool:
+        """Whether a session has been established and upstream fetches can be served"""
+        return self.ready.is_set()
+    
+    def start_warmup(self) -> threading.Thread:
+        """
+        Establish the session in a background thread, retrying until it succeeds
+        
+        Returns:
+            threading.Thread: The warm-up thread
+        """
+        thread = threading.Thread(target=self._warm_up_loop, name="browser-warmup", daemon=True)
+        thread.start()
+        return thread
+    
+    def _warm_up(self) -> None:
+        """Launch browsers or adopt a shared session so fetches can be served"""
+        if self.broker or Settings.FETCH_MODE == 'hybrid':
+            self._solve_shared(self._warm_browsers)
+        else:
+            self._warm_browsers()
+        self.last_renewal = time.time()
+    
+    def _warm_up_loop(self) -> None:
+        """Background warm-up with capped exponential backoff between attempts"""
+        delay = 5.0
+        while not self.ready.is_set():
+            try:
+                logger.info("Warming up upstream session")
+                self._warm_up()
+                self.warmup_error = None
+            except Exception as e:
+                self.warmup_error = str(e)
+                logger.error(f"Warm-up failed: {str(e)}")
             
-            # Configure experimental options
-            prefs = {
-                'profile.default_content_setting_values': {
-                    'images': 2,  # Disable images for faster loading
-                    'plugins': 2,  # Disable plugins
-                    'popups': 2,  # Disable popups
-                    'geolocation': 2,  # Disable geolocation
-                    'notifications': 2  # Disable notifications
-                },
-                'credentials_enable_service': False,
-                'profile.password_manager_enabled': False
-            }
-            options.add_experimental_option('prefs', prefs)
+            if self.ready.wait(delay):
+                break
+            delay = min(delay * 2, 60.0)
+        logger.info("Upstream session ready")
+    
+    @property
+    def _renewing(self) -> bool:
+        """Whether a session renewal is in progress"""
+        return self.renewal.in_progress
+    
+    @property
+    def driver(self) -> Optional[Any]:
+        """WebDriver of the oldest pooled browser instance"""
+        browser = self.pool.primary if hasattr(self, 'pool') else None
+        return browser.driver if browser else None
+    
+    def _create_session(self) -> requests.Session:
+        """
+        Create the pooled HTTP session used for direct fetches
+        
+        Returns:
+            requests.Session: Session with a connection pool sized for concurrent fetches
+        """
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=Settings.HTTP_POOL_SIZE
+        )
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers.update({
+            'User-Agent': self.browser_data['user_agent'],
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+            'Accept-Language': 'en-US,en;q=0.9'
+        })
+        return session
+    
+    def _chrome_options(self) -> Any:
+        """
+        Build the Chrome options used for every launch
+        
+        Returns:
+            Any: Fresh undetected Chrome options
+        """
+        options = uc.ChromeOptions()
+        
+        # Set fingerprinting headers and preferences
+        options.add_argument(f'--user-agent={self.browser_data["user_agent"]}')
+        options.add_argument('--disable-blink-features=AutomationControlled')
+        options.add_argument('--disable-infobars')
+        options.add_argument('--disable-web-security')
+        options.add_argument('--disable-site-isolation-trials')
+        options.add_argument('--disable-features=IsolateOrigins,site-per-process')
+        
+        # Add headless mode arguments
+        options.add_argument('--headless=new')  # New headless mode
+        options.add_argument('--disable-gpu')
+        options.add_argument('--no-sandbox')
+        options.add_argument('--window-size=1920,1080')
+        
+        # Configure experimental options
+        prefs = {
+            'profile.default_content_setting_values': {
+                'images': 2,  # Disable images for faster loading
+                'plugins': 2,  # Disable plugins
+                'popups': 2,  # Disable popups
+                'geolocation': 2,  # Disable geolocation
+                'notifications': 2  # Disable notifications
+            },
+            'credentials_enable_service': False,
+            'profile.password_manager_enabled': False
+        }
+        options.add_experimental_option('prefs', prefs)
+        
+        # Record DevTools network events so responses can be read without
+        # serializing the DOM through page_source
+        options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+        return options
+    
+    def _launch_chrome(self, profile: Optional[BrowserProfile]) -> Any:
+        """
+        Start Chrome, resetting its profile once if Chrome cannot start from it
+        
+        Args:
+            profile: Persistent profile to launch with, None for a temporary one
             
+        Returns:
+            Any: The WebDriver
+        """
+        kwargs = {'user_data_dir': profile.path} if profile else {}
+        try:
             # Initialize undetected Chrome with auto version detection
-            self.driver = uc.Chrome(
-                options=options,
+            return uc.Chrome(
+                options=self._chrome_options(),
+                use_subprocess=True,
+                version_main=132,  # Match the installed Chrome version
+                **kwargs
+            )
+        except Exception as e:
+            if not profile or not self.profiles:
+                raise
+            logger.warning(f"Chrome failed to start from profile {profile.path}: {str(e)}")
+            self.profiles.reset(profile)
+            return uc.Chrome(
+                options=self._chrome_options(),
                 use_subprocess=True,
-                version_main=132  # Match the installed Chrome version
+                version_main=132,
+                **kwargs
             )
+    
+    def _init_browser(self) -> Any:
+        """
+        Initialize undetected Chrome with fingerprinting
+        
+        Returns:
+            Any: WebDriver with an established session
+        """
+        driver = None
+        # A session Cloudflare has rejected must not be restored from the profile,
+        # however long its clearance cookie claims to be valid
+        profile = (
+            self.profiles.acquire(
+                self.browser_data['user_agent'],
+                self._clearance_margin,
+                reuse_clearance=not self.session_health.is_stale
+            )
+            if self.profiles else None
+        )
+        try:
+            driver = self._launch_chrome(profile)
+            if profile:
+                with self._profiles_lock:
+                    self._driver_profiles[id(driver)] = profile
+                # A clearance about to be refreshed must not be reused, or the
+                # renewal would hand back the cookies it is meant to replace
+                if not profile.has_valid_clearance(self.browser_data['user_agent'], self._clearance_margin):
+                    driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
             
             # Set browser fingerprinting properties via JavaScript
-            self._set_browser_fingerprint()
+            self._set_browser_fingerprint(driver)
             
-            # Initial page load to establish session
-            self.driver.get(self.target)
-            WebDriverWait(self.driver, 15).until(
-                EC.presence_of_element_located((By.TAG_NAME, 'body'))
-            )
-            self.last_renewal = time.time()
+            # Initial page load to establish session; request blocking for
+            # ads, analytics and static assets is enabled once it has passed.
+            # A persistent profile holding a valid clearance passes without a challenge.
+            self._pass_verification_steps(driver)
+            self._export_cookies(driver)
+            return driver
             
         except Exception as e:
             logger.error(f"Failed to initialize browser: {str(e)}")
-            if self.driver:
+            if driver:
                 try:
-                    self.driver.quit()
+                    self._quit_browser(driver)
                 except:
                     pass
+            elif profile:
+                profile.release()
             raise
     
-    def _set_browser_fingerprint(self):
+    def _quit_browser(self, driver: Any) -> None:
+        """
+        Quit a browser and unlock its persistent profile
+        
+        Args:
+            driver: The WebDriver to shut down
+        """
+        with self._profiles_lock:
+            profile = self._driver_profiles.pop(id(driver), None)
+        try:
+            driver.quit()
+        finally:
+            if profile:
+                profile.release()
+    
+    def _set_browser_fingerprint(self, driver: Any):
         """Set browser fingerprint using JavaScript execution"""
         fingerprint_script = f"""
         Object.defineProperty(navigator, 'webdriver', {{
@@ -109,7 +337,7 @@ class CookieManager:
         Object.defineProperty(screen, 'height', {{ value: {self.browser_data['resolution'].split('x')[1]} }});
         """
         
-        self.driver.execute_script(fingerprint_script)
+        driver.execute_script(fingerprint_script)
     
     def _format_plugins(self):
         """Format plugins data for JavaScript injection"""
@@ -120,108 +348,362 @@ class CookieManager:
     
     def ensure_valid_cookies(self) -> bool:
         """
-        Ensure browser session is valid and renew if necessary
+        Ensure the session is valid and renew if necessary
+        
+        Scheduled renewals run in the background (see ``SessionRefresher``);
+        the browser is only used here when real fetches have marked the
+        session stale or the clearance expired without being refreshed.
         
         Returns:
             bool: True if session is valid, False otherwise
         """
-        with self.lock:
-            if self._renewing:
-                time.sleep(2)
-                return True
-            
-            if time.time() - self.last_renewal > self.renewal_interval:
-                return self._renew_session()
-            
-            try:
-                self.driver.get(self.target)
-                WebDriverWait(self.driver, 15).until(
-                    EC.presence_of_element_located((By.TAG_NAME, 'body'))
-                )
-                return True
-            except (TimeoutException, WebDriverException) as e:
-                logger.error(f"Session validation failed: {str(e)}")
-                return self._renew_session()
+        expires_at = self.session_expiry()
+        expired = expires_at is not None and expires_at <= time.time()
+        if not expired and not self.session_health.is_stale:
+            return True
+        
+        # Join a renewal in progress rather than racing it
+        if self.renewal.in_progress:
+            return self.renewal.renew()
+        
+        if self.harvest_cookies():
+            return True
+        
+        logger.error("Session validation failed")
+        return self.renewal.renew()
+    
+    def session_expiry(self) -> Optional[float]:
+        """
+        Get the time the current session's clearance expires
+        
+        Returns:
+            Optional[float]: Expiry of the cf_clearance cookie, or the fallback
+            refresh time when it carries none; None before a session exists
+        """
+        if not self.is_ready:
+            return None
+        expiry = clearance_expiry(self.cookies)
+        if expiry is not None:
+            return expiry
+        return self.last_harvest + Settings.COOKIE_REFRESH_FALLBACK
+    
+    def _refresh_session(self) -> bool:
+        """
+        Replace the session before it expires, called by the refresher
+        
+        Returns:
+            bool: True if a fresh session was installed
+        """
+        if self.broker:
+            # The broker refreshes its own session; pick up whatever it holds
+            return self._adopt_broker_session()
+        return self.renewal.renew()
     
     def _renew_session(self) -> bool:
         """
         Renew browser session and cookies
         
+        Callers go through ``self.renewal`` so that only one renewal runs at
+        a time; concurrent callers wait for its outcome.
+        
         Returns:
             bool: True if renewal successful, False otherwise
         """
-        self._renewing = True
         retry_count = 0
         
-        try:
-            while retry_count < self.max_retries:
-                try:
-                    logger.info(f"Renewing session (attempt {retry_count + 1})")
-                    
-                    # Clean up old session
-                    if self.driver:
-                        self.driver.quit()
-                    
-                    # Initialize new session
-                    self._init_browser()
-                    
-                    # Navigate through verification steps
-                    self._pass_verification_steps()
-                    
-                    self.last_renewal = time.time()
-                    logger.info("Session renewal successful")
-                    return True
+        while retry_count < self.max_retries:
+            try:
+                logger.info(f"Renewing session (attempt {retry_count + 1})")
+                
+                if self.broker:
+                    if not self._adopt_broker_session(renew=True):
+                        raise Exception("Broker could not renew the session")
+                else:
+                    self._solve_shared(self._relaunch_browsers)
                 
-                except Exception as e:
-                    logger.error(f"Renewal attempt failed: {str(e)}")
-                    retry_count += 1
+                self.last_renewal = time.time()
+                logger.info("Session renewal successful")
+                return True
+            
+            except Exception as e:
+                logger.error(f"Renewal attempt failed: {str(e)}")
+                retry_count += 1
+                if retry_count < self.max_retries:
                     time.sleep(2 ** retry_count)
         
-        finally:
-            self._renewing = False
-        
         return False
     
-    def _pass_verification_steps(self):
+    def _relaunch_browsers(self) -> None:
+        """Replace every pooled browser with a freshly verified one"""
+        if Settings.BROWSER_STANDBY:
+            # Verify standby browsers while the old ones keep serving; each is
+            # quit only once its replacement is in the pool and its lease ended
+            if not self.pool.replace_all():
+                raise Exception("Failed to launch a standby browser")
+            self._warm_browsers()
+            return
+        
+        # Clean up old sessions; leased browsers quit once returned
+        self.pool.recycle_all()
+        
+        # Launch new sessions, each passing the verification steps
+        self._warm_browsers()
+    
+    def _pass_verification_steps(self, driver: Any):
         """Handle potential verification steps"""
+        # Cloudflare's challenge needs its scripts, styles and images
+        with self.request_blocker.suspended(driver):
+            self._navigate_verification(driver)
+    
+    def _navigate_verification(self, driver: Any):
+        """Load the target and solve a challenge if one is served"""
         try:
             # Initial page load
-            self.driver.get(self.target)
+            driver.get(self.target)
             
             # Wait for page to be fully loaded
-            WebDriverWait(self.driver, 30).until(
+            WebDriverWait(driver, 30).until(
                 lambda d: d.execute_script(
                     'return document.readyState === "complete"'
                 )
             )
             
             # Check for challenge iframe
-            if self._is_challenge_present():
-                self._solve_challenge()
+            if self._is_challenge_present(driver):
+                self._solve_challenge(driver)
             
             # Verify successful access
-            WebDriverWait(self.driver, 30).until(
+            WebDriverWait(driver, 30).until(
                 EC.presence_of_element_located((By.TAG_NAME, 'body'))
             )
             
         except TimeoutException:
             raise Exception("Timeout during verification steps")
     
-    def _is_challenge_present(self):
+    def _export_cookies(self, driver: Any) -> None:
+        """
+        Copy the browser's cookies into the HTTP session and publish them
+        
+        Args:
+            driver: WebDriver that has passed the verification steps
+        """
+        cookies: List[Dict[str, Any]] = list(driver.get_cookies() or [])
+        harvested_at = time.time()
+        if self.cookie_store:
+            harvested_at = self.cookie_store.publish(
+                cookies, self.browser_data['user_agent']
+            ).published_at
+        self._import_cookies(cookies, self.browser_data['user_agent'], harvested_at)
+        
+        # Remember the clearance so a restart from this profile can reuse it
+        with self._profiles_lock:
+            profile = self._driver_profiles.get(id(driver))
+        if profile:
+            profile.record_clearance(cookies, self.browser_data['user_agent'])
+        logger.info(f"Exported {len(cookies)} browser cookies to HTTP session")
+    
+    def _import_cookies(
+        self,
+        cookies: List[Dict[str, Any]],
+        user_agent: str,
+        harvested_at: float
+    ) -> None:
+        """
+        Load cookies and the matching user agent into the HTTP session
+        
+        The cookie jar is built aside and swapped in whole, so concurrent
+        fetches never send a mix of old and new cookies.
+        
+        Args:
+            cookies: Cookies as returned by the WebDriver
+            user_agent: User agent the clearance is bound to
+            harvested_at: Time the cookies were harvested from a browser
+        """
+        jar = requests.cookies.RequestsCookieJar()
+        for cookie in cookies:
+            jar.set(
+                cookie['name'],
+                cookie['value'],
+                domain=cookie.get('domain', ''),
+                path=cookie.get('path', '/'),
+                expires=cookie.get('expiry'),
+                secure=cookie.get('secure', False)
+            )
+        self.session.headers['User-Agent'] = user_agent
+        self.session.cookies = jar
+        self.cookies = cookies
+        self.last_harvest = harvested_at
+        self.session_health.mark_healthy()
+        self.ready.set()
+        
+        if Settings.COOKIE_REFRESH:
+            self.refresher.start()
+            self.refresher.reschedule()
+    
+    def _load_shared_session(self) -> bool:
+        """
+        Adopt a session published by another worker if it is newer than ours
+        
+        Returns:
+            bool: True if a newer, unexpired session was imported
+        """
+        if not self.cookie_store:
+            return False
+        
+        record = self.cookie_store.load()
+        if not record or record.published_at <= self.last_harvest:
+            return False
+        
+        self._import_cookies(record.cookies, record.user_agent, record.published_at)
+        logger.info(f"Adopted shared session published by worker {record.publisher}")
+        return True
+    
+    def _adopt_broker_session(self, newer_than: Optional[float] = None, renew: bool = False) -> bool:
+        """
+        Import the session held by the browser broker
+        
+        Args:
+            newer_than: Have the broker harvest again unless its session is newer
+            renew: Force the broker to renew its session first
+            
+        Returns:
+            bool: True if the broker returned a session
+        """
+        if not self.broker:
+            return False
+        payload = self.broker.renew() if renew else self.broker.session(newer_than)
+        if not payload:
+            return False
+        
+        self._import_cookies(payload['cookies'], payload['user_agent'], payload['published_at'])
+        return True
+    
+    def export_session(self) -> Dict[str, Any]:
+        """
+        Get the cookies currently used by the HTTP session
+        
+        Returns:
+            Dict[str, Any]: Cookies, user agent and the time they were harvested
+        """
+        return {
+            "cookies": self.cookies,
+            "user_agent": self.session.headers['User-Agent'],
+            "published_at": self.last_harvest
+        }
+    
+    def _solve_shared(self, solve: Callable[[], None]) -> bool:
+        """
+        Run a challenge solve unless another worker publishes a session first
+        
+        With a browser broker configured the broker solves instead.
+        
+        Args:
+            solve: Callable launching or driving browsers through verification
+            
+        Returns:
+            bool: True once the HTTP session holds fresh cookies
+        """
+        if self.broker:
+            return self._adopt_broker_session(newer_than=self.last_harvest or None)
+        
+        if self._load_shared_session():
+            return True
+        
+        if not self.cookie_store:
+            solve()
+            return True
+        
+        with self.cookie_store.solver_lock(Settings.COOKIE_STORE_WAIT) as acquired:
+            # The worker holding the lock may have just published
+            if self._load_shared_session():
+                return True
+            if not acquired:
+                logger.warning("Timed out waiting for another worker's solve, solving locally")
+            solve()
+            return True
+    
+    def _warm_browsers(self) -> None:
+        """Launch the browsers this process keeps warm"""
+        self.pool.warm(self._warm_count)
+    
+    def _harvest_in_browser(self) -> None:
+        """Pass the verification steps in a pooled browser and export its cookies"""
+        with self.pool.lease() as browser:
+            self._pass_verification_steps(browser.driver)
+            browser.navigations += 1
+            self._export_cookies(browser.driver)
+    
+    def harvest_cookies(self, since: Optional[float] = None) -> bool:
+        """
+        Refresh the HTTP session's cookies from another worker or a pooled browser
+        
+        Args:
+            since: Skip the browser if cookies were harvested after this time
+            
+        Returns:
+            bool: True if the HTTP session holds fresh cookies
+        """
+        with self._harvest_lock:
+            if since is not None and self.last_harvest > since:
+                return True
+            
+            try:
+                return self._solve_shared(self._harvest_in_browser)
+            except Exception as e:
+                logger.error(f"Cookie harvest failed: {str(e)}")
+                return False
+    
+    def _is_challenge_response(self, response: Union[requests.Response, BrowserResponse]) -> bool:
+        """
+        Check whether an HTTP response is a Cloudflare challenge page
+        
+        Args:
+            response: Response to inspect
+            
+        Returns:
+            bool: True if the response is a challenge
+        """
+        if response.headers.get('cf-mitigated') == 'challenge':
+            return True
+        if response.status_code not in (403, 503):
+            return False
+        return any(marker in response.text for marker in CHALLENGE_MARKERS)
+    
+    def _check_response(self, response: Union[requests.Response, BrowserResponse]) -> bool:
+        """
+        Record the outcome of a fetch in the session health tracker
+        
+        Args:
+            response: Response to inspect
+            
+        Returns:
+            bool: True if the response is a challenge
+        """
+        if self._is_challenge_response(response):
+            self.session_health.mark_stale("challenge page")
+            return True
+        
+        if response.status_code == 403:
+            self.session_health.mark_stale("HTTP 403")
+        else:
+            self.session_health.mark_healthy()
+        return False
+    
+    def _is_challenge_present(self, driver: Any):
         """Check for Cloudflare challenge elements"""
         try:
-            return self.driver.find_element(By.ID, 'challenge-form') is not None
+            return driver.find_element(By.ID, 'challenge-form') is not None
         except:
             return False
     
-    def _solve_challenge(self):
+    def _solve_challenge(self, driver: Any):
         """Automate challenge solving"""
         logger.info("Solving Cloudflare challenge...")
         time.sleep(5)  # Allow challenge to fully load
         
         try:
             # Click verify button if present
-            verify_button = WebDriverWait(self.driver, 20).until(
+            verify_button = WebDriverWait(driver, 20).until(
                 EC.element_to_be_clickable((By.XPATH, '//input[@type="checkbox"]'))
             )
             verify_button.click()
@@ -231,31 +713,199 @@ class CookieManager:
             logger.error(f"Failed to solve challenge: {str(e)}")
             raise
     
-    def get(self, url: str, **kwargs) -> Optional[str]:
+    def get(self, url: str, **kwargs) -> Optional[BrowserResponse]:
         """
-        Make a request using the undetected browser
+        Make a request using a browser leased from the pool
         
         Args:
             url: The URL to request
             **kwargs: Additional arguments (ignored in this implementation)
             
         Returns:
-            Optional[str]: The page source if successful, None otherwise
+            Optional[BrowserResponse]: The raw HTTP response if successful, None otherwise
+        """
+        if self.broker:
+            response = self.broker.fetch(url)
+        else:
+            response = self._browser_get(url)
+        
+        if response is not None:
+            self._check_response(response)
+        return response
+    
+    def _browser_get(self, url: str) -> Optional[BrowserResponse]:
+        """
+        Navigate a pooled browser and capture the document response
+        
+        Args:
+            url: The URL to request
+            
+        Returns:
+            Optional[BrowserResponse]: The raw HTTP response if successful, None otherwise
         """
         try:
-            self.driver.get(url)
-            WebDriverWait(self.driver, 30).until(
-                EC.presence_of_element_located((By.TAG_NAME, 'body'))
-            )
-            return self.driver.page_source
+            with self.pool.lease() as browser:
+                # Drop events left over from earlier navigations
+                self._performance_log(browser.driver)
+                started = time.monotonic()
+                browser.driver.get(url)
+                browser.navigations += 1
+                WebDriverWait(browser.driver, 30).until(
+                    EC.presence_of_element_located((By.TAG_NAME, 'body'))
+                )
+                self.request_blocker.record(
+                    time.monotonic() - started,
+                    blocked=self.request_blocker.enabled
+                )
+                response = self._capture_response(browser.driver, url)
+                
+                # The challenge cannot run with its scripts and styles blocked; load
+                # the page again with blocking lifted so it can be solved
+                if self.request_blocker.enabled and self._is_challenge_response(response):
+                    logger.info(f"Challenge served for {url}, retrying with request blocking lifted")
+                    with self.request_blocker.suspended(browser.driver):
+                        self._performance_log(browser.driver)
+                        browser.driver.get(url)
+                        browser.navigations += 1
+                        if self._is_challenge_present(browser.driver):
+                            self._solve_challenge(browser.driver)
+                        WebDriverWait(browser.driver, 30).until(
+                            EC.presence_of_element_located((By.TAG_NAME, 'body'))
+                        )
+                        response = self._capture_response(browser.driver, url)
+                    if not self._is_challenge_response(response):
+                        self._export_cookies(browser.driver)
+                return response
+        except BrowserPoolTimeout as e:
+            logger.warning(f"No browser available for {url}: {str(e)}")
+            return None
         except Exception as e:
             logger.error(f"Failed to load {url}: {str(e)}")
             return None
     
+    def _performance_log(self, driver: Any) -> List[Dict[str, Any]]:
+        """
+        Drain DevTools events recorded by the browser
+        
+        Args:
+            driver: WebDriver to read from
+            
+        Returns:
+            List[Dict[str, Any]]: Decoded DevTools messages
+        """
+        try:
+            entries = driver.get_log('performance')
+        except Exception as e:
+            logger.debug(f"Performance log unavailable: {str(e)}")
+            return []
+        
+        messages = []
+        for entry in entries or []:
+            try:
+                messages.append(json.loads(entry['message'])['message'])
+            except (KeyError, TypeError, ValueError):
+                continue
+        return messages
+    
+    def _capture_response(self, driver: Any, url: str) -> BrowserResponse:
+        """
+        Read the status, headers and body of the last document response
+        
+        Args:
+            driver: WebDriver that navigated to the URL
+            url: The requested URL
+            
+        Returns:
+            BrowserResponse: The captured response, or one built from the page
+            source when no network events were recorded
+        """
+        document = None
+        for message in self._performance_log(driver):
+            params = message.get('params') or {}
+            if message.get('method') == 'Network.responseReceived' and params.get('type') == 'Document':
+                # Redirects produce several documents; the last one is what was rendered
+                document = params
+        
+        if document is not None:
+            try:
+                body = driver.execute_cdp_cmd(
+                    'Network.getResponseBody',
+                    {'requestId': document['requestId']}
+                )
+                raw = body.get('body', '')
+                content = base64.b64decode(raw) if body.get('base64Encoded') else raw.encode('utf-8')
+                response = document.get('response') or {}
+                return BrowserResponse(
+                    url=response.get('url', url),
+                    status_code=int(response.get('status', 200)),
+                    headers=response.get('headers') or {},
+                    content=content
+                )
+            except Exception as e:
+                logger.warning(f"Failed to read response body for {url}: {str(e)}")
+        
+        return BrowserResponse.from_page_source(url, driver.page_source)
+    
+    def fetch(self, url: str, **kwargs) -> Optional[Any]:
+        """
+        Fetch a URL over the HTTP session, using the browser only for challenges
+        
+        Args:
+            url: The URL to request
+            **kwargs: Additional arguments; ``timeout`` and ``stream`` are passed
+                to the HTTP request. A streamed body is left unread unless the
+                response has to be checked for a challenge.
+            
+        Returns:
+            Optional[Any]: The response if successful, None otherwise
+        """
+        if Settings.FETCH_MODE != 'hybrid':
+            return self.get(url, **kwargs)
+        
+        timeout = kwargs.get('timeout', 10)
+        stream = kwargs.get('stream', False)
+        started = time.time()
+        try:
+            response = self.session.get(url, timeout=timeout, stream=stream)
+            if not self._check_response(response):
+                return response
+            
+            logger.info(f"Challenge received for {url}, harvesting fresh cookies")
+            if self.harvest_cookies(since=started):
+                response = self.session.get(url, timeout=timeout, stream=stream)
+                if not self._check_response(response):
+                    return response
+        except requests.RequestException as e:
+            logger.error(f"HTTP fetch failed for {url}: {str(e)}")
+        
+        logger.warning(f"Falling back to browser for {url}")
+        return self.get(url, **kwargs)
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get browser pool, session and renewal statistics
+        
+        Returns:
+            Dict[str, Any]: Upstream session statistics
+        """
+        return {
+            "ready": self.is_ready,
+            "warmup_error": self.warmup_error,
+            "pool": self.pool.stats(),
+            "session": self.session_health.snapshot(),
+            "renewal": self.renewal.stats(),
+            "refresh": self.refresher.stats(),
+            "navigation": self.request_blocker.stats(),
+            "profiles": self.profiles.stats() if self.profiles else None,
+            "last_harvest": self.last_harvest
+        }
+    
     def __del__(self):
-        """Clean up browser instance on deletion"""
-        if self.driver:
+        """Clean up browser instances on deletion"""
+        if hasattr(self, 'refresher'):
+            self.refresher.stop()
+        if hasattr(self, 'pool'):
             try:
-                self.driver.quit()
+                self.pool.close()
             except:
                 pass 
\ No newline at end of file
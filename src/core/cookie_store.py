@@ -0,0 +1,176 @@
+import os
+import json
+import time
+import logging
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict, field
+from typing import Any, Dict, Iterator, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None  # type: ignore[assignment]
+
+from src.config.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+def clearance_expiry(cookies: List[Dict[str, Any]]) -> Optional[float]:
+    """
+    Read the expiry of the Cloudflare clearance cookie
+
+    Args:
+        cookies: Cookies as returned by the WebDriver
+
+    Returns:
+        Optional[float]: Expiry timestamp of cf_clearance, if present
+    """
+    for cookie in cookies:
+        if cookie.get('name') == 'cf_clearance' and cookie.get('expiry'):
+            return float(cookie['expiry'])
+    return None
+
+@dataclass
+class SessionRecord:
+    """Clearance cookies and user agent published by the worker that solved the challenge"""
+    cookies: List[Dict[str, Any]]
+    user_agent: str
+    expires_at: float
+    published_at: float = field(default_factory=time.time)
+    publisher: int = field(default_factory=os.getpid)
+
+    @property
+    def is_expired(self) -> bool:
+        """Whether the clearance has expired"""
+        return time.time() >= self.expires_at
+
+class CookieStore:
+    """File-backed, file-locked store sharing session cookies between processes"""
+
+    def __init__(self, path: str, ttl: int = Settings.COOKIE_STORE_TTL):
+        """
+        Initialize the cookie store
+
+        Args:
+            path: Path of the shared session file
+            ttl: Fallback lifetime in seconds when cookies carry no expiry
+        """
+        self.path = path
+        self.ttl = ttl
+        self._lock_path = path + '.lock'
+        self._solver_path = path + '.solver'
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+
+    def load(self) -> Optional[SessionRecord]:
+        """
+        Read the published session
+
+        Returns:
+            Optional[SessionRecord]: The session if present and not expired
+        """
+        try:
+            with self._locked(exclusive=False):
+                if not os.path.exists(self.path):
+                    return None
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    record = SessionRecord(**json.load(f))
+        except (OSError, ValueError, TypeError) as e:
+            logger.error(f"Failed to read shared session: {str(e)}")
+            return None
+
+        return None if record.is_expired else record
+
+    def publish(self, cookies: List[Dict[str, Any]], user_agent: str) -> SessionRecord:
+        """
+        Publish freshly harvested cookies for other workers
+
+        Args:
+            cookies: Cookies as returned by the WebDriver
+            user_agent: User agent the clearance is bound to
+
+        Returns:
+            SessionRecord: The published record
+        """
+        record = SessionRecord(
+            cookies=cookies,
+            user_agent=user_agent,
+            expires_at=self._expiry(cookies)
+        )
+
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with self._locked(exclusive=True):
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    json.dump(asdict(record), f)
+                os.replace(temp_path, self.path)
+            logger.info(f"Published shared session valid until {record.expires_at:.0f}")
+        except OSError as e:
+            logger.error(f"Failed to publish shared session: {str(e)}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        return record
+
+    @contextmanager
+    def solver_lock(self, timeout: float) -> Iterator[bool]:
+        """
+        Hold the cross-process right to solve a challenge
+
+        Args:
+            timeout: Seconds to wait for another worker's solve to finish
+
+        Yields:
+            bool: True if the lock was acquired, False on timeout
+        """
+        if fcntl is None:
+            yield True
+            return
+
+        with open(self._solver_path, 'a') as handle:
+            deadline = time.monotonic() + timeout
+            acquired = False
+            while True:
+                try:
+                    fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    acquired = True
+                    break
+                except BlockingIOError:
+                    if time.monotonic() >= deadline:
+                        break
+                    time.sleep(0.2)
+            try:
+                yield acquired
+            finally:
+                if acquired:
+                    fcntl.flock(handle, fcntl.LOCK_UN)
+
+    @contextmanager
+    def _locked(self, exclusive: bool) -> Iterator[None]:
+        """
+        Hold the store's read/write lock
+
+        Args:
+            exclusive: Whether to take the lock for writing
+        """
+        if fcntl is None:
+            yield
+            return
+
+        with open(self._lock_path, 'a') as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def _expiry(self, cookies: List[Dict[str, Any]]) -> float:
+        """
+        Determine when the published clearance expires
+
+        Args:
+            cookies: Cookies as returned by the WebDriver
+
+        Returns:
+            float: Expiry timestamp
+        """
+        expiry = clearance_expiry(cookies)
+        return expiry if expiry is not None else time.time() + self.ttl
@@ -0,0 +1,100 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+class MemoryCache:
+    """In-process LRU of decoded cache entries, bounded by their serialized size"""
+
+    def __init__(self, max_bytes: int):
+        """
+        Initialize the memory cache
+
+        Args:
+            max_bytes: Total serialized size of the entries held (0 disables the cache)
+        """
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self._entries: "OrderedDict[int, Tuple[Any, int]]" = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.evictions = 0
+
+    def get(self, key: int) -> Optional[Any]:
+        """
+        Get an entry, marking it most recently used
+
+        Args:
+            key: Entry key
+
+        Returns:
+            Optional[Any]: The entry, None if it is not held
+        """
+        with self.lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def put(self, key: int, value: Any, size: int) -> bool:
+        """
+        Hold an entry, evicting the least recently used ones to make room
+
+        Args:
+            key: Entry key
+            value: The entry
+            size: Serialized size of the entry in bytes
+
+        Returns:
+            bool: True if the entry is held, False if it is larger than a quarter of the cache
+        """
+        # A few huge galleries must not flush every other entry
+        if size > self.max_bytes // 4:
+            self.discard(key)
+            return False
+        with self.lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= previous[1]
+            self._entries[key] = (value, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.bytes -= evicted_size
+                self.evictions += 1
+        return True
+
+    def discard(self, key: int) -> None:
+        """
+        Drop an entry if it is held
+
+        Args:
+            key: Entry key
+        """
+        with self.lock:
+            item = self._entries.pop(key, None)
+            if item is not None:
+                self.bytes -= item[1]
+
+    def clear(self) -> None:
+        """Drop every entry"""
+        with self.lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get memory cache counters
+
+        Returns:
+            Dict[str, int]: Entries held, their size, the size limit, hits and evictions
+        """
+        with self.lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "evictions": self.evictions
+            }
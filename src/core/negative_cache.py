@@ -0,0 +1,313 @@
+import os
+import time
+import struct
+import logging
+import threading
+from array import array
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Set, Tuple
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None  # type: ignore[assignment]
+
+from src.config.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+# Kinds of negative results
+MISSING = 1  # Upstream answered 404
+FAILED = 2   # Gallery data could not be extracted repeatedly
+
+# Snapshot layout: magic, entry count, then the id, expiry and kind arrays
+_MAGIC = b'NEG1'
+_HEADER = struct.Struct('<4sI')
+
+Snapshot = Tuple[array, array, array]
+
+class NegativeCache:
+    """Gallery IDs known to be missing or failing, kept as parallel sorted arrays"""
+
+    def __init__(
+        self,
+        path: str = '',
+        missing_ttl: float = Settings.NEGATIVE_CACHE_TTL,
+        failed_ttl: float = Settings.NEGATIVE_CACHE_FAILED_TTL,
+        max_failures: int = Settings.NEGATIVE_CACHE_FAILURES
+    ):
+        """
+        Initialize the negative cache
+
+        Args:
+            path: Snapshot file reloaded on start (empty keeps results in memory only)
+            missing_ttl: Seconds a 404 is remembered
+            failed_ttl: Seconds a repeatedly failing gallery is remembered
+            max_failures: Consecutive extraction failures before a gallery is remembered
+        """
+        self.path = path
+        self.ttls = {MISSING: missing_ttl, FAILED: failed_ttl}
+        self.max_failures = max_failures
+        self.lock = threading.Lock()
+        # About 17 bytes per ID instead of a file each
+        self._ids = array('q')
+        self._expires = array('d')
+        self._kinds = array('b')
+        self._failures: Dict[int, int] = {}
+        # Every worker saves to the same snapshot, merging what the others saved.
+        # Removals since the last save must not come back from their copies.
+        self._discarded: Set[int] = set()
+        self._cleared = False
+        self._saved_at = 0.0
+        self._dirty = False
+        self.hits = 0
+        self._load()
+
+    def get(self, gallery_id: int) -> Optional[int]:
+        """
+        Look up a gallery ID
+
+        Args:
+            gallery_id: The gallery ID
+
+        Returns:
+            Optional[int]: MISSING or FAILED if a negative result is remembered, None otherwise
+        """
+        with self.lock:
+            index = self._find(gallery_id)
+            if index is None:
+                return None
+            if self._expires[index] <= time.time():
+                self._delete(index)
+                return None
+            self.hits += 1
+            return self._kinds[index]
+
+    def add(self, gallery_id: int, kind: int) -> None:
+        """
+        Remember a negative result
+
+        Args:
+            gallery_id: The gallery ID
+            kind: MISSING or FAILED
+        """
+        expires = time.time() + self.ttls[kind]
+        with self.lock:
+            self._failures.pop(gallery_id, None)
+            index = bisect_left(self._ids, gallery_id)
+            if index < len(self._ids) and self._ids[index] == gallery_id:
+                self._expires[index] = expires
+                self._kinds[index] = kind
+            else:
+                self._ids.insert(index, gallery_id)
+                self._expires.insert(index, expires)
+                self._kinds.insert(index, kind)
+            self._dirty = True
+        self.save()
+
+    def record_failure(self, gallery_id: int) -> bool:
+        """
+        Count an extraction failure, remembering the gallery once it keeps failing
+
+        Args:
+            gallery_id: The gallery ID
+
+        Returns:
+            bool: True if the gallery is now remembered as FAILED
+        """
+        with self.lock:
+            failures = self._failures.get(gallery_id, 0) + 1
+            if failures < self.max_failures:
+                # Counts of galleries that never reach the limit are dropped in bulk
+                if len(self._failures) >= 4096:
+                    self._failures.clear()
+                self._failures[gallery_id] = failures
+                return False
+        self.add(gallery_id, FAILED)
+        return True
+
+    def discard(self, gallery_id: int) -> None:
+        """
+        Forget any negative result and failure count of a gallery
+
+        Args:
+            gallery_id: The gallery ID
+        """
+        with self.lock:
+            self._failures.pop(gallery_id, None)
+            index = self._find(gallery_id)
+            if index is None:
+                return
+            self._delete(index)
+            self._discarded.add(gallery_id)
+        self.save()
+
+    def prune(self) -> int:
+        """
+        Drop expired results and write any pending changes
+
+        Returns:
+            int: Number of results dropped
+        """
+        now = time.time()
+        with self.lock:
+            keep = [i for i, expires in enumerate(self._expires) if expires > now]
+            removed = len(self._ids) - len(keep)
+            if removed:
+                self._ids = array('q', (self._ids[i] for i in keep))
+                self._expires = array('d', (self._expires[i] for i in keep))
+                self._kinds = array('b', (self._kinds[i] for i in keep))
+                self._dirty = True
+        self.save(force=True)
+        return removed
+
+    def clear(self) -> None:
+        """Forget every negative result"""
+        with self.lock:
+            self._ids = array('q')
+            self._expires = array('d')
+            self._kinds = array('b')
+            self._failures.clear()
+            self._discarded.clear()
+            self._cleared = True
+            self._dirty = True
+        self.save(force=True)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get negative cache counters
+
+        Returns:
+            Dict[str, int]: Remembered IDs, hits and galleries with pending failures
+        """
+        with self.lock:
+            return {
+                "entries": len(self._ids),
+                "hits": self.hits,
+                "failing": len(self._failures)
+            }
+
+    def _find(self, gallery_id: int) -> Optional[int]:
+        """Index of a gallery ID in the sorted array, None if absent (lock held)"""
+        index = bisect_left(self._ids, gallery_id)
+        if index < len(self._ids) and self._ids[index] == gallery_id:
+            return index
+        return None
+
+    def _delete(self, index: int) -> None:
+        """Remove the entry at an index (lock held)"""
+        del self._ids[index]
+        del self._expires[index]
+        del self._kinds[index]
+        self._dirty = True
+
+    def _load(self) -> None:
+        """Reload the snapshot written by a previous run"""
+        if not self.path:
+            return
+        with self._file_lock():
+            snapshot = self._read_snapshot()
+        if snapshot:
+            self._ids, self._expires, self._kinds = snapshot
+            self.prune()
+
+    def _read_snapshot(self) -> Optional[Snapshot]:
+        """
+        Read the snapshot file
+
+        Returns:
+            Optional[Snapshot]: The id, expiry and kind arrays, None if there is no readable snapshot
+        """
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, 'rb') as f:
+                magic, count = _HEADER.unpack(f.read(_HEADER.size))
+                if magic != _MAGIC:
+                    raise ValueError("unknown snapshot format")
+                ids, expires, kinds = array('q'), array('d'), array('b')
+                ids.fromfile(f, count)
+                expires.fromfile(f, count)
+                kinds.fromfile(f, count)
+            return ids, expires, kinds
+        except (OSError, EOFError, ValueError, struct.error) as e:
+            logger.warning(f"Ignoring unreadable negative cache {self.path}: {str(e)}")
+            return None
+
+    def _merge(self, saved: Snapshot) -> None:
+        """
+        Take in the results other workers saved, keeping the later expiry of each ID (lock held)
+
+        Args:
+            saved: The snapshot read from disk
+        """
+        now = time.time()
+        merged = {
+            gallery_id: (expires, kind)
+            for gallery_id, expires, kind in zip(*saved)
+            if expires > now and gallery_id not in self._discarded
+        }
+        for gallery_id, expires, kind in zip(self._ids, self._expires, self._kinds):
+            if gallery_id not in merged or expires > merged[gallery_id][0]:
+                merged[gallery_id] = (expires, kind)
+        ids = sorted(merged)
+        self._ids = array('q', ids)
+        self._expires = array('d', (merged[gallery_id][0] for gallery_id in ids))
+        self._kinds = array('b', (merged[gallery_id][1] for gallery_id in ids))
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        """Hold the cross-process lock of the snapshot file"""
+        if fcntl is None:
+            yield
+            return
+
+        with open(f"{self.path}.lock", 'a') as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def save(self, force: bool = False) -> None:
+        """
+        Merge the results saved by other workers and write the snapshot
+
+        Writes happen only if something changed and the save interval passed.
+
+        Args:
+            force: Save regardless of the interval
+        """
+        if not self.path:
+            return
+        with self.lock:
+            now = time.monotonic()
+            if not self._dirty or (not force and now - self._saved_at < Settings.NEGATIVE_CACHE_SAVE_INTERVAL):
+                return
+            self._saved_at = now
+
+        with self._file_lock():
+            saved = self._read_snapshot()
+            with self.lock:
+                if saved and not self._cleared:
+                    self._merge(saved)
+                snapshot = (
+                    _HEADER.pack(_MAGIC, len(self._ids))
+                    + self._ids.tobytes() + self._expires.tobytes() + self._kinds.tobytes()
+                )
+                self._discarded.clear()
+                self._cleared = False
+                self._dirty = False
+
+            temp_path = f"{self.path}.{os.getpid()}.tmp"
+            try:
+                with open(temp_path, 'wb') as f:
+                    f.write(snapshot)
+                os.replace(temp_path, self.path)
+            except OSError as e:
+                logger.error(f"Failed to save negative cache: {str(e)}")
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
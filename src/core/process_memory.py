@@ -0,0 +1,113 @@
+import os
+import logging
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_PROC = '/proc'
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+def driver_pid(driver: Any) -> Optional[int]:
+    """
+    Find the root process of a WebDriver's browser
+
+    Args:
+        driver: The WebDriver instance
+
+    Returns:
+        Optional[int]: Chrome's pid, or chromedriver's whose children include Chrome
+    """
+    pid = getattr(driver, 'browser_pid', None)
+    if isinstance(pid, int):
+        return pid
+    try:
+        pid = driver.service.process.pid
+    except AttributeError:
+        return None
+    return pid if isinstance(pid, int) else None
+
+def _children(processes: Dict[int, int], root: int) -> List[int]:
+    """
+    Collect a process and all of its descendants
+
+    Args:
+        processes: Parent pid of every running process, keyed by pid
+        root: Pid of the tree's root
+
+    Returns:
+        List[int]: Pids in the tree
+    """
+    tree = [root]
+    for pid in tree:
+        tree.extend(child for child, parent in processes.items() if parent == pid)
+    return tree
+
+def _parent_pids() -> Dict[int, int]:
+    """
+    Read the parent pid of every running process
+
+    Returns:
+        Dict[int, int]: Parent pid keyed by pid
+    """
+    processes = {}
+    for entry in os.listdir(_PROC):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(os.path.join(_PROC, entry, 'stat'), 'r') as f:
+                # The command name may contain spaces; fields resume after its closing parenthesis
+                fields = f.read().rsplit(')', 1)[1].split()
+            processes[int(entry)] = int(fields[1])
+        except (OSError, IndexError, ValueError):
+            continue
+    return processes
+
+def _rss(pid: int) -> int:
+    """
+    Read the resident set size of a process
+
+    Args:
+        pid: Process id
+
+    Returns:
+        int: Resident memory in bytes, 0 if the process is gone
+    """
+    try:
+        with open(os.path.join(_PROC, str(pid), 'statm'), 'r') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return 0
+
+def process_tree_rss(pid: int) -> Optional[int]:
+    """
+    Sum the resident memory of a process and its descendants
+
+    Chrome runs renderer, GPU and utility processes next to the browser
+    process, so its footprint is only visible across the whole tree.
+
+    Args:
+        pid: Pid of the tree's root
+
+    Returns:
+        Optional[int]: Resident memory in bytes, None where /proc is unavailable
+    """
+    if not os.path.isdir(_PROC):
+        return None
+    try:
+        return sum(_rss(p) for p in _children(_parent_pids(), pid))
+    except OSError as e:
+        logger.debug(f"Failed to read memory of process {pid}: {str(e)}")
+        return None
+
+def driver_rss(driver: Any) -> Optional[int]:
+    """
+    Measure the resident memory of a WebDriver's browser processes
+
+    Args:
+        driver: The WebDriver instance
+
+    Returns:
+        Optional[int]: Resident memory in bytes, None if it cannot be measured
+    """
+    pid = driver_pid(driver)
+    return process_tree_rss(pid) if pid else None
@@ -0,0 +1,370 @@
+import os
+import json
+import time
+import shutil
+import sqlite3
+import logging
+import threading
+from dataclasses import dataclass, asdict, field
+from typing import Any, Dict, List, Optional, TextIO
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None  # type: ignore[assignment]
+
+from src.config.settings import Settings
+from src.core.cookie_store import clearance_expiry
+
+logger = logging.getLogger(__name__)
+
+METADATA_FILE = 'nhapiod-profile.json'
+
+# Caches Chrome rebuilds on demand; cookies and local storage are kept
+CACHE_DIRS = [
+    'Default/Cache',
+    'Default/Code Cache',
+    'Default/GPUCache',
+    'Default/DawnCache',
+    'Default/Service Worker/CacheStorage',
+    'Default/Service Worker/ScriptCache',
+    'GrShaderCache',
+    'GraphiteDawnCache',
+    'ShaderCache',
+    'Crashpad',
+    'BrowserMetrics',
+]
+
+# Left behind by a Chrome that did not exit cleanly; they block the next launch
+SINGLETON_FILES = ['SingletonLock', 'SingletonSocket', 'SingletonCookie']
+
+# Files Chrome cannot start from when truncated by a crash
+JSON_FILES = ['Local State', 'Default/Preferences']
+COOKIE_DATABASES = ['Default/Network/Cookies', 'Default/Cookies']
+
+@dataclass
+class ProfileMetadata:
+    """Bookkeeping stored next to Chrome's own files in a profile"""
+    created_at: float = field(default_factory=time.time)
+    last_used: float = 0.0
+    compacted_at: float = 0.0
+    clean_exit: bool = True
+    clearance_expires_at: Optional[float] = None
+    user_agent: str = ''
+
+class BrowserProfile:
+    """A persistent Chrome user-data-dir held exclusively by this process"""
+
+    def __init__(self, path: str, handle: Optional[TextIO], metadata: ProfileMetadata):
+        """
+        Initialize the profile
+
+        Args:
+            path: The user-data-dir
+            handle: Open lock file holding the profile's lock
+            metadata: The profile's bookkeeping
+        """
+        self.path = path
+        self.metadata = metadata
+        self._handle = handle
+
+    def has_valid_clearance(self, user_agent: str, margin: float = 60) -> bool:
+        """
+        Check whether the profile's cookies should pass Cloudflare without a challenge
+
+        Args:
+            user_agent: User agent the browser will present
+            margin: Seconds the clearance must remain valid for
+
+        Returns:
+            bool: True if a clearance bound to this user agent has not expired
+        """
+        expires_at = self.metadata.clearance_expires_at
+        return (
+            expires_at is not None
+            and expires_at > time.time() + margin
+            and self.metadata.user_agent == user_agent
+        )
+
+    def record_clearance(self, cookies: List[Dict[str, Any]], user_agent: str) -> None:
+        """
+        Remember the clearance the browser holds so a restart can reuse it
+
+        Args:
+            cookies: Cookies as returned by the WebDriver
+            user_agent: User agent the clearance is bound to
+        """
+        self.metadata.clearance_expires_at = clearance_expiry(cookies)
+        self.metadata.user_agent = user_agent
+        self.metadata.last_used = time.time()
+        self.save()
+
+    def save(self) -> None:
+        """Write the profile's metadata"""
+        temp_path = os.path.join(self.path, METADATA_FILE + '.tmp')
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(asdict(self.metadata), f)
+            os.replace(temp_path, os.path.join(self.path, METADATA_FILE))
+        except OSError as e:
+            logger.error(f"Failed to write profile metadata: {str(e)}")
+
+    def release(self) -> None:
+        """Mark the profile as cleanly closed and unlock it"""
+        if self._handle is None:
+            return
+        self.metadata.clean_exit = True
+        self.metadata.last_used = time.time()
+        self.save()
+        if fcntl is not None:
+            fcntl.flock(self._handle, fcntl.LOCK_UN)
+        self._handle.close()
+        self._handle = None
+
+class ProfileManager:
+    """Hands out persistent Chrome profiles, one per concurrently running browser"""
+
+    def __init__(
+        self,
+        root: str,
+        compact_interval: float = Settings.BROWSER_PROFILE_COMPACT_INTERVAL,
+        max_size_mb: int = Settings.BROWSER_PROFILE_MAX_MB,
+        max_profiles: int = 16
+    ):
+        """
+        Initialize the profile manager
+
+        Args:
+            root: Directory holding the profiles
+            compact_interval: Seconds between cache compactions of a profile
+            max_size_mb: Profile size that triggers compaction regardless of the interval
+            max_profiles: Upper bound on profile directories, across all workers
+        """
+        self.root = root
+        self.compact_interval = compact_interval
+        self.max_size = max_size_mb * 1048576
+        self.max_profiles = max_profiles
+        self.lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+        # Counters
+        self.acquired = 0
+        self.clearance_reuses = 0
+        self.resets = 0
+        self.compactions = 0
+
+    def acquire(self, user_agent: str, margin: float = 60, reuse_clearance: bool = True) -> Optional[BrowserProfile]:
+        """
+        Lock the first profile no other browser is using and prepare it for launch
+
+        Args:
+            user_agent: User agent the browser will present
+            margin: Seconds a reusable clearance must remain valid for
+            reuse_clearance: False to forget the recorded clearance, e.g. after Cloudflare rejected it
+
+        Returns:
+            Optional[BrowserProfile]: The profile, or None if all are in use
+        """
+        for index in range(self.max_profiles):
+            path = os.path.join(self.root, f'profile-{index}')
+            handle = self._try_lock(path)
+            if handle is None:
+                continue
+
+            os.makedirs(path, exist_ok=True)
+            metadata = self._prepare(path)
+            if not reuse_clearance:
+                metadata.clearance_expires_at = None
+            metadata.clean_exit = False
+            metadata.last_used = time.time()
+            profile = BrowserProfile(path, handle, metadata)
+            profile.save()
+            with self.lock:
+                self.acquired += 1
+                if profile.has_valid_clearance(user_agent, margin):
+                    self.clearance_reuses += 1
+                    logger.info(f"Reusing browser profile {path} with a valid clearance")
+            return profile
+
+        logger.warning("All browser profiles are in use, launching with a temporary profile")
+        return None
+
+    def reset(self, profile: BrowserProfile) -> None:
+        """
+        Wipe a profile Chrome could not start from
+
+        Args:
+            profile: The locked profile to wipe
+        """
+        logger.warning(f"Resetting browser profile {profile.path}")
+        self._wipe(profile.path)
+        profile.metadata = ProfileMetadata(clean_exit=False)
+        profile.save()
+        with self.lock:
+            self.resets += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get profile counters
+
+        Returns:
+            Dict[str, Any]: Profile usage statistics
+        """
+        with self.lock:
+            return {
+                "root": self.root,
+                "acquired": self.acquired,
+                "clearance_reuses": self.clearance_reuses,
+                "resets": self.resets,
+                "compactions": self.compactions
+            }
+
+    def _try_lock(self, path: str) -> Optional[TextIO]:
+        """
+        Take a profile's lock without waiting
+
+        Args:
+            path: The profile directory
+
+        Returns:
+            Optional[TextIO]: Open lock file, None if another browser holds it
+        """
+        handle = open(path + '.lock', 'a')
+        if fcntl is None:
+            return handle
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return handle
+        except BlockingIOError:
+            handle.close()
+            return None
+
+    def _prepare(self, path: str) -> ProfileMetadata:
+        """
+        Make a locked profile safe to launch Chrome from
+
+        Args:
+            path: The profile directory
+
+        Returns:
+            ProfileMetadata: The profile's metadata, fresh if it was reset
+        """
+        metadata = self._load_metadata(path)
+        if metadata is None or not metadata.clean_exit:
+            if self._is_corrupt(path):
+                logger.warning(f"Browser profile {path} is corrupt, resetting")
+                self._wipe(path)
+                with self.lock:
+                    self.resets += 1
+                metadata = None
+
+        # We hold the lock, so no Chrome can own the leftovers of a crashed one
+        for name in SINGLETON_FILES:
+            target = os.path.join(path, name)
+            if os.path.lexists(target):
+                os.remove(target)
+
+        metadata = metadata or ProfileMetadata()
+        if (time.time() - metadata.compacted_at > self.compact_interval
+                or self._size(path) > self.max_size):
+            self._compact(path)
+            metadata.compacted_at = time.time()
+        return metadata
+
+    def _load_metadata(self, path: str) -> Optional[ProfileMetadata]:
+        """
+        Read a profile's metadata
+
+        Args:
+            path: The profile directory
+
+        Returns:
+            Optional[ProfileMetadata]: The metadata, None if missing or unreadable
+        """
+        try:
+            with open(os.path.join(path, METADATA_FILE), 'r', encoding='utf-8') as f:
+                return ProfileMetadata(**json.load(f))
+        except (OSError, ValueError, TypeError):
+            return None
+
+    def _is_corrupt(self, path: str) -> bool:
+        """
+        Check the files Chrome needs to start from a profile
+
+        Args:
+            path: The profile directory
+
+        Returns:
+            bool: True if a settings file or the cookie database is damaged
+        """
+        for name in JSON_FILES:
+            target = os.path.join(path, name)
+            if not os.path.exists(target):
+                continue
+            try:
+                with open(target, 'r', encoding='utf-8') as f:
+                    json.load(f)
+            except (OSError, ValueError):
+                return True
+
+        for name in COOKIE_DATABASES:
+            target = os.path.join(path, name)
+            if not os.path.exists(target):
+                continue
+            try:
+                with sqlite3.connect(f'file:{target}?mode=ro', uri=True) as db:
+                    if db.execute('PRAGMA quick_check').fetchone()[0] != 'ok':
+                        return True
+            except sqlite3.DatabaseError:
+                return True
+        return False
+
+    def _compact(self, path: str) -> None:
+        """
+        Delete caches that grow without bound while keeping cookies
+
+        Args:
+            path: The profile directory
+        """
+        before = self._size(path)
+        for name in CACHE_DIRS:
+            shutil.rmtree(os.path.join(path, name), ignore_errors=True)
+        with self.lock:
+            self.compactions += 1
+        logger.info(
+            f"Compacted browser profile {path} from "
+            f"{before / 1048576:.1f} MB to {self._size(path) / 1048576:.1f} MB"
+        )
+
+    def _wipe(self, path: str) -> None:
+        """
+        Delete everything in a profile directory
+
+        Args:
+            path: The profile directory
+        """
+        for name in os.listdir(path):
+            target = os.path.join(path, name)
+            if os.path.isdir(target) and not os.path.islink(target):
+                shutil.rmtree(target, ignore_errors=True)
+            else:
+                os.remove(target)
+
+    def _size(self, path: str) -> int:
+        """
+        Measure the disk usage of a profile
+
+        Args:
+            path: The profile directory
+
+        Returns:
+            int: Size in bytes
+        """
+        total = 0
+        for directory, _, files in os.walk(path):
+            for name in files:
+                try:
+                    total += os.lstat(os.path.join(directory, name)).st_size
+                except OSError:
+                    continue
+        return total
@@ -0,0 +1,70 @@
+import time
+import threading
+from typing import Dict, Optional
+
+class RateLimiter:
+    """Token bucket spacing out upstream requests across threads"""
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        """
+        Initialize the rate limiter
+
+        Args:
+            rate: Requests allowed per second (0 disables limiting)
+            burst: Requests that may be made back to back (defaults to one second's worth)
+        """
+        self.rate = rate
+        self.capacity = float(burst if burst is not None else max(1, int(rate)))
+        self.lock = threading.Lock()
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self.acquired = 0
+        self.waited = 0.0
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """
+        Take a token, waiting for one to become available
+
+        Args:
+            timeout: Seconds to wait at most (None waits indefinitely)
+
+        Returns:
+            bool: True if a token was taken, False if the timeout passed first
+        """
+        if self.rate <= 0:
+            return True
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    self.acquired += 1
+                    return True
+                delay = (1 - self._tokens) / self.rate
+
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                delay = min(delay, remaining)
+            time.sleep(delay)
+            with self.lock:
+                self.waited += delay
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Get limiter counters
+
+        Returns:
+            Dict[str, float]: Configured rate, tokens taken and total seconds spent waiting
+        """
+        with self.lock:
+            return {
+                "rate": self.rate,
+                "acquired": self.acquired,
+                "waited_seconds": round(self.waited, 3)
+            }
@@ -0,0 +1,142 @@
+import time
+import random
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from src.config.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+class SessionRefresher:
+    """Background thread renewing the session shortly before its clearance expires"""
+
+    def __init__(
+        self,
+        expires_at: Callable[[], Optional[float]],
+        refresh: Callable[[], bool],
+        lead: float = Settings.COOKIE_REFRESH_LEAD,
+        jitter: float = Settings.COOKIE_REFRESH_JITTER,
+        retry: float = Settings.COOKIE_REFRESH_RETRY
+    ):
+        """
+        Initialize the refresher
+
+        Args:
+            expires_at: Callable returning the current session's expiry, or
+                None while there is no session
+            refresh: Callable renewing the session, returning True on success
+            lead: Seconds before expiry the refresh should start
+            jitter: Upper bound of the random extra lead, so that workers
+                sharing a session do not all renew at the same moment
+            retry: Minimum seconds between refresh attempts
+        """
+        self._expires_at = expires_at
+        self._refresh = refresh
+        self.lead = lead
+        self.jitter = jitter
+        self.retry = retry
+
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.lock = threading.Lock()
+
+        # Jitter is drawn once per expiry so rescheduling does not move the deadline
+        self._jitter_for: Optional[float] = None
+        self._jitter = 0.0
+        self._not_before = 0.0
+
+        # Counters
+        self.refreshes = 0
+        self.failures = 0
+        self.last_refresh = 0.0
+
+    @property
+    def running(self) -> bool:
+        """Whether the background thread is alive"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """Start the background thread unless it is already running"""
+        with self.lock:
+            if self.running or self._stopped.is_set():
+                return
+            self._thread = threading.Thread(target=self._run, name="session-refresh", daemon=True)
+            self._thread.start()
+
+    def reschedule(self) -> None:
+        """Recompute the next refresh, e.g. after the session was replaced"""
+        self._wake.set()
+
+    def stop(self) -> None:
+        """Stop the background thread"""
+        self._stopped.set()
+        self._wake.set()
+
+    def next_refresh_at(self) -> Optional[float]:
+        """
+        Get the time of the next scheduled refresh
+
+        Returns:
+            Optional[float]: Timestamp of the next refresh, None without a session
+        """
+        expires_at = self._expires_at()
+        if expires_at is None:
+            return None
+
+        with self.lock:
+            if self._jitter_for != expires_at:
+                self._jitter_for = expires_at
+                self._jitter = random.uniform(0, self.jitter)
+            return max(expires_at - self.lead - self._jitter, self._not_before)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get refresh counters and schedule
+
+        Returns:
+            Dict[str, Any]: Refresh counts and the upcoming refresh time
+        """
+        next_refresh = self.next_refresh_at()
+        with self.lock:
+            return {
+                "running": self.running,
+                "expires_at": self._jitter_for,
+                "next_refresh_at": next_refresh,
+                "refreshes": self.refreshes,
+                "failures": self.failures,
+                "last_refresh": self.last_refresh
+            }
+
+    def _run(self) -> None:
+        """Sleep until the next refresh is due, refresh, and repeat"""
+        while not self._stopped.is_set():
+            due = self.next_refresh_at()
+            delay = self.retry if due is None else due - time.time()
+            if delay > 0:
+                self._wake.wait(delay)
+                self._wake.clear()
+                continue
+            self._refresh_once()
+
+    def _refresh_once(self) -> None:
+        """Run one refresh and record its outcome"""
+        logger.info("Refreshing session ahead of clearance expiry")
+        try:
+            success = bool(self._refresh())
+        except Exception as e:
+            logger.error(f"Background session refresh raised: {str(e)}")
+            success = False
+
+        with self.lock:
+            # Never retry sooner than the retry interval, even if the expiry did not move
+            self._not_before = time.time() + self.retry
+            if success:
+                self.refreshes += 1
+                self.last_refresh = time.time()
+            else:
+                self.failures += 1
+
+        if not success:
+            logger.warning(f"Background session refresh failed, retrying in {self.retry:.0f}s")
@@ -0,0 +1,110 @@
+import time
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from src.config.settings import Settings
+from src.core.single_flight import SingleFlight, SingleFlightTimeout
+
+logger = logging.getLogger(__name__)
+
+class RenewalCoordinator:
+    """Runs one session renewal at a time and shares its outcome with waiters"""
+
+    _KEY = "renewal"
+
+    def __init__(
+        self,
+        renew: Callable[[], bool],
+        wait_timeout: float = Settings.RENEWAL_WAIT_TIMEOUT
+    ):
+        """
+        Initialize the coordinator
+
+        Args:
+            renew: Callable performing the renewal, returning True on success
+            wait_timeout: Default seconds a caller waits for an in-flight renewal
+        """
+        self._renew = renew
+        self.wait_timeout = wait_timeout
+        self._flight = SingleFlight()
+        self.lock = threading.Lock()
+
+        # Counters
+        self.renewals = 0
+        self.failures = 0
+        self.last_duration = 0.0
+        self.total_duration = 0.0
+        self.last_success = 0.0
+        self.last_failure = 0.0
+
+    @property
+    def in_progress(self) -> bool:
+        """Whether a renewal is currently running"""
+        return self._flight.in_flight(self._KEY)
+
+    def renew(self, timeout: Optional[float] = None) -> bool:
+        """
+        Renew the session, or wait for the renewal already in progress
+
+        Args:
+            timeout: Seconds to wait for an in-flight renewal
+
+        Returns:
+            bool: Outcome of the renewal this call ran or waited for
+        """
+        timeout = self.wait_timeout if timeout is None else timeout
+        try:
+            return self._flight.do(self._KEY, self._run, timeout)
+        except SingleFlightTimeout:
+            logger.warning(f"Gave up waiting for session renewal after {timeout}s")
+            return False
+
+    def _run(self) -> bool:
+        """
+        Execute the renewal and record its duration and outcome
+
+        Returns:
+            bool: True if the renewal succeeded
+        """
+        started = time.monotonic()
+        try:
+            success = bool(self._renew())
+        except Exception as e:
+            logger.error(f"Session renewal raised: {str(e)}")
+            success = False
+
+        duration = time.monotonic() - started
+        with self.lock:
+            self.renewals += 1
+            self.last_duration = duration
+            self.total_duration += duration
+            if success:
+                self.last_success = time.time()
+            else:
+                self.failures += 1
+                self.last_failure = time.time()
+
+        logger.info(f"Session renewal {'succeeded' if success else 'failed'} in {duration:.1f}s")
+        return success
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get renewal counters
+
+        Returns:
+            Dict[str, Any]: Renewal counts, failures and durations
+        """
+        flight = self._flight.stats()
+        with self.lock:
+            return {
+                "in_progress": flight["in_flight"] > 0,
+                "renewals": self.renewals,
+                "failures": self.failures,
+                "coalesced_waiters": flight["coalesced"],
+                "wait_timeouts": flight["timeouts"],
+                "last_duration": self.last_duration,
+                "average_duration": self.total_duration / self.renewals if self.renewals else 0.0,
+                "last_success": self.last_success,
+                "last_failure": self.last_failure
+            }
@@ -0,0 +1,70 @@
+import time
+import logging
+import threading
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+class SessionHealth:
+    """Passive tracker of upstream session validity based on real fetch outcomes"""
+
+    HEALTHY = "healthy"
+    STALE = "stale"
+
+    def __init__(self):
+        """Initialize the tracker; a session is stale until a fetch succeeds"""
+        self.lock = threading.Lock()
+        self.state = self.STALE
+        self.reason: Optional[str] = "not established"
+        self.stale_since = time.time()
+        self.last_success = 0.0
+        self.last_failure = 0.0
+        self.consecutive_failures = 0
+
+    @property
+    def is_stale(self) -> bool:
+        """Whether the session needs to be validated before the next fetch"""
+        return self.state == self.STALE
+
+    def mark_healthy(self) -> None:
+        """Record a fetch that reached real upstream content"""
+        with self.lock:
+            if self.state == self.STALE:
+                logger.info("Upstream session marked healthy")
+            self.state = self.HEALTHY
+            self.reason = None
+            self.last_success = time.time()
+            self.consecutive_failures = 0
+
+    def mark_stale(self, reason: str) -> None:
+        """
+        Record a fetch that showed the session is no longer accepted
+
+        Args:
+            reason: Short description of the failure
+        """
+        with self.lock:
+            now = time.time()
+            if self.state == self.HEALTHY:
+                logger.warning(f"Upstream session marked stale: {reason}")
+                self.stale_since = now
+            self.state = self.STALE
+            self.reason = reason
+            self.last_failure = now
+            self.consecutive_failures += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Get the current tracker state
+
+        Returns:
+            Dict[str, Any]: State, reason and timestamps
+        """
+        with self.lock:
+            return {
+                "state": self.state,
+                "reason": self.reason,
+                "last_success": self.last_success,
+                "last_failure": self.last_failure,
+                "consecutive_failures": self.consecutive_failures
+            }
@@ -0,0 +1,99 @@
+import logging
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+class SingleFlightTimeout(Exception):
+    """Raised when a waiter gives up on an in-flight call"""
+
+class _Call:
+    """State of one in-flight call shared between its leader and waiters"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+class SingleFlight:
+    """Collapse concurrent calls for the same key into a single execution"""
+
+    def __init__(self):
+        """Initialize an empty call group"""
+        self.lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.executions = 0
+        self.coalesced = 0
+        self.timeouts = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any], timeout: Optional[float] = None) -> Any:
+        """
+        Run ``fn`` unless a call for ``key`` is already running, then share its outcome
+
+        Args:
+            key: Identity of the work being done
+            fn: Callable performing the work
+            timeout: Seconds a waiter blocks for the leader's result
+
+        Returns:
+            Any: Result of the (possibly shared) call
+
+        Raises:
+            SingleFlightTimeout: If a waiter's deadline passes first
+        """
+        with self.lock:
+            existing = self._calls.get(key)
+            if existing is None:
+                call = _Call()
+                self._calls[key] = call
+                self.executions += 1
+            else:
+                self.coalesced += 1
+
+        if existing is not None:
+            if not existing.done.wait(timeout):
+                with self.lock:
+                    self.timeouts += 1
+                raise SingleFlightTimeout(f"Timed out waiting for in-flight call {key!r}")
+            if existing.error is not None:
+                raise existing.error
+            return existing.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                del self._calls[key]
+            call.done.set()
+
+    def in_flight(self, key: Hashable) -> bool:
+        """
+        Check whether a call for ``key`` is running
+
+        Args:
+            key: Identity of the work
+
+        Returns:
+            bool: True if a leader is currently executing
+        """
+        with self.lock:
+            return key in self._calls
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get call counters
+
+        Returns:
+            Dict[str, int]: Executions, coalesced waiters, timeouts and in-flight calls
+        """
+        with self.lock:
+            return {
+                "executions": self.executions,
+                "coalesced": self.coalesced,
+                "timeouts": self.timeouts,
+                "in_flight": len(self._calls)
+            }
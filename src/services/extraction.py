@@ -0,0 +1,520 @@
+import re
+import json
+import html
+import time
+import logging
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, List, Optional
+
+from bs4 import BeautifulSoup
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None  # type: ignore[assignment]
+
+from src.config.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+# Fastest available JSON parser
+load_json = orjson.loads if orjson is not None else json.loads
+
+# Gallery JSON embedded in a script tag as JSON.parse('...'); the literal
+# ends at the first unescaped quote matching the opening one
+JSON_PARSE = (
+    r'JSON\.parse\(\s*(?:'
+    r'"(?P<json>[^"\\]*(?:\\.[^"\\]*)*)"'
+    r"|'(?P<json_sq>[^'\\]*(?:\\.[^'\\]*)*)'"
+    r')\s*\)'
+)
+JSON_PARSE_PATTERN = re.compile(JSON_PARSE, re.DOTALL)
+
+# Start of a JSON.parse call on a string literal, or one cut off before its argument;
+# calls on variables are not the gallery blob
+LITERAL_START_PATTERN = re.compile(r'JSON\.parse\(\s*(?:(["\'])|\Z)')
+# Body of a string literal up to its closing quote or a trailing lone backslash
+LITERAL_BODY_PATTERNS = {
+    '"': re.compile(r'[^"\\]*(?:\\.[^"\\]*)*', re.DOTALL),
+    "'": re.compile(r"[^'\\]*(?:\\.[^'\\]*)*", re.DOTALL),
+}
+LITERAL_CLOSE_PATTERN = re.compile(r'\s*(?:\)|\Z)')
+
+# One pass over the document: the JSON blob, div boundaries and img tags
+TOKEN_PATTERN = re.compile(
+    JSON_PARSE
+    + r'|<(?P<close>/)?div\b(?P<div>[^>]*)>'
+    + r'|<img\b(?P<img>[^>]*)>',
+    re.DOTALL
+)
+
+# JavaScript escapes, and the bare double quotes JSON needs escaped
+JS_ESCAPE_PATTERN = re.compile(r'\\(x[0-9a-fA-F]{2}|u[0-9a-fA-F]{4}|\r\n|.)|"', re.DOTALL)
+JS_SIMPLE_ESCAPES = {'v': '\\u000b', '0': '\\u0000', '\r\n': '', '\n': '', '\r': '', '\u2028': '', '\u2029': ''}
+CLASS_PATTERN = re.compile(r'\bclass\s*=\s*(["\'])(.*?)\1', re.DOTALL)
+DATA_SRC_PATTERN = re.compile(r'\bdata-src\s*=\s*(["\'])(.*?)\1', re.DOTALL)
+
+def _to_json_escape(match: Any) -> str:
+    """
+    Rewrite one JavaScript escape (or bare double quote) as its JSON form
+
+    Args:
+        match: Match of JS_ESCAPE_PATTERN
+
+    Returns:
+        str: Replacement valid inside a JSON string
+    """
+    escape = match.group(1)
+    if escape is None:
+        return '\\"'
+    if escape[0] == 'x' and len(escape) == 3:
+        return '\\u00' + escape[1:]
+    if escape[0] == 'u' or escape in '"\\/bfnrt':
+        return match.group(0)
+    # Line continuations vanish, any other escaped character stands for itself
+    return JS_SIMPLE_ESCAPES.get(escape, json.dumps(escape)[1:-1])
+
+def decode_js_string(literal: str) -> str:
+    """
+    Unescape the contents of a JavaScript string literal
+
+    JavaScript escapes are a superset of JSON's, so the literal is decoded as
+    a JSON string by a C parser. Anything JSON rejects (\\x, \\', bare quotes,
+    line continuations) is rewritten first, which only happens on failure.
+    Non-ASCII text and surrogate pairs come through intact.
+
+    Args:
+        literal: Contents of the string literal, without its quotes
+
+    Returns:
+        str: The string's value
+    """
+    try:
+        return load_json('"' + literal + '"')
+    except ValueError:
+        literal = JS_ESCAPE_PATTERN.sub(_to_json_escape, literal)
+        return json.loads('"' + literal + '"', strict=False)
+
+def decode_gallery_json(literal: str) -> Dict[str, Any]:
+    """
+    Decode the string passed to JSON.parse into gallery data
+
+    Args:
+        literal: Contents of the JavaScript string literal
+
+    Returns:
+        Dict[str, Any]: The gallery data
+    """
+    return load_json(decode_js_string(literal))
+
+def apply_thumbnails(data: Dict[str, Any], thumbnails: List[str]) -> None:
+    """
+    Attach thumbnail URLs to the gallery's pages in order
+
+    Args:
+        data: Gallery data to update
+        thumbnails: data-src of each thumb container, empty where it has none
+    """
+    if 'images' not in data or 'pages' not in data['images']:
+        return
+    for thumb_url, page_data in zip(thumbnails, data['images']['pages']):
+        if thumb_url:
+            page_data['thumbnail'] = thumb_url
+            # Set fallback URL
+            page_data['url'] = thumb_url.replace("t.", ".")
+
+class GalleryExtractor(ABC):
+    """Extracts gallery data from a gallery page"""
+
+    name = 'base'
+
+    @abstractmethod
+    def extract(self, html_content: str) -> Optional[Dict[str, Any]]:
+        """
+        Extract gallery data from HTML content
+
+        Args:
+            html_content: HTML content to parse
+
+        Returns:
+            Optional[Dict[str, Any]]: Extracted gallery data if successful
+        """
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get extraction statistics
+
+        Returns:
+            Dict[str, Any]: Extractor statistics
+        """
+        return {"extractor": self.name}
+
+    def extract_stream(self, chunks: Iterable[str]) -> Optional[Dict[str, Any]]:
+        """
+        Extract gallery data from a page received in parts
+
+        Extractors that need the whole document join the parts first.
+
+        Args:
+            chunks: Decoded parts of the page, in order
+
+        Returns:
+            Optional[Dict[str, Any]]: Extracted gallery data if successful
+        """
+        return self.extract(''.join(chunks))
+
+class PageScanner:
+    """Incremental scan of a gallery page for the JSON blob and the thumbnails"""
+
+    def __init__(self):
+        """Initialize an empty scan"""
+        self.literal: Optional[str] = None
+        self.thumbnails: List[str] = []
+        self.done = False
+        self._buffer = ''
+        self._scanned = 0  # Offset of the kept literal already checked for its end
+        self._depth = 0  # Open divs inside div.thumbs, 0 when outside
+        self._container_depth = 0  # Depth of the open thumb container, 0 when outside
+        self._image_seen = False
+        self._thumbs_done = False
+
+    def feed(self, text: str) -> bool:
+        """
+        Scan the next part of the page
+
+        Text after the last complete token is kept until the next call, so
+        tokens split across parts are still found; scanned text is dropped.
+
+        Args:
+            text: The next part of the page
+
+        Returns:
+            bool: True once both the JSON blob and the whole thumbs div were seen
+        """
+        if self.done:
+            return True
+        buffer = self._buffer + text if self._buffer else text
+        # Tokens are only scanned up to a literal still being received
+        limit = self._open_literal(buffer) if self.literal is None else len(buffer)
+        end = 0
+        for match in TOKEN_PATTERN.finditer(buffer, 0, limit):
+            end = match.end()
+            self._token(match)
+            if self.done:
+                self._buffer = ''
+                return True
+
+        if limit < len(buffer):
+            keep = limit
+        else:
+            # Keep what may be the start of a token still being received
+            keep = buffer.rfind('<', end)
+            if keep < 0 or buffer.find('>', keep) >= 0:
+                keep = max(end, len(buffer) - len('JSON.parse('))
+        self._buffer = buffer[keep:]
+        return False
+
+    def _open_literal(self, buffer: str) -> int:
+        """
+        Find a JSON.parse literal whose end has not been received yet
+
+        The literal's body is checked only from where the previous part left
+        off, so a large literal arriving in many parts is read once.
+
+        Args:
+            buffer: Unscanned text of the page
+
+        Returns:
+            int: Offset of the unfinished JSON.parse call, the buffer length if there is none
+        """
+        resume, self._scanned = self._scanned, 0
+        position = 0
+        while True:
+            start = LITERAL_START_PATTERN.search(buffer, position)
+            if start is None:
+                return len(buffer)
+            quote = start.group(1)
+            if quote is None:
+                # Cut off before its argument: keep it until the argument arrives
+                return start.start()
+            body_start = start.end()
+            if start.start() == 0:
+                body_start = max(body_start, resume)
+            body = LITERAL_BODY_PATTERNS[quote].match(buffer, body_start)
+            body_end = body.end() if body else body_start
+            if body_end == len(buffer) or buffer[body_end] != quote:
+                self._scanned = body_end - start.start()
+                return start.start()
+            close = LITERAL_CLOSE_PATTERN.match(buffer, body_end + 1)
+            if close is not None and not close.group().endswith(')'):
+                # The closing parenthesis is still to come
+                self._scanned = body_end - start.start()
+                return start.start()
+            # A complete call is read by the token scan; look past it, or past a malformed one
+            position = close.end() if close is not None else start.end()
+
+    def result(self) -> Optional[Dict[str, Any]]:
+        """
+        Decode what the scan found
+
+        Returns:
+            Optional[Dict[str, Any]]: Gallery data with thumbnails, None if no JSON blob was seen
+        """
+        if self.literal is None:
+            return None
+        data = decode_gallery_json(self.literal)
+        apply_thumbnails(data, self.thumbnails)
+        return data
+
+    def _token(self, match: Any) -> None:
+        """
+        Update the scan state with one token
+
+        Args:
+            match: Match of TOKEN_PATTERN
+        """
+        if match.group('json') is not None or match.group('json_sq') is not None:
+            if self.literal is None:
+                self.literal = match.group('json')
+                if self.literal is None:
+                    self.literal = match.group('json_sq')
+                self.done = self._thumbs_done
+            return
+        if self._thumbs_done:
+            return
+
+        if match.group('close'):
+            if self._depth:
+                if self._depth == self._container_depth:
+                    self._container_depth = 0
+                self._depth -= 1
+                if not self._depth:
+                    self._thumbs_done = True
+                    self.done = self.literal is not None
+        elif match.group('div') is not None:
+            classes = self._classes(match.group('div'))
+            if self._depth:
+                self._depth += 1
+                if 'thumb-container' in classes and not self._container_depth:
+                    self._container_depth = self._depth
+                    self._image_seen = False
+                    self.thumbnails.append('')
+            elif 'thumbs' in classes:
+                self._depth = 1
+        elif self._container_depth and not self._image_seen:
+            # Only the container's first img counts, as with BeautifulSoup
+            self._image_seen = True
+            src = DATA_SRC_PATTERN.search(match.group('img'))
+            if src:
+                self.thumbnails[-1] = html.unescape(src.group(2))
+
+    def _classes(self, attributes: str) -> List[str]:
+        """
+        Read the class list of a tag
+
+        Args:
+            attributes: Attribute text of the tag
+
+        Returns:
+            List[str]: The tag's classes
+        """
+        match = CLASS_PATTERN.search(attributes)
+        return match.group(2).split() if match else []
+
+class ScanExtractor(GalleryExtractor):
+    """Reads the JSON blob and the thumbnails in a single regex scan"""
+
+    name = 'scan'
+
+    def extract(self, html_content: str) -> Optional[Dict[str, Any]]:
+        """
+        Extract gallery data by scanning the whole page once
+
+        Args:
+            html_content: HTML content to parse
+
+        Returns:
+            Optional[Dict[str, Any]]: Extracted gallery data, None if the JSON blob is missing
+        """
+        scanner = PageScanner()
+        scanner.feed(html_content)
+        return scanner.result()
+
+    def extract_stream(self, chunks: Iterable[str]) -> Optional[Dict[str, Any]]:
+        """
+        Extract gallery data while the page is received
+
+        Stops reading parts once both the JSON blob and the thumbnail grid were seen.
+
+        Args:
+            chunks: Decoded parts of the page, in order
+
+        Returns:
+            Optional[Dict[str, Any]]: Extracted gallery data, None if the JSON blob is missing
+        """
+        scanner = PageScanner()
+        for chunk in chunks:
+            if scanner.feed(chunk):
+                break
+        return scanner.result()
+
+class SoupExtractor(GalleryExtractor):
+    """Reads the thumbnails from a full BeautifulSoup parse of the page"""
+
+    name = 'soup'
+
+    def extract(self, html_content: str) -> Optional[Dict[str, Any]]:
+        """
+        Extract the JSON blob with a regex and the thumbnails from a parsed tree
+
+        Args:
+            html_content: HTML content to parse
+
+        Returns:
+            Optional[Dict[str, Any]]: Extracted gallery data, None if the JSON blob is missing
+        """
+        # Find JSON data in script tag
+        match = JSON_PARSE_PATTERN.search(html_content)
+        if not match:
+            return None
+        literal = match.group('json')
+        data = decode_gallery_json(literal if literal is not None else match.group('json_sq'))
+
+        # Extract thumbnail URLs
+        soup = BeautifulSoup(html_content, "html.parser")
+        thumbs_div = soup.find("div", class_="thumbs")
+        thumbnails = []
+        if thumbs_div:
+            for thumb_container in thumbs_div.find_all("div", class_="thumb-container"):
+                img = thumb_container.find("img")
+                thumbnails.append(img.get("data-src", "") if img else "")
+        apply_thumbnails(data, thumbnails)
+        return data
+
+EXTRACTORS = {
+    ScanExtractor.name: ScanExtractor,
+    SoupExtractor.name: SoupExtractor,
+}
+
+class FallbackExtractor(GalleryExtractor):
+    """Runs a primary extractor and falls back to another when it fails"""
+
+    def __init__(self, primary: GalleryExtractor, fallback: Optional[GalleryExtractor] = None):
+        """
+        Initialize the extractor chain
+
+        Args:
+            primary: Extractor tried first
+            fallback: Extractor used when the primary finds nothing or raises
+        """
+        self.primary = primary
+        self.fallback = fallback
+        self.name = primary.name
+        self.lock = threading.Lock()
+        self._timings: Dict[str, List[float]] = {
+            extractor.name: [0, 0.0] for extractor in (primary, fallback) if extractor
+        }
+        self.fallbacks = 0
+
+    def extract(self, html_content: str) -> Optional[Dict[str, Any]]:
+        """
+        Extract gallery data with the primary extractor, then the fallback
+
+        Args:
+            html_content: HTML content to parse
+
+        Returns:
+            Optional[Dict[str, Any]]: Extracted gallery data, None if every extractor failed
+        """
+        data = self._run(self.primary, html_content)
+        if data is None and self.fallback:
+            with self.lock:
+                self.fallbacks += 1
+            data = self._run(self.fallback, html_content)
+        return data
+
+    def extract_stream(self, chunks: Iterable[str]) -> Optional[Dict[str, Any]]:
+        """
+        Extract gallery data from a page received in parts with the primary extractor
+
+        The parts are consumed as they are scanned, so there is nothing left
+        to hand to the fallback; a failure here returns None.
+
+        Args:
+            chunks: Decoded parts of the page, in order
+
+        Returns:
+            Optional[Dict[str, Any]]: Extracted gallery data, None if it failed
+        """
+        start = time.monotonic()
+        try:
+            return self.primary.extract_stream(chunks)
+        except Exception as e:
+            logger.error(f"Failed to extract streamed gallery data with {self.primary.name}: {str(e)}")
+            return None
+        finally:
+            with self.lock:
+                timing = self._timings[self.primary.name]
+                timing[0] += 1
+                timing[1] += time.monotonic() - start
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get extraction counts and timings
+
+        Returns:
+            Dict[str, Any]: Runs and average duration in milliseconds per extractor
+        """
+        with self.lock:
+            return {
+                "extractor": self.name,
+                "fallbacks": self.fallbacks,
+                **{
+                    name: {
+                        "runs": count,
+                        "average_ms": round(total / count * 1000, 2) if count else 0.0
+                    }
+                    for name, (count, total) in self._timings.items()
+                }
+            }
+
+    def _run(self, extractor: GalleryExtractor, html_content: str) -> Optional[Dict[str, Any]]:
+        """
+        Run one extractor, timing it
+
+        Args:
+            extractor: The extractor to run
+            html_content: HTML content to parse
+
+        Returns:
+            Optional[Dict[str, Any]]: Extracted gallery data, None if it failed
+        """
+        start = time.monotonic()
+        try:
+            return extractor.extract(html_content)
+        except Exception as e:
+            logger.error(f"Failed to extract gallery data with {extractor.name}: {str(e)}")
+            return None
+        finally:
+            with self.lock:
+                timing = self._timings[extractor.name]
+                timing[0] += 1
+                timing[1] += time.monotonic() - start
+
+def create_extractor(name: str = Settings.GALLERY_EXTRACTOR) -> FallbackExtractor:
+    """
+    Build the configured extractor with BeautifulSoup as its fallback
+
+    Args:
+        name: Extractor to try first ('scan' or 'soup')
+
+    Returns:
+        FallbackExtractor: The extractor chain
+    """
+    if name not in EXTRACTORS:
+        logger.warning(f"Unknown gallery extractor {name}, using scan")
+        name = ScanExtractor.name
+    primary = EXTRACTORS[name]()
+    fallback = SoupExtractor() if name != SoupExtractor.name else None
+    return FallbackExtractor(primary, fallback)
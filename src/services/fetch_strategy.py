@@ -0,0 +1,237 @@
+import codecs
+import logging
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterator, List, Optional
+
+from src.config.settings import Settings
+from src.services.extraction import GalleryExtractor, load_json, create_extractor
+
+logger = logging.getLogger(__name__)
+
+# Image type codes used by the gallery JSON
+IMAGE_EXTENSIONS = {'j': 'jpg', 'p': 'png', 'g': 'gif', 'w': 'webp'}
+
+# Bytes read from a streamed page per chunk
+STREAM_CHUNK_SIZE = 16384
+
+class FetchStrategy(ABC):
+    """A way of fetching a gallery from upstream"""
+
+    name = 'base'
+    stream = False  # Whether responses are fetched with an unread body
+
+    def __init__(self):
+        """Initialize the strategy's counters"""
+        self.lock = threading.Lock()
+        self.successes = 0
+        self.failures = 0
+        self.total_seconds = 0.0
+
+    @abstractmethod
+    def url(self, gallery_id: int) -> str:
+        """
+        Build the upstream URL of a gallery
+
+        Args:
+            gallery_id: Gallery ID to fetch
+
+        Returns:
+            str: URL to request
+        """
+
+    @abstractmethod
+    def parse(self, response: Any) -> Optional[Dict[str, Any]]:
+        """
+        Read gallery data from a successful upstream response
+
+        Args:
+            response: The 200 response
+
+        Returns:
+            Optional[Dict[str, Any]]: Gallery data shaped like the page's embedded JSON, with
+            a thumbnail and fallback URL on every page, None if it could not be read
+        """
+
+    def record(self, seconds: float, success: bool) -> None:
+        """
+        Record the outcome of a fetch
+
+        Args:
+            seconds: Time spent fetching, including retries
+            success: Whether gallery data was obtained
+        """
+        with self.lock:
+            if success:
+                self.successes += 1
+            else:
+                self.failures += 1
+            self.total_seconds += seconds
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get fetch counts and latency
+
+        Returns:
+            Dict[str, Any]: Successes, failures and average duration in milliseconds
+        """
+        with self.lock:
+            count = self.successes + self.failures
+            return {
+                "successes": self.successes,
+                "failures": self.failures,
+                "average_ms": round(self.total_seconds / count * 1000, 1) if count else 0.0
+            }
+
+class ApiStrategy(FetchStrategy):
+    """Fetches the gallery JSON from the upstream API"""
+
+    name = 'api'
+
+    def url(self, gallery_id: int) -> str:
+        """
+        Build the API URL of a gallery
+
+        Args:
+            gallery_id: Gallery ID to fetch
+
+        Returns:
+            str: URL of the gallery's JSON
+        """
+        return f'{Settings.WEB_TARGET}/api/gallery/{gallery_id}'
+
+    def parse(self, response: Any) -> Optional[Dict[str, Any]]:
+        """
+        Read and normalize the gallery JSON
+
+        Args:
+            response: The 200 response
+
+        Returns:
+            Optional[Dict[str, Any]]: Gallery data, None if the body is not a gallery
+        """
+        try:
+            data = load_json(response.text)
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Gallery API returned invalid JSON: {str(e)}")
+            return None
+        if not isinstance(data, dict) or 'media_id' not in data or 'images' not in data:
+            logger.warning("Gallery API response is missing gallery fields")
+            return None
+        normalize_api_gallery(data)
+        return data
+
+class HtmlStrategy(FetchStrategy):
+    """Scrapes the gallery page"""
+
+    name = 'html'
+
+    def __init__(
+        self,
+        extractor: Optional[GalleryExtractor] = None,
+        stream: bool = Settings.GALLERY_STREAMING,
+        max_bytes: int = Settings.GALLERY_MAX_PAGE_BYTES
+    ):
+        """
+        Initialize the strategy
+
+        Args:
+            extractor: Gallery page extractor (defaults to the configured one)
+            stream: Whether to scan the page as it arrives and stop once the data is found
+            max_bytes: Bytes of a streamed page read at most
+        """
+        super().__init__()
+        self.extractor = extractor or create_extractor()
+        self.stream = stream
+        self.max_bytes = max_bytes
+
+    def url(self, gallery_id: int) -> str:
+        """
+        Build the page URL of a gallery
+
+        Args:
+            gallery_id: Gallery ID to fetch
+
+        Returns:
+            str: URL of the gallery page
+        """
+        return f'{Settings.WEB_TARGET}/g/{gallery_id}'
+
+    def parse(self, response: Any) -> Optional[Dict[str, Any]]:
+        """
+        Extract the gallery data embedded in the page
+
+        Args:
+            response: The 200 response
+
+        Returns:
+            Optional[Dict[str, Any]]: Gallery data, None if the page holds none
+        """
+        if self.stream:
+            return self.extractor.extract_stream(iter_text(response, self.max_bytes))
+        return self.extractor.extract(response.text)
+
+def iter_text(response: Any, max_bytes: int) -> Iterator[str]:
+    """
+    Decode a response body as it is received
+
+    Args:
+        response: Response whose body has not been read
+        max_bytes: Bytes read at most
+
+    Returns:
+        Iterator[str]: Decoded parts of the body
+    """
+    content_type = response.headers.get('Content-Type', '')
+    encoding = response.encoding if 'charset' in content_type.lower() else 'utf-8'
+    try:
+        decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+    except LookupError:
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+
+    received = 0
+    for chunk in response.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+        received += len(chunk)
+        if received > max_bytes:
+            logger.warning(f"Stopped reading {response.url} after {max_bytes} bytes")
+            return
+        yield decoder.decode(chunk)
+    yield decoder.decode(b'', final=True)
+
+def normalize_api_gallery(data: Dict[str, Any]) -> None:
+    """
+    Add the thumbnail and fallback URL the gallery page would have given each page
+
+    Args:
+        data: Gallery data from the API
+    """
+    media_id = data['media_id']
+    for number, page in enumerate(data['images'].get('pages', []), 1):
+        extension = IMAGE_EXTENSIONS.get(page.get('t'), 'jpg')
+        page['thumbnail'] = f'{Settings.THUMBNAIL_HOST}/galleries/{media_id}/{number}t.{extension}'
+        page['url'] = f'{Settings.THUMBNAIL_HOST}/galleries/{media_id}/{number}.{extension}'
+
+def create_strategies(
+    names: List[str] = Settings.GALLERY_FETCH_STRATEGIES,
+    extractor: Optional[GalleryExtractor] = None
+) -> List[FetchStrategy]:
+    """
+    Build the configured fetch strategies in the order they are tried
+
+    Args:
+        names: Strategy names ('api', 'html')
+        extractor: Extractor for the HTML strategy
+
+    Returns:
+        List[FetchStrategy]: The strategies, HTML alone if none are valid
+    """
+    strategies: List[FetchStrategy] = []
+    for name in names:
+        name = name.strip().lower()
+        if name == ApiStrategy.name:
+            strategies.append(ApiStrategy())
+        elif name == HtmlStrategy.name:
+            strategies.append(HtmlStrategy(extractor))
+        elif name:
+            logger.warning(f"Unknown gallery fetch strategy: {name}")
+    return strategies or [HtmlStrategy(extractor)]
@@ -1,17 +1,26 @@
-import re
+import time
 import logging
-from typing import Dict, Optional, Any, Tuple
-from bs4 import BeautifulSoup
-import json
+import threading
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterable, Iterator, List, Optional, Any, Tuple
 
 from src.core.cookie_manager import CookieManager
 from src.core.cache import GalleryCache
+from src.core.negative_cache import MISSING
+from src.core.rate_limiter import RateLimiter
+from src.core.single_flight import SingleFlight, SingleFlightTimeout
 from src.services.pdf import PDFService
 from src.services.storage import R2StorageService
+from src.services.extraction import GalleryExtractor, create_extractor
+from src.services.fetch_strategy import FetchStrategy, create_strategies
 from src.config.settings import Settings
 
 logger = logging.getLogger(__name__)
 
+EXTRACTION_FAILED = "Failed to extract gallery data"
+WARMING_UP = "Service is warming up, retry shortly"
+
 class GalleryService:
     """Service for handling gallery data processing"""
     
@@ -20,7 +29,9 @@ class GalleryService:
         cookie_manager: CookieManager,
         gallery_cache: GalleryCache,
         pdf_service: Optional[PDFService] = None,
-        storage_service: Optional[R2StorageService] = None
+        storage_service: Optional[R2StorageService] = None,
+        extractor: Optional[GalleryExtractor] = None,
+        strategies: Optional[List[FetchStrategy]] = None
     ):
         """
         Initialize the gallery service
@@ -30,19 +41,47 @@ class GalleryService:
             gallery_cache: Gallery cache instance
             pdf_service: Optional PDF service instance
             storage_service: Optional storage service instance
+            extractor: Gallery page extractor (defaults to the configured one)
+            strategies: Fetch strategies tried in order (defaults to the configured ones)
         """
         self.cookie_manager = cookie_manager
         self.gallery_cache = gallery_cache
         self.pdf_service = pdf_service
         self.storage_service = storage_service
+        self.extractor = extractor or create_extractor()
+        self.strategies = strategies or create_strategies(extractor=self.extractor)
+        
+        # Concurrent misses for the same gallery share one upstream fetch
+        self.inflight = SingleFlight()
+        
+        # Batch misses share one bounded pool and rate limit across all batch requests
+        self.batch_limiter = RateLimiter(Settings.BATCH_RATE_LIMIT)
+        self._batch_executor = ThreadPoolExecutor(
+            max_workers=max(1, Settings.BATCH_CONCURRENCY),
+            thread_name_prefix='gallery-batch'
+        )
+        
+        # Expired entries are served while a background refresh replaces them
+        self._refresh_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='gallery-refresh')
+        self._refresh_lock = threading.Lock()
+        self._refresh_attempts: Dict[int, float] = {}
+        self.stale_served = 0
+        self.refreshes = 0
+        self.refresh_failures = 0
     
-    def get_gallery(self, gallery_id: int, check_pdf_status: bool = False) -> Tuple[Dict[str, Any], int]:
+    def get_gallery(
+        self,
+        gallery_id: int,
+        check_pdf_status: bool = False,
+        limiter: Optional[RateLimiter] = None
+    ) -> Tuple[Dict[str, Any], int]:
         """
         Get gallery data by ID
         
         Args:
             gallery_id: Gallery ID to fetch
             check_pdf_status: Whether to check PDF processing status
+            limiter: Rate limiter to take a token from before going upstream
             
         Returns:
             Tuple[Dict[str, Any], int]: Gallery data and HTTP status code
@@ -54,13 +93,6 @@ class GalleryService:
                 "reason": "Invalid gallery ID"
             }, 400
 
-        # Ensure valid connection
-        if not self.cookie_manager.ensure_valid_cookies():
-            return {
-                "status": False,
-                "reason": "Failed to establish valid connection"
-            }, 500
-        
         # Check PDF status if requested
         if check_pdf_status and self.pdf_service:
             status = self.pdf_service.get_status(str(gallery_id))
@@ -73,39 +105,252 @@ class GalleryService:
                 }, 200
         
         # Check cache
-        cached_data = self.gallery_cache.get(gallery_id)
+        cached_data = self._get_cached(gallery_id)
         if cached_data:
+            return cached_data, 200
+        
+        # Known-dead and repeatedly failing galleries are answered without going upstream
+        negative = self.gallery_cache.negative.get(gallery_id)
+        if negative == MISSING:
+            return {
+                "status": False,
+                "reason": "Backend returned 404"
+            }, 404
+        if negative:
+            return {
+                "status": False,
+                "reason": EXTRACTION_FAILED
+            }, 500
+        
+        # Upstream fetches wait until the session has been warmed up
+        if not self.cookie_manager.is_ready:
+            return {
+                "status": False,
+                "reason": WARMING_UP
+            }, 503
+        
+        # The first caller fetches; concurrent callers for the same gallery wait for its result
+        try:
+            return self.inflight.do(
+                gallery_id,
+                lambda: self._fetch_gallery(gallery_id, limiter),
+                timeout=Settings.GALLERY_COALESCE_TIMEOUT
+            )
+        except SingleFlightTimeout:
+            logger.warning(f"Timed out waiting for the in-flight fetch of gallery {gallery_id}")
+            return {
+                "status": False,
+                "reason": "Timed out waiting for gallery fetch"
+            }, 504
+    
+    def _get_cached(self, gallery_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Get a gallery from the cache, queueing a refresh when it has expired
+        
+        Expired entries within CACHE_MAX_STALE are served immediately, marked
+        stale, and keep being served until a refresh succeeds, so upstream
+        failures and warm-up do not turn them into errors.
+        
+        Args:
+            gallery_id: Gallery ID to look up
+            
+        Returns:
+            Optional[Dict[str, Any]]: Cached data with "stale" set if it has expired, None on a miss
+        """
+        entry = self.gallery_cache.lookup(gallery_id)
+        if entry is None:
+            return None
+        if not entry.is_stale:
             logger.info(f"Found cached data for gallery {gallery_id}")
+            return entry.data
+        
+        logger.info(f"Serving stale data for gallery {gallery_id} ({int(entry.age)}s old)")
+        with self._refresh_lock:
+            self.stale_served += 1
+        self._schedule_refresh(gallery_id)
+        return {**entry.data, "stale": True}
+    
+    def _schedule_refresh(self, gallery_id: int) -> None:
+        """
+        Queue a background refresh of a stale gallery unless one ran recently
+        
+        Args:
+            gallery_id: Gallery ID to refresh
+        """
+        now = time.monotonic()
+        with self._refresh_lock:
+            last_attempt = self._refresh_attempts.get(gallery_id)
+            if last_attempt is not None and now - last_attempt < Settings.CACHE_REFRESH_RETRY:
+                return
+            # Attempts older than the retry interval no longer hold anything back
+            if len(self._refresh_attempts) >= 1024:
+                self._refresh_attempts = {
+                    key: started for key, started in self._refresh_attempts.items()
+                    if now - started < Settings.CACHE_REFRESH_RETRY
+                }
+            self._refresh_attempts[gallery_id] = now
+        self._refresh_executor.submit(self._refresh, gallery_id)
+    
+    def _refresh(self, gallery_id: int) -> None:
+        """
+        Refetch a stale gallery, keeping the stale entry if upstream fails
+        
+        Args:
+            gallery_id: Gallery ID to refresh
+        """
+        if not self.cookie_manager.is_ready:
+            return
+        try:
+            _, status = self.inflight.do(
+                gallery_id,
+                lambda: self._fetch_gallery(gallery_id),
+                timeout=Settings.GALLERY_COALESCE_TIMEOUT
+            )
+        except Exception as e:
+            logger.error(f"Refreshing gallery {gallery_id} failed: {str(e)}")
+            status = 500
+        
+        # A gallery removed upstream is not served from the cache any longer
+        if status == 404:
+            self.gallery_cache.delete(gallery_id)
+        with self._refresh_lock:
+            if status == 200:
+                self.refreshes += 1
+            else:
+                self.refresh_failures += 1
+        if status not in (200, 404):
+            logger.warning(f"Refreshing gallery {gallery_id} failed with {status}, keeping the stale entry")
+    
+    def _fetch_gallery(self, gallery_id: int, limiter: Optional[RateLimiter] = None) -> Tuple[Dict[str, Any], int]:
+        """
+        Fetch a gallery from upstream, trying each strategy in turn
+        
+        Args:
+            gallery_id: Gallery ID to fetch
+            limiter: Rate limiter to take a token from before going upstream
+            
+        Returns:
+            Tuple[Dict[str, Any], int]: Gallery data and HTTP status code
+        """
+        # A fetch that finished between our cache miss and taking the lead
+        # has already cached the gallery
+        cached_data = self.gallery_cache.get(gallery_id)
+        if cached_data:
             return cached_data, 200
         
-        # Fetch from source
+        if limiter:
+            limiter.acquire()
+        
+        # Ensure valid connection before going upstream
+        if not self.cookie_manager.ensure_valid_cookies():
+            return {
+                "status": False,
+                "reason": "Failed to establish valid connection"
+            }, 500
+        
+        # Fetch from source, moving to the next strategy when one fails. A 404
+        # means the gallery does not exist, which no other strategy can change.
+        for strategy in self.strategies:
+            started = time.monotonic()
+            result = self._fetch_with(strategy, gallery_id)
+            strategy.record(time.monotonic() - started, success=result[1] == 200)
+            if result[1] == 404:
+                self.gallery_cache.negative.add(gallery_id, MISSING)
+            if result[1] in (200, 404):
+                return result
+            logger.warning(f"Fetching gallery {gallery_id} via {strategy.name} failed with {result[1]}")
+        
+        # Pages that load but never hold the gallery data are not retried on every request
+        if result[0].get("reason") == EXTRACTION_FAILED and self.gallery_cache.negative.record_failure(gallery_id):
+            logger.warning(f"Gallery {gallery_id} keeps failing extraction, not fetching it for a while")
+        return result
+    
+    def get_galleries(self, gallery_ids: Iterable[int]) -> Iterator[Tuple[int, Dict[str, Any], int]]:
+        """
+        Get several galleries, yielding each as soon as it is available
+        
+        Cache hits are yielded first; misses are fetched concurrently, bounded
+        by BATCH_CONCURRENCY and BATCH_RATE_LIMIT, and yielded as they complete.
+        
+        Args:
+            gallery_ids: Gallery IDs to fetch; duplicates are looked up once
+            
+        Yields:
+            Tuple[int, Dict[str, Any], int]: Gallery ID, gallery data and HTTP status code
+        """
+        misses = []
+        for gallery_id in dict.fromkeys(gallery_ids):
+            cached_data = self._get_cached(gallery_id) if gallery_id > 0 else None
+            if cached_data:
+                yield gallery_id, cached_data, 200
+            elif gallery_id <= 0:
+                yield (gallery_id, *self.get_gallery(gallery_id))
+            else:
+                misses.append(gallery_id)
+        
+        futures = {
+            self._batch_executor.submit(self.get_gallery, gallery_id, limiter=self.batch_limiter): gallery_id
+            for gallery_id in misses
+        }
+        try:
+            for future in as_completed(futures):
+                gallery_id = futures[future]
+                try:
+                    yield (gallery_id, *future.result())
+                except Exception as e:
+                    logger.error(f"Batch lookup of gallery {gallery_id} failed: {str(e)}")
+                    yield gallery_id, {"status": False, "reason": f"Error: {str(e)}"}, 500
+        finally:
+            # A client that went away leaves lookups that have not started; they must
+            # not hold the shared executor and rate limit from other batches
+            for future in futures:
+                future.cancel()
+    
+    def _fetch_with(self, strategy: FetchStrategy, gallery_id: int) -> Tuple[Dict[str, Any], int]:
+        """
+        Fetch a gallery with one strategy, retrying transient failures
+        
+        Args:
+            strategy: The fetch strategy
+            gallery_id: Gallery ID to fetch
+            
+        Returns:
+            Tuple[Dict[str, Any], int]: Gallery data and HTTP status code
+        """
         for attempt in range(Settings.MAX_RETRIES):
             try:
-                logger.info(f"Fetching gallery {gallery_id} (attempt {attempt + 1}/{Settings.MAX_RETRIES})")
-                response = self.cookie_manager.get(
-                    f'{Settings.WEB_TARGET}/g/{gallery_id}',
-                    timeout=10
+                logger.info(
+                    f"Fetching gallery {gallery_id} via {strategy.name} "
+                    f"(attempt {attempt + 1}/{Settings.MAX_RETRIES})"
                 )
+                response = self.cookie_manager.fetch(strategy.url(gallery_id), timeout=10, stream=strategy.stream)
                 
-                if not response:
+                if response is None:
                     continue
                 
-                if response.status_code == 403 and attempt < Settings.MAX_RETRIES - 1:
-                    self.cookie_manager.ensure_valid_cookies()
-                    continue
+                # Streamed bodies are closed even when they were not read to the end
+                with closing(response):
+                    if response.status_code == 403 and attempt < Settings.MAX_RETRIES - 1:
+                        self.cookie_manager.ensure_valid_cookies()
+                        continue
+                    
+                    if response.status_code == 429 and attempt < Settings.MAX_RETRIES - 1:
+                        time.sleep(self._retry_delay(response, attempt))
+                        continue
+                    
+                    if response.status_code != 200:
+                        return {
+                            "status": False,
+                            "reason": f"Backend returned {response.status_code}"
+                        }, response.status_code
+                    
+                    # Extract data
+                    data = strategy.parse(response)
                 
-                if response.status_code != 200:
-                    return {
-                        "status": False,
-                        "reason": f"Backend returned {response.status_code}"
-                    }, response.status_code
-                
-                # Extract and process data
-                data = self._extract_gallery_data(response.text)
                 if not data:
                     return {
                         "status": False,
-                        "reason": "Failed to extract gallery data"
+                        "reason": EXTRACTION_FAILED
                     }, 500
                 
                 # Process images and cache
@@ -131,6 +376,43 @@ class GalleryService:
             "reason": "Maximum retries exceeded"
         }, 500
     
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get service statistics
+        
+        Returns:
+            Dict[str, Any]: Statistics of the service and its components
+        """
+        return {
+            "upstream": self.cookie_manager.stats(),
+            "extraction": self.extractor.stats(),
+            "strategies": {strategy.name: strategy.stats() for strategy in self.strategies},
+            "cache": self.gallery_cache.stats(),
+            "batch_rate_limit": self.batch_limiter.stats(),
+            "coalescing": self.inflight.stats(),
+            "stale": {
+                "served": self.stale_served,
+                "refreshed": self.refreshes,
+                "refresh_failures": self.refresh_failures
+            }
+        }
+    
+    def _retry_delay(self, response: Any, attempt: int) -> float:
+        """
+        Determine how long to back off after being rate limited
+        
+        Args:
+            response: The 429 response
+            attempt: Zero-based attempt number
+            
+        Returns:
+            float: Seconds to wait, honouring Retry-After up to 30 seconds
+        """
+        try:
+            return min(float(response.headers.get('Retry-After')), 30.0)
+        except (TypeError, ValueError):
+            return float(2 ** attempt)
+    
     def _extract_gallery_data(self, html_content: str) -> Optional[Dict[str, Any]]:
         """
         Extract gallery data from HTML content
@@ -141,37 +423,7 @@ class GalleryService:
         Returns:
             Optional[Dict[str, Any]]: Extracted gallery data if successful
         """
-        try:
-            # Find JSON data in script tag
-            match = re.search(r'JSON\.parse\(["\'](.+?)["\']\)', html_content)
-            if not match:
-                return None
-            
-            # Parse JSON data
-            json_str = match.group(1).encode('utf-8').decode('unicode-escape')
-            data = json.loads(json_str)
-            
-            # Extract thumbnail URLs
-            soup = BeautifulSoup(html_content, "html.parser")
-            thumbs_div = soup.find("div", class_="thumbs")
-            
-            if thumbs_div and 'images' in data and 'pages' in data['images']:
-                for i, (thumb_container, page_data) in enumerate(
-                    zip(thumbs_div.find_all("div", class_="thumb-container"),
-                        data['images']['pages']), 1):
-                    img = thumb_container.find("img")
-                    if img:
-                        thumb_url = img.get("data-src", "")
-                        if thumb_url:
-                            page_data['thumbnail'] = thumb_url
-                            # Set fallback URL
-                            page_data['url'] = thumb_url.replace("t.", ".")
-            
-            return data
-            
-        except Exception as e:
-            logger.error(f"Failed to extract gallery data: {str(e)}")
-            return None
+        return self.extractor.extract(html_content)
     
     def _process_gallery_data(self, data: Dict[str, Any], gallery_id: str) -> Dict[str, Any]:
         """
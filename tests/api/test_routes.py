@@ -1,9 +1,11 @@
+import json
 import pytest
 from typing import Dict, Any
 from flask import Flask
 from flask.testing import FlaskClient
 
 from src.app import create_app
+from src.config.settings import Settings
 from src.services.gallery import GalleryService
 from src.api.routes import init_routes, api_bp, docs_bp
 
@@ -39,7 +41,7 @@ gallery_endpoint_cases = [
 def app(gallery_service: GalleryService, mocker) -> Flask:
     """Create Flask application for testing"""
     # Mock the gallery service responses
-    def mock_get_gallery(gallery_id: int, check_status: bool = False) -> tuple:
+    def mock_get_gallery(gallery_id: int, check_status: bool = False, limiter=None) -> tuple:
         if gallery_id <= 0:
             return {"status": False, "reason": "Invalid gallery ID"}, 400
         return {
@@ -79,12 +81,13 @@ def test_gallery_endpoint(
 
 def test_health_check(client: FlaskClient, gallery_service: GalleryService, mocker) -> None:
     """Test health check endpoint"""
-    # Mock cookie manager's ensure_valid_cookies to return True
-    mocker.patch.object(
+    # Health checks must report passively without validating the session
+    ensure_valid = mocker.patch.object(
         gallery_service.cookie_manager,
         'ensure_valid_cookies',
         return_value=True
     )
+    gallery_service.cookie_manager.session_health.mark_healthy()
     
     response = client.get("/health-check")
     assert response.status_code == 200
@@ -92,6 +95,66 @@ def test_health_check(client: FlaskClient, gallery_service: GalleryService, mock
     assert response.json["data"]["service"] == "nhApiod-proxy"
     assert "timestamp" in response.json["data"]
     assert response.json["data"]["cookies_ok"] is True
+    assert response.json["data"]["session"]["state"] == "healthy"
+    ensure_valid.assert_not_called()
+
+def test_readiness_endpoint(client: FlaskClient, gallery_service: GalleryService) -> None:
+    """Test readiness endpoint before and after warm-up"""
+    response = client.get("/ready")
+    assert response.status_code == 200
+    assert response.json["data"]["ready"] is True
+
+    gallery_service.cookie_manager.ready.clear()
+    response = client.get("/ready")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == str(Settings.WARMUP_RETRY_AFTER)
+
+def test_gallery_endpoint_while_warming_up(
+    client: FlaskClient,
+    gallery_service: GalleryService,
+    mocker
+) -> None:
+    """Test that lookups needing upstream get a fast 503 with Retry-After"""
+    # Route through the real service so its readiness check is exercised
+    mocker.patch.object(
+        gallery_service,
+        'get_gallery',
+        GalleryService.get_gallery.__get__(gallery_service)
+    )
+    fetch = mocker.patch.object(gallery_service.cookie_manager, 'get')
+    gallery_service.cookie_manager.ready.clear()
+    
+    response = client.get("/get?id=123456")
+    
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == str(Settings.WARMUP_RETRY_AFTER)
+    assert response.json["status"] is False
+    fetch.assert_not_called()
+
+def test_upstream_503_has_no_retry_after(
+    client: FlaskClient,
+    gallery_service: GalleryService,
+    mocker
+) -> None:
+    """Test that a 503 passed through from upstream is not advertised as warm-up"""
+    mocker.patch.object(
+        gallery_service,
+        'get_gallery',
+        return_value=({"status": False, "reason": "Backend returned 503"}, 503)
+    )
+    response = client.get("/get?id=123456")
+    assert response.status_code == 503
+    assert "Retry-After" not in response.headers
+
+def test_stats_endpoint(client: FlaskClient) -> None:
+    """Test service statistics endpoint"""
+    response = client.get("/stats")
+    assert response.status_code == 200
+    assert response.json["status"] is True
+    upstream = response.json["data"]["upstream"]
+    assert "pool" in upstream
+    assert "renewal" in upstream
+    assert upstream["renewal"]["in_progress"] is False
 
 def test_pdf_status_endpoint(
     client: FlaskClient,
@@ -138,4 +201,18 @@ def test_docs_endpoint(client: FlaskClient) -> None:
     # Test OpenAPI spec
     response = client.get("/openapi.json")
     assert response.status_code == 200
-    assert "openapi" in response.json 
\ No newline at end of file
+    assert "openapi" in response.json 
+def test_batch_endpoint(client: FlaskClient) -> None:
+    """Test that batch lookups stream one NDJSON line per gallery"""
+    response = client.get("/get-batch?ids=1,2,2")
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.data.decode().splitlines()]
+    assert sorted(line["id"] for line in lines) == [1, 2]
+    assert all(line["http_status"] == 200 for line in lines)
+
+    response = client.post("/get-batch", json={"ids": [3]})
+    assert json.loads(response.data)["response"]["id"] == 3
+
+    assert client.get("/get-batch?ids=1,x").status_code == 400
+    assert client.get("/get-batch?ids=" + ",".join(["1"] * (Settings.BATCH_MAX_IDS + 1))).status_code == 400
@@ -16,6 +16,12 @@ def temp_cache_dir() -> Generator[str, None, None]:
     with tempfile.TemporaryDirectory() as tmpdir:
         yield tmpdir
 
+@pytest.fixture(autouse=True)
+def isolated_cookie_store(tmp_path, monkeypatch) -> None:
+    """Fixture keeping the shared session file and browser profiles private to each test"""
+    monkeypatch.setattr(Settings, 'COOKIE_STORE_PATH', str(tmp_path / "session.json"))
+    monkeypatch.setattr(Settings, 'BROWSER_PROFILE_DIR', str(tmp_path / "chrome-profiles"))
+
 @pytest.fixture
 def gallery_cache(temp_cache_dir: str) -> GalleryCache:
     """Fixture to create a gallery cache instance"""
@@ -0,0 +1,271 @@
+import json
+import pytest
+from pathlib import Path
+
+from src.core.browser_response import BrowserResponse
+from src.services.extraction import (
+    FallbackExtractor, GalleryExtractor, PageScanner, ScanExtractor, SoupExtractor, create_extractor,
+    decode_gallery_json, decode_js_string
+)
+from src.services.fetch_strategy import iter_text
+from src.services import extraction
+
+FIXTURES = Path(__file__).parent.parent / "fixtures"
+
+JAPANESE_TITLE = "(C99) [サークル名 (作者)] 夏のおもいで 〜「海」編〜 [中国翻訳]"
+
+def gallery_json(pages: int, title: str = "Test Gallery") -> str:
+    """Build the gallery JSON the way the page embeds it in JSON.parse"""
+    data = {
+        "id": 177013,
+        "media_id": "987560",
+        "title": {"english": "Test Gallery", "japanese": title, "pretty": "Test"},
+        "images": {
+            "cover": {"t": "j", "w": 350, "h": 506},
+            "pages": [{"t": "j", "w": 1280, "h": 1808} for _ in range(pages)]
+        },
+        "num_pages": pages
+    }
+    return json.dumps(data).replace('"', '\\u0022')
+
+def thumb(index: int) -> str:
+    """Build one thumb container as served by the gallery page"""
+    return (
+        f'<div class="thumb-container">\n'
+        f'<a class="gallerythumb" href="/g/177013/{index}/" rel="nofollow">\n'
+        f'<img class="lazyload" width="200" height="282" '
+        f'data-src="https://t3.nhentai.net/galleries/987560/{index}t.jpg" src="data:image/gif;base64,R0lGOD" />\n'
+        f'<noscript><img src="https://t3.nhentai.net/galleries/987560/{index}t.jpg" /></noscript>\n'
+        f'</a>\n</div>\n'
+    )
+
+def gallery_page(pages: int, thumbs: str = None, script_first: bool = False) -> str:
+    """Build a gallery page with the layout of /g/{id}"""
+    if thumbs is None:
+        thumbs = ''.join(thumb(i) for i in range(1, pages + 1))
+    script = f'<script>window._gallery = JSON.parse("{gallery_json(pages)}");</script>'
+    return (
+        '<!DOCTYPE html><html><head><title>Gallery</title></head><body>'
+        + (script if script_first else '')
+        + '<div id="content"><div class="container" id="bigcontainer">'
+        '<div id="cover"><a href="/g/177013/1/"><img class="lazyload" data-src="https://t3.nhentai.net/galleries/987560/cover.jpg" /></a></div>'
+        '</div>'
+        '<div class="container" id="thumbnail-container"><div class="thumbs">'
+        + thumbs
+        + '</div></div>'
+        '<div class="container index-container" id="related-container">'
+        '<div class="gallery"><a href="/g/1/" class="cover"><img class="lazyload" data-src="https://t3.nhentai.net/galleries/1/thumb.jpg" /></a></div>'
+        '</div></div>'
+        + ('' if script_first else script)
+        + '</body></html>'
+    )
+
+# Pages both extractors must read identically
+parity_corpus = [
+    pytest.param(gallery_page(3), id="small_gallery"),
+    pytest.param(gallery_page(250), id="large_gallery"),
+    pytest.param(gallery_page(3, script_first=True), id="script_before_thumbs"),
+    pytest.param(gallery_page(0, thumbs=''), id="empty_thumbs"),
+    pytest.param(
+        gallery_page(2).replace('<div class="thumbs">', ''),
+        id="no_thumbs_div"
+    ),
+    pytest.param(
+        gallery_page(3, thumbs=thumb(1) + '<div class="thumb-container"><a><img src="x.jpg" /></a></div>' + thumb(3)),
+        id="thumb_without_data_src"
+    ),
+    pytest.param(
+        gallery_page(2, thumbs=(
+            "<div class='thumb-container extra'><div class='inner'>"
+            "<img data-src='https://t3.nhentai.net/galleries/987560/1t.jpg?a=1&amp;b=2' />"
+            "<img data-src='https://t3.nhentai.net/galleries/987560/other.jpg' /></div></div>"
+            + thumb(2)
+        )),
+        id="nested_divs_quotes_and_entities"
+    ),
+    pytest.param(
+        gallery_page(4, thumbs=thumb(1) + thumb(2)),
+        id="fewer_thumbs_than_pages"
+    ),
+]
+
+@pytest.mark.parametrize("html_content", parity_corpus)
+def test_scan_matches_soup(html_content: str) -> None:
+    """Test that the single-pass scanner extracts what BeautifulSoup extracts"""
+    assert ScanExtractor().extract(html_content) == SoupExtractor().extract(html_content)
+
+def test_scan_reads_thumbnails() -> None:
+    """Test that thumbnails and fallback URLs are attached to pages in order"""
+    data = ScanExtractor().extract(gallery_page(2))
+
+    pages = data["images"]["pages"]
+    assert pages[0]["thumbnail"] == "https://t3.nhentai.net/galleries/987560/1t.jpg"
+    assert pages[1]["url"] == "https://t3.nhentai.net/galleries/987560/2.jpg"
+    assert data["media_id"] == "987560"
+
+def test_missing_json_returns_none() -> None:
+    """Test that pages without the gallery JSON yield nothing"""
+    assert ScanExtractor().extract("<html><body>Just a moment...</body></html>") is None
+
+def test_fallback_on_failure(mocker) -> None:
+    """Test that the fallback extractor runs when the primary one raises"""
+    primary = ScanExtractor()
+    mocker.patch.object(primary, 'extract', side_effect=ValueError("broken"))
+    extractor = FallbackExtractor(primary, SoupExtractor())
+
+    data = extractor.extract(gallery_page(1))
+
+    assert data["images"]["pages"][0]["thumbnail"].endswith("1t.jpg")
+    stats = extractor.stats()
+    assert stats["fallbacks"] == 1
+    assert stats["scan"]["runs"] == 1
+    assert stats["soup"]["runs"] == 1
+
+def test_create_extractor() -> None:
+    """Test that the configured extractor gets BeautifulSoup as its fallback"""
+    extractor = create_extractor('scan')
+    assert isinstance(extractor.primary, ScanExtractor)
+    assert isinstance(extractor.fallback, SoupExtractor)
+
+    assert create_extractor('soup').fallback is None
+    assert isinstance(create_extractor('unknown').primary, ScanExtractor)
+
+def test_extractor_must_implement_extract() -> None:
+    """Test that extractors without an extract method cannot be created"""
+    class Incomplete(GalleryExtractor):
+        name = 'incomplete'
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+# JSON.parse literals as served, with the title each must decode to
+literal_cases = [
+    pytest.param(
+        gallery_json(1, JAPANESE_TITLE),
+        JAPANESE_TITLE,
+        id="cjk_title_unicode_escapes"
+    ),
+    pytest.param(
+        json.dumps({"title": {"japanese": JAPANESE_TITLE}}, ensure_ascii=False).replace('"', '\\"'),
+        JAPANESE_TITLE,
+        id="cjk_title_raw_utf8"
+    ),
+    pytest.param(
+        json.dumps({"title": {"japanese": "絵日記 \U0001F338"}}).replace('"', '\\u0022'),
+        "絵日記 \U0001F338",
+        id="astral_surrogate_pair"
+    ),
+    pytest.param(
+        '{"title": {"japanese": "say \\\\\\"hi\\\\\\" \\\\\\\\ \\\'ok\\\' \\x41"}}',
+        'say "hi" \\ \'ok\' A',
+        id="js_only_escapes"
+    ),
+]
+
+@pytest.mark.parametrize("literal,title", literal_cases)
+@pytest.mark.parametrize("loads", [None, json.loads], ids=["default", "stdlib_json"])
+def test_decode_gallery_json(literal: str, title: str, loads, mocker) -> None:
+    """Test that JSON.parse literals decode without mangling titles"""
+    if loads:
+        mocker.patch('src.services.extraction.load_json', loads)
+    assert decode_gallery_json(literal)["title"]["japanese"] == title
+
+def test_decode_js_string() -> None:
+    """Test JavaScript escapes JSON has no equivalent for"""
+    assert decode_js_string('a\\x41\\v\\0\\\nb"c') == 'aA\x0b\x00b"c'
+    assert decode_js_string('\\u3042\\n\\u0022') == 'あ\n"'
+
+def test_scan_reads_cjk_title() -> None:
+    """Test that a recorded-style page with a Japanese title round-trips"""
+    page = gallery_page(2).replace(gallery_json(2), gallery_json(2, JAPANESE_TITLE))
+    assert ScanExtractor().extract(page)["title"]["japanese"] == JAPANESE_TITLE
+
+@pytest.mark.parametrize("extractor", [ScanExtractor(), SoupExtractor()], ids=["scan", "soup"])
+@pytest.mark.parametrize("loads", [None, json.loads], ids=["default", "stdlib_json"])
+def test_gallery_page_fixture(extractor, loads, mocker) -> None:
+    """Test extraction of a /g/{id} page in the live layout with a CJK title"""
+    if loads:
+        mocker.patch('src.services.extraction.load_json', loads)
+    page = (FIXTURES / "gallery_400123.html").read_text(encoding="utf-8")
+
+    data = extractor.extract(page)
+
+    assert data["id"] == 400123
+    assert data["title"]["japanese"] == JAPANESE_TITLE
+    assert [tag["name"] for tag in data["tags"]] == ["chinese", "translated", "doujinshi"]
+    assert [p["thumbnail"] for p in data["images"]["pages"]] == [
+        f"https://t3.nhentai.net/galleries/2190456/{i}t.webp" for i in range(1, 5)
+    ]
+    assert ScanExtractor().extract_stream(chunked(page, 512)) == ScanExtractor().extract(page)
+
+def chunked(text: str, size: int):
+    """Split a page into parts as a streamed response would deliver them"""
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+@pytest.mark.parametrize("size", [7, 64, 4096])
+@pytest.mark.parametrize("html_content", parity_corpus[:1] + parity_corpus[2:])
+def test_streamed_scan_matches_whole_page(html_content: str, size: int) -> None:
+    """Test that scanning a page in parts finds what scanning it whole finds"""
+    assert ScanExtractor().extract_stream(chunked(html_content, size)) == ScanExtractor().extract(html_content)
+
+def test_streamed_scan_stops_early() -> None:
+    """Test that no more of the page is read once the gallery data was found"""
+    page = gallery_page(3, script_first=True)
+    consumed = []
+
+    def chunks():
+        for part in chunked(page + "<footer>" + "x" * 100000, 256):
+            consumed.append(part)
+            yield part
+
+    data = ScanExtractor().extract_stream(chunks())
+
+    assert len(data["images"]["pages"]) == 3
+    assert sum(len(part) for part in consumed) < len(page) + 256
+
+@pytest.mark.parametrize("size", [7, 16384])
+def test_streamed_scan_skips_json_parse_of_variables(size: int) -> None:
+    """Test that a JSON.parse call on a variable does not pin the scan buffer"""
+    prefix = (
+        '<script>var config = JSON.parse(window.rawConfig); JSON.parse( data );</script>'
+        + '<p>' + 'x' * 200000 + '</p>'
+    )
+    page = prefix + gallery_page(3)
+    scanner = PageScanner()
+    largest = 0
+    for offset, part in zip(range(0, len(page), size), chunked(page, size)):
+        scanner.feed(part)
+        if offset + size < len(prefix):
+            largest = max(largest, len(scanner._buffer))
+
+    assert largest < size + len('JSON.parse(')
+    assert scanner.result() == ScanExtractor().extract(gallery_page(3))
+
+def test_streamed_literal_is_read_once(mocker) -> None:
+    """Test that a literal received in many parts is not rescanned from its start on every part"""
+    page = gallery_page(2000)
+    read = []
+    patterns = {}
+    for quote, pattern in extraction.LITERAL_BODY_PATTERNS.items():
+        def match(buffer, position, pattern=pattern):
+            read.append(len(buffer) - position)
+            return pattern.match(buffer, position)
+        patterns[quote] = mocker.Mock(match=match)
+    mocker.patch.dict(extraction.LITERAL_BODY_PATTERNS, patterns)
+
+    scanner = PageScanner()
+    for part in chunked(page, 1024):
+        scanner.feed(part)
+
+    assert sum(read) < 2 * len(page)
+    assert scanner.result() == ScanExtractor().extract(page)
+
+def test_iter_text_decodes_split_characters_and_caps_bytes() -> None:
+    """Test that multi-byte characters survive chunking and reading stops at the cap"""
+    response = BrowserResponse(url="", status_code=200, content=JAPANESE_TITLE.encode("utf-8") * 4000)
+
+    text = "".join(iter_text(response, max_bytes=10 ** 6))
+    assert text == JAPANESE_TITLE * 4000
+
+    capped = "".join(iter_text(response, max_bytes=20000))
+    assert len(capped.encode("utf-8")) <= 20000
@@ -1,7 +1,13 @@
+import time
 import pytest
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, Tuple
 
 from src.services.gallery import GalleryService
+from src.core.browser_response import BrowserResponse
+from src.services.fetch_strategy import HtmlStrategy
+from src.config.settings import Settings
+from src.core.negative_cache import MISSING
 
 # Test cases for gallery data processing
 process_gallery_data_cases = [
@@ -145,9 +151,10 @@ def test_get_gallery(
                 </script>
             </html>
         '''
+        mock_response.iter_content.return_value = [mock_response.text.encode()]
         mocker.patch.object(
             gallery_service.cookie_manager,
-            'get',
+            'fetch',
             return_value=mock_response
         )
 
@@ -163,7 +170,7 @@ def test_gallery_caching(
     gallery_id = sample_gallery_data['id']
 
     # Mock cookie manager
-    mocker.patch.object(
+    ensure_valid = mocker.patch.object(
         gallery_service.cookie_manager,
         'ensure_valid_cookies',
         return_value=True
@@ -185,6 +192,8 @@ def test_gallery_caching(
 
     assert status == 200
     assert result == sample_gallery_data
+    # Cache hits never validate the upstream session
+    ensure_valid.assert_not_called()
 
 def test_pdf_status_check(
     gallery_service: GalleryService,
@@ -210,4 +219,304 @@ def test_pdf_status_check(
     assert status == 200
     assert result['status'] is True
     assert 'pdf_status' in result
-    assert result['pdf_status'] in ['processing', 'completed', 'error'] 
\ No newline at end of file
+    assert result['pdf_status'] in ['processing', 'completed', 'error'] 
+
+
+def test_get_gallery_while_warming_up(
+    gallery_service: GalleryService,
+    sample_gallery_data: Dict[str, Any],
+    mocker
+) -> None:
+    """Test that upstream lookups fail fast until warm-up completes, cache hits do not"""
+    gallery_service.cookie_manager.ready.clear()
+    fetch = mocker.patch.object(gallery_service.cookie_manager, 'fetch')
+
+    result, status = gallery_service.get_gallery(654321)
+    assert status == 503
+    assert result["status"] is False
+    fetch.assert_not_called()
+
+    gallery_service.gallery_cache.set(sample_gallery_data['id'], sample_gallery_data)
+    result, status = gallery_service.get_gallery(sample_gallery_data['id'])
+    assert status == 200
+    assert result == sample_gallery_data
+
+def test_get_gallery_backend_status(
+    gallery_service: GalleryService,
+    mocker
+) -> None:
+    """Test that genuine upstream status codes drive retries and errors"""
+    mocker.patch.object(gallery_service.cookie_manager, 'ensure_valid_cookies', return_value=True)
+    sleep = mocker.patch('src.services.gallery.time.sleep')
+    rate_limited = BrowserResponse(url="", status_code=429, headers={"Retry-After": "3"})
+    not_found = BrowserResponse(url="", status_code=404, content=b"<h1>404 - Not Found</h1>")
+    fetch = mocker.patch.object(
+        gallery_service.cookie_manager,
+        'fetch',
+        side_effect=[rate_limited, not_found]
+    )
+
+    result, status = gallery_service.get_gallery(999999)
+
+    assert status == 404
+    assert result == {"status": False, "reason": "Backend returned 404"}
+    assert fetch.call_count == 2
+    sleep.assert_called_once_with(3.0)
+
+def test_get_gallery_from_api(
+    gallery_service: GalleryService,
+    mocker
+) -> None:
+    """Test that the JSON API is tried first and normalized like scraped pages"""
+    mocker.patch.object(gallery_service.cookie_manager, 'ensure_valid_cookies', return_value=True)
+    mocker.patch.object(gallery_service.storage_service, 'check_pdf_exists', return_value=None)
+    api_response = BrowserResponse(
+        url="",
+        status_code=200,
+        content=b'{"id": 42, "media_id": "900", "images": {"pages": [{"t": "p", "w": 1, "h": 1}]}}'
+    )
+    fetch = mocker.patch.object(gallery_service.cookie_manager, 'fetch', return_value=api_response)
+
+    result, status = gallery_service.get_gallery(42)
+
+    assert status == 200
+    page = result["data"]["images"]["pages"][0]
+    assert page["thumbnail"].endswith("/galleries/900/1t.png")
+    assert page["url"].startswith("https://i.")
+    assert fetch.call_args.args[0].endswith("/api/gallery/42")
+    assert gallery_service.stats()["strategies"]["api"]["successes"] == 1
+
+def test_get_gallery_falls_back_to_html(
+    gallery_service: GalleryService,
+    mocker
+) -> None:
+    """Test that a failing API falls back to scraping the gallery page"""
+    mocker.patch.object(gallery_service.cookie_manager, 'ensure_valid_cookies', return_value=True)
+    mocker.patch.object(gallery_service.storage_service, 'check_pdf_exists', return_value=None)
+    page = BrowserResponse(
+        url="",
+        status_code=200,
+        content=b'<script>JSON.parse("{\\u0022id\\u0022: 7, \\u0022media_id\\u0022: \\u00221\\u0022}")</script>'
+    )
+
+    def fetch(url, **kwargs):
+        if "/api/" in url:
+            return BrowserResponse(url=url, status_code=500)
+        return page
+    mocker.patch.object(gallery_service.cookie_manager, 'fetch', side_effect=fetch)
+
+    result, status = gallery_service.get_gallery(7)
+
+    assert status == 200
+    assert result["data"]["id"] == 7
+    stats = gallery_service.stats()["strategies"]
+    assert stats["api"]["failures"] == 1
+    assert stats["html"]["successes"] == 1
+
+def test_get_gallery_streams_page(
+    gallery_service: GalleryService,
+    mocker
+) -> None:
+    """Test that gallery pages are requested unread and closed after extraction"""
+    mocker.patch.object(gallery_service.cookie_manager, 'ensure_valid_cookies', return_value=True)
+    mocker.patch.object(gallery_service.storage_service, 'check_pdf_exists', return_value=None)
+    page = BrowserResponse(
+        url="",
+        status_code=200,
+        content=b'<script>JSON.parse("{\\u0022id\\u0022: 8, \\u0022media_id\\u0022: \\u00221\\u0022}")</script>'
+    )
+    close = mocker.spy(page, 'close')
+    gallery_service.strategies = [HtmlStrategy(stream=True)]
+    fetch = mocker.patch.object(gallery_service.cookie_manager, 'fetch', return_value=page)
+
+    result, status = gallery_service.get_gallery(8)
+
+    assert status == 200
+    assert result["data"]["id"] == 8
+    assert fetch.call_args.kwargs["stream"] is True
+    close.assert_called_once()
+
+def test_get_galleries_serves_hits_first(
+    gallery_service: GalleryService,
+    sample_gallery_data: Dict[str, Any],
+    mocker
+) -> None:
+    """Test that batch lookups yield cache hits before fetching misses concurrently"""
+    gallery_service.gallery_cache.set(sample_gallery_data['id'], sample_gallery_data)
+    mocker.patch.object(gallery_service.cookie_manager, 'ensure_valid_cookies', return_value=True)
+    fetch = mocker.patch.object(
+        gallery_service,
+        '_fetch_with',
+        side_effect=lambda strategy, gallery_id: ({"status": True, "data": {"id": gallery_id}}, 200)
+    )
+
+    results = list(gallery_service.get_galleries([5, sample_gallery_data['id'], 6, 5]))
+
+    assert results[0] == (sample_gallery_data['id'], sample_gallery_data, 200)
+    assert sorted(result[0] for result in results[1:]) == [5, 6]
+    assert fetch.call_count == 2
+    assert gallery_service.stats()["batch_rate_limit"]["acquired"] == 2
+
+def test_get_galleries_rate_limits_upstream_fetches_only(
+    gallery_service: GalleryService,
+    mocker
+) -> None:
+    """Test that misses answered by the negative cache take no rate limit token"""
+    gallery_service.gallery_cache.negative.add(7, MISSING)
+    fetch = mocker.patch.object(gallery_service, '_fetch_with')
+
+    assert list(gallery_service.get_galleries([7])) == [
+        (7, {"status": False, "reason": "Backend returned 404"}, 404)
+    ]
+    fetch.assert_not_called()
+    assert gallery_service.stats()["batch_rate_limit"]["acquired"] == 0
+
+def test_abandoned_batch_cancels_pending_lookups(
+    gallery_service: GalleryService,
+    mocker
+) -> None:
+    """Test that closing a batch early cancels the lookups that have not started"""
+    gallery_service._batch_executor = ThreadPoolExecutor(max_workers=1)
+    mocker.patch.object(gallery_service.cookie_manager, 'ensure_valid_cookies', return_value=True)
+
+    def fetch(strategy, gallery_id):
+        time.sleep(0.05)
+        return {"status": True, "data": {"id": gallery_id}}, 200
+    upstream = mocker.patch.object(gallery_service, '_fetch_with', side_effect=fetch)
+
+    batch = gallery_service.get_galleries(range(1, 21))
+    next(batch)
+    batch.close()
+    gallery_service._batch_executor.shutdown(wait=True)
+
+    # The lookup running when the client left finishes; the rest never start
+    assert upstream.call_count <= 2
+
+def test_concurrent_misses_share_one_fetch(
+    gallery_service: GalleryService,
+    mocker
+) -> None:
+    """Test that concurrent requests for one uncached gallery go upstream once"""
+    mocker.patch.object(gallery_service.cookie_manager, 'ensure_valid_cookies', return_value=True)
+    mocker.patch.object(gallery_service.storage_service, 'check_pdf_exists', return_value=None)
+    gallery_service.strategies = [HtmlStrategy(stream=False)]
+    page = BrowserResponse(
+        url="",
+        status_code=200,
+        content=b'<script>JSON.parse("{\\u0022id\\u0022: 9, \\u0022media_id\\u0022: \\u00221\\u0022}")</script>'
+    )
+
+    def fetch(url, **kwargs):
+        # Hold the leader until every other request is waiting on it
+        deadline = time.monotonic() + 5
+        while gallery_service.inflight.stats()["coalesced"] < 4 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return page
+    upstream = mocker.patch.object(gallery_service.cookie_manager, 'fetch', side_effect=fetch)
+
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        results = list(executor.map(lambda _: gallery_service.get_gallery(9), range(5)))
+
+    assert all(status == 200 for _, status in results)
+    assert upstream.call_count == 1
+    assert gallery_service.stats()["coalescing"]["coalesced"] == 4
+
+def test_stale_entry_served_while_refreshing(
+    gallery_service: GalleryService,
+    sample_gallery_data: Dict[str, Any],
+    mocker
+) -> None:
+    """Test that an expired entry is served at once and replaced in the background"""
+    mocker.patch.object(gallery_service.cookie_manager, 'ensure_valid_cookies', return_value=True)
+    mocker.patch.object(gallery_service.storage_service, 'check_pdf_exists', return_value=None)
+    gallery_service.strategies = [HtmlStrategy(stream=False)]
+    expired = time.time() - Settings.CACHE_DURATION - 60
+    gallery_service.gallery_cache.set(9, sample_gallery_data, cached_at=expired)
+    fetch = mocker.patch.object(
+        gallery_service.cookie_manager,
+        'fetch',
+        return_value=BrowserResponse(
+            url="",
+            status_code=200,
+            content=b'<script>JSON.parse("{\\u0022id\\u0022: 9, \\u0022media_id\\u0022: \\u00221\\u0022}")</script>'
+        )
+    )
+
+    result, status = gallery_service.get_gallery(9)
+    assert status == 200
+    assert result["stale"] is True
+    assert result["media_id"] == sample_gallery_data["media_id"]
+
+    gallery_service._refresh_executor.shutdown(wait=True)
+    fetch.assert_called_once()
+    result, status = gallery_service.get_gallery(9)
+    assert status == 200
+    assert "stale" not in result
+    assert result["media_id"] == "1"
+    assert gallery_service.stats()["stale"] == {"served": 1, "refreshed": 1, "refresh_failures": 0}
+
+def test_stale_entry_served_while_upstream_fails(
+    gallery_service: GalleryService,
+    sample_gallery_data: Dict[str, Any],
+    mocker
+) -> None:
+    """Test that a failed refresh keeps serving the stale entry without retrying at once"""
+    mocker.patch.object(gallery_service.cookie_manager, 'ensure_valid_cookies', return_value=True)
+    expired = time.time() - Settings.CACHE_DURATION - 60
+    gallery_service.gallery_cache.set(9, sample_gallery_data, cached_at=expired)
+    fetch = mocker.patch.object(
+        gallery_service.cookie_manager,
+        'fetch',
+        return_value=BrowserResponse(url="", status_code=503)
+    )
+
+    gallery_service.get_gallery(9)
+    result, status = gallery_service.get_gallery(9)
+    gallery_service._refresh_executor.shutdown(wait=True)
+
+    assert status == 200
+    assert result["stale"] is True
+    assert fetch.call_count == len(gallery_service.strategies)
+    assert gallery_service.stats()["stale"]["refresh_failures"] == 1
+
+def test_missing_gallery_is_remembered(
+    gallery_service: GalleryService,
+    sample_gallery_data: Dict[str, Any],
+    mocker
+) -> None:
+    """Test that a 404 is answered from the negative cache until the gallery is cached"""
+    mocker.patch.object(gallery_service.cookie_manager, 'ensure_valid_cookies', return_value=True)
+    fetch = mocker.patch.object(
+        gallery_service.cookie_manager,
+        'fetch',
+        return_value=BrowserResponse(url="", status_code=404)
+    )
+
+    first = gallery_service.get_gallery(999999)
+    second = gallery_service.get_gallery(999999)
+
+    assert first == second == ({"status": False, "reason": "Backend returned 404"}, 404)
+    fetch.assert_called_once()
+    assert gallery_service.stats()["cache"]["negative"]["hits"] == 1
+
+    gallery_service.gallery_cache.set(999999, sample_gallery_data)
+    assert gallery_service.get_gallery(999999) == (sample_gallery_data, 200)
+
+def test_failing_gallery_is_remembered(
+    gallery_service: GalleryService,
+    mocker
+) -> None:
+    """Test that repeated extraction failures stop going upstream"""
+    mocker.patch.object(gallery_service.cookie_manager, 'ensure_valid_cookies', return_value=True)
+    gallery_service.gallery_cache.negative.max_failures = 2
+    gallery_service.strategies = [HtmlStrategy(stream=False)]
+    fetch = mocker.patch.object(
+        gallery_service.cookie_manager,
+        'fetch',
+        return_value=BrowserResponse(url="", status_code=200, content=b"<html></html>")
+    )
+
+    results = [gallery_service.get_gallery(42) for _ in range(3)]
+
+    assert all(result == ({"status": False, "reason": "Failed to extract gallery data"}, 500) for result in results)
+    assert fetch.call_count == 2
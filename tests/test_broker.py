@@ -0,0 +1,102 @@
+import threading
+import pytest
+from unittest.mock import MagicMock, patch
+
+from src.config.settings import Settings
+from src.core.broker import BrokerServer
+from src.core.broker_client import BrokerClient
+from src.core.browser_response import BrowserResponse
+from src.core.cookie_manager import CookieManager
+
+SESSION = {
+    "cookies": [{"name": "cf_clearance", "value": "brokered", "domain": ".nhentai.net", "path": "/"}],
+    "user_agent": "broker-agent",
+    "published_at": 1000.0
+}
+
+PAGE = BrowserResponse(
+    url=f"{Settings.WEB_TARGET}/g/123",
+    status_code=200,
+    headers={"Content-Type": "text/html; charset=utf-8"},
+    content=b"<html>gallery</html>"
+)
+
+@pytest.fixture
+def broker_manager():
+    """Fixture providing the cookie manager owned by the broker"""
+    manager = MagicMock()
+    manager.export_session.return_value = SESSION
+    manager.last_harvest = SESSION["published_at"]
+    manager.get.return_value = PAGE
+    manager.renewal.renew.return_value = True
+    manager.stats.return_value = {"pool": {"live": 1}}
+    return manager
+
+@pytest.fixture
+def client(broker_manager):
+    """Fixture running a broker on an ephemeral port"""
+    server = BrokerServer(("127.0.0.1", 0), broker_manager)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield BrokerClient(f"http://127.0.0.1:{server.server_address[1]}", timeout=5)
+    server.shutdown()
+    server.server_close()
+
+def test_session(client, broker_manager):
+    """Test that the broker hands out its current session"""
+    assert client.session() == SESSION
+    broker_manager.ensure_valid_cookies.assert_called_once()
+    broker_manager.harvest_cookies.assert_not_called()
+
+def test_session_newer_than_triggers_harvest(client, broker_manager):
+    """Test that a client holding the broker's session gets a fresh harvest"""
+    client.session(newer_than=SESSION["published_at"])
+    broker_manager.harvest_cookies.assert_called_once_with(since=SESSION["published_at"])
+
+def test_fetch(client, broker_manager):
+    """Test browser fetches through the broker"""
+    url = f"{Settings.WEB_TARGET}/g/123"
+    response = client.fetch(url)
+    assert response == PAGE
+    assert response.text == "<html>gallery</html>"
+    broker_manager.get.assert_called_once_with(url)
+
+def test_fetch_rejects_foreign_urls(client, broker_manager):
+    """Test that the broker only navigates to the target site"""
+    assert client.fetch("https://example.com/") is None
+    broker_manager.get.assert_not_called()
+
+def test_fetch_rejects_lookalike_hosts(client, broker_manager):
+    """Test that hosts merely starting with the target site's host are rejected"""
+    assert client.fetch(f"{Settings.WEB_TARGET}.example.com/g/123") is None
+    assert client.fetch(f"{Settings.WEB_TARGET}@example.com/g/123") is None
+    broker_manager.get.assert_not_called()
+
+def test_renew(client, broker_manager):
+    """Test forced renewal through the broker"""
+    payload = client.renew()
+    assert payload["renewed"] is True
+    assert payload["cookies"] == SESSION["cookies"]
+
+def test_stats(client):
+    """Test broker statistics"""
+    assert client.stats() == {"pool": {"live": 1}}
+
+def test_unreachable_broker():
+    """Test that an unreachable broker yields no session"""
+    assert BrokerClient("http://127.0.0.1:9", timeout=1).session() is None
+
+def test_cookie_manager_uses_broker():
+    """Test that a worker configured with a broker launches no browser"""
+    with patch('undetected_chromedriver.Chrome') as chrome, \
+         patch.object(BrokerClient, 'session', return_value=SESSION), \
+         patch.object(BrokerClient, 'fetch', return_value=PAGE) as fetch:
+        manager = CookieManager(broker_url="http://127.0.0.1:5050")
+
+        assert manager.get(f"{Settings.WEB_TARGET}/g/1") is PAGE
+        chrome.assert_not_called()
+
+    fetch.assert_called_once_with(f"{Settings.WEB_TARGET}/g/1")
+    assert manager.session.cookies.get('cf_clearance') == 'brokered'
+    assert manager.session.headers['User-Agent'] == 'broker-agent'
+    assert manager.driver is None
@@ -0,0 +1,235 @@
+import time
+import threading
+import pytest
+from unittest.mock import MagicMock, PropertyMock
+from selenium.common.exceptions import WebDriverException
+from urllib3.exceptions import MaxRetryError
+
+from src.core.browser_pool import BrowserPool, BrowserPoolTimeout
+
+@pytest.fixture
+def factory():
+    """Fixture providing a driver factory that records launched drivers"""
+    launched = []
+
+    def create():
+        driver = MagicMock()
+        launched.append(driver)
+        return driver
+
+    create.launched = launched
+    return create
+
+def test_warm_launches_pool_size(factory):
+    """Test that warming launches one instance per slot"""
+    pool = BrowserPool(factory, size=3, lease_timeout=1)
+    pool.warm()
+
+    assert len(factory.launched) == 3
+    assert pool.stats()["idle"] == 3
+
+def test_lease_returns_instance(factory):
+    """Test that a lease hands out an instance and returns it afterwards"""
+    pool = BrowserPool(factory, size=1, lease_timeout=1)
+    pool.warm()
+
+    with pool.lease() as browser:
+        assert browser.driver is factory.launched[0]
+        assert pool.stats()["idle"] == 0
+
+    assert pool.stats()["idle"] == 1
+    assert pool.stats()["leases"] == 1
+
+def test_lease_launches_lazily_up_to_size(factory):
+    """Test that instances are launched on demand up to the pool size"""
+    pool = BrowserPool(factory, size=2, lease_timeout=0.1)
+
+    first = pool.acquire()
+    second = pool.acquire()
+    assert first is not second
+    assert len(factory.launched) == 2
+
+    with pytest.raises(BrowserPoolTimeout):
+        pool.acquire()
+    assert pool.stats()["lease_timeouts"] == 1
+
+def test_waiting_lease_gets_released_instance(factory):
+    """Test that a blocked caller receives an instance as soon as it is returned"""
+    pool = BrowserPool(factory, size=1, lease_timeout=5)
+    browser = pool.acquire()
+    leased = []
+
+    waiter = threading.Thread(target=lambda: leased.append(pool.acquire()))
+    waiter.start()
+    pool.release(browser)
+    waiter.join(timeout=5)
+
+    assert leased == [browser]
+
+def test_failing_instance_is_recycled(factory):
+    """Test that an instance is replaced after repeated failed leases"""
+    pool = BrowserPool(factory, size=1, lease_timeout=1, max_failures=2)
+    pool.warm()
+    original = factory.launched[0]
+
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            with pool.lease():
+                raise RuntimeError("navigation failed")
+
+    original.quit.assert_called_once()
+    with pool.lease() as browser:
+        assert browser.driver is not original
+    assert pool.stats()["recycled"] == 1
+
+def test_dead_instance_is_replaced_on_acquire(factory):
+    """Test that an unresponsive browser is not handed out"""
+    pool = BrowserPool(factory, size=1, lease_timeout=1)
+    pool.warm()
+    dead = factory.launched[0]
+    type(dead).current_url = PropertyMock(side_effect=WebDriverException("gone"))
+
+    browser = pool.acquire()
+
+    assert browser.driver is not dead
+    dead.quit.assert_called_once()
+
+@pytest.mark.parametrize("error", [
+    MaxRetryError(None, "http://localhost:9515/session/1/url"),
+    ConnectionRefusedError(111, "Connection refused"),
+], ids=["max_retry", "connection_refused"])
+def test_instance_with_dead_driver_is_replaced_on_acquire(factory, error):
+    """Test that a driver whose chromedriver died is retired without losing its slot"""
+    pool = BrowserPool(factory, size=1, lease_timeout=1)
+    pool.warm()
+    dead = factory.launched[0]
+    type(dead).current_url = PropertyMock(side_effect=error)
+
+    with pool.lease() as browser:
+        assert browser.driver is not dead
+    dead.quit.assert_called_once()
+
+    # The slot is free again for the next lease
+    with pool.lease(timeout=0.5) as browser:
+        assert browser.driver is factory.launched[1]
+
+def test_recycle_all_quits_idle_and_returned_instances(factory):
+    """Test that recycling retires idle instances now and leased ones on return"""
+    pool = BrowserPool(factory, size=2, lease_timeout=1)
+    pool.warm()
+    leased = pool.acquire()
+
+    pool.recycle_all()
+    idle_driver = next(d for d in factory.launched if d is not leased.driver)
+    idle_driver.quit.assert_called_once()
+    leased.driver.quit.assert_not_called()
+
+    pool.release(leased)
+    leased.driver.quit.assert_called_once()
+
+def wait_for(condition, timeout=2.0):
+    """Poll until a condition holds or the timeout passes"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+def test_instance_replaced_after_navigation_limit(factory):
+    """Test that a worn instance is replaced by a pre-warmed one before it is shut down"""
+    pool = BrowserPool(factory, size=1, lease_timeout=1, max_navigations=3, max_rss_mb=0)
+    pool.warm()
+
+    with pool.lease() as browser:
+        browser.navigations = 3
+
+    assert wait_for(lambda: factory.launched[0].quit.called)
+    stats = pool.stats()
+    assert len(factory.launched) == 2
+    assert stats["live"] == 1
+    assert stats["navigation_recycles"] == 1
+    with pool.lease() as browser:
+        assert browser.driver is factory.launched[1]
+
+def test_leased_instance_drained_after_replacement(factory):
+    """Test that an instance still leased when its replacement is ready quits once returned"""
+    pool = BrowserPool(factory, size=2, lease_timeout=1, max_navigations=1, max_rss_mb=0)
+    first = pool.acquire()
+    first.navigations = 1
+    pool.release(first)
+
+    assert wait_for(lambda: len(factory.launched) == 2 and first.retired)
+    assert factory.launched[0].quit.called
+
+def test_instance_replaced_above_memory_limit(factory):
+    """Test that an instance whose process tree exceeds the memory limit is replaced"""
+    readings = {}
+    pool = BrowserPool(
+        factory,
+        size=1,
+        lease_timeout=1,
+        max_navigations=0,
+        max_rss_mb=100,
+        rss_check_interval=0,
+        memory=lambda driver: readings.get(id(driver), 50 * 1048576)
+    )
+    pool.warm()
+
+    with pool.lease() as browser:
+        assert browser.driver is factory.launched[0]
+    assert pool.stats()["instances"][0]["rss_mb"] == 50.0
+
+    readings[id(factory.launched[0])] = 150 * 1048576
+    live_during_launch = []
+    launch = factory
+
+    def create():
+        live_during_launch.append(pool.stats()["live"])
+        return launch()
+
+    pool._factory = create
+    with pool.lease():
+        pass
+
+    assert wait_for(lambda: [i["slot"] for i in pool.stats()["instances"]] == [1])
+    assert factory.launched[0].quit.called
+    assert pool.stats()["memory_recycles"] == 1
+    # The worn instance was shut down before its replacement started
+    assert live_during_launch == [0]
+
+def test_replace_all_launches_before_retiring(factory):
+    """Test that every instance is replaced without the pool ever running empty"""
+    pool = BrowserPool(factory, size=2, lease_timeout=1, max_navigations=0, max_rss_mb=0)
+    pool.warm()
+    leased = pool.acquire()
+    live_during_launch = []
+    launch = factory
+
+    def create():
+        live_during_launch.append(pool.stats()["live"])
+        return launch()
+
+    pool._factory = create
+    assert pool.replace_all() is True
+
+    # Each replacement started while both old instances were still live
+    assert live_during_launch == [2, 2]
+    assert factory.launched[0].quit.called != factory.launched[1].quit.called
+    assert leased.retired is True
+    assert not leased.driver.quit.called
+
+    pool.release(leased)
+    assert leased.driver.quit.called
+    assert pool.stats()["live"] == 2
+
+def test_replace_all_keeps_instance_on_launch_failure(factory):
+    """Test that an instance stays in service if its replacement fails to launch"""
+    pool = BrowserPool(factory, size=1, lease_timeout=1, max_navigations=0, max_rss_mb=0)
+    pool.warm()
+    pool._factory = MagicMock(side_effect=WebDriverException("launch failed"))
+
+    assert pool.replace_all() is False
+    with pool.lease() as browser:
+        assert browser.driver is factory.launched[0]
+        assert browser.draining is False
@@ -0,0 +1,253 @@
+import os
+import json
+import time
+import pytest
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any
+
+from src.core.cache import GalleryCache
+from src.core.cache_store import CacheStore, FileStore, SqliteStore, create_store, migrate
+from src.core.memory_cache import MemoryCache
+from src.config.settings import Settings
+
+def test_expired_entry_kept_until_max_stale(
+    gallery_cache: GalleryCache,
+    sample_gallery_data: Dict[str, Any]
+) -> None:
+    """Test that expired entries are looked up as stale until the max-stale bound"""
+    expired = time.time() - Settings.CACHE_DURATION - 60
+    gallery_cache.set(1, sample_gallery_data, cached_at=expired)
+
+    assert gallery_cache.get(1) is None
+    entry = gallery_cache.lookup(1)
+    assert entry.is_stale
+    assert entry.data == sample_gallery_data
+
+    gallery_cache.set(2, sample_gallery_data, cached_at=expired - Settings.CACHE_MAX_STALE)
+    assert gallery_cache.lookup(2) is None
+
+def test_cleanup_keeps_stale_entries(
+    gallery_cache: GalleryCache,
+    sample_gallery_data: Dict[str, Any]
+) -> None:
+    """Test that the sweep only removes entries past the max-stale bound"""
+    expired = time.time() - Settings.CACHE_DURATION - 60
+    gallery_cache.set(1, sample_gallery_data)
+    gallery_cache.set(2, sample_gallery_data, cached_at=expired)
+    gallery_cache.set(3, sample_gallery_data, cached_at=expired - Settings.CACHE_MAX_STALE)
+
+    gallery_cache.cleanup_expired()
+
+    assert gallery_cache.get(1) == sample_gallery_data
+    assert gallery_cache.lookup(2).is_stale
+    assert gallery_cache.lookup(3) is None
+
+def test_memory_tier_serves_hot_entries(
+    gallery_cache: GalleryCache,
+    sample_gallery_data: Dict[str, Any],
+    mocker
+) -> None:
+    """Test that entries read once are served from memory without touching the disk"""
+    gallery_cache.set(1, sample_gallery_data)
+    gallery_cache.memory.clear()
+
+    assert gallery_cache.get(1) == sample_gallery_data
+    read = mocker.patch('src.core.cache.open', side_effect=AssertionError("disk read"))
+    exists = mocker.patch('src.core.cache.os.path.exists', side_effect=AssertionError("disk read"))
+    assert gallery_cache.get(1) == sample_gallery_data
+    read.assert_not_called()
+    exists.assert_not_called()
+
+    mocker.stopall()
+    assert gallery_cache.get(2) is None
+    stats = gallery_cache.stats()
+    assert (stats["memory_hits"], stats["disk_hits"], stats["misses"]) == (1, 1, 1)
+
+def test_memory_tier_bounded_by_bytes(
+    temp_cache_dir: str,
+    sample_gallery_data: Dict[str, Any]
+) -> None:
+    """Test that the least recently used entries are demoted to disk once the size limit is hit"""
+    # One cached time for every entry, so all of them serialize to the same size
+    cached_at = time.time()
+    entry_size = len(json.dumps({'cached_at': cached_at, 'data': sample_gallery_data}, ensure_ascii=False).encode('utf-8'))
+    cache = GalleryCache(cache_dir=temp_cache_dir, memory_bytes=entry_size * 5)
+    for gallery_id in range(1, 5):
+        cache.set(gallery_id, sample_gallery_data, cached_at=cached_at)
+    cache.get(1)
+    cache.set(5, sample_gallery_data, cached_at=cached_at)
+    cache.set(6, sample_gallery_data, cached_at=cached_at)
+
+    memory = cache.memory.stats()
+    assert memory["bytes"] <= memory["max_bytes"]
+    assert memory["evictions"] == 1
+    assert cache.memory.get(1) is not None
+    assert cache.memory.get(2) is None
+    assert cache.get(2) == sample_gallery_data
+
+@pytest.fixture(params=["file", "sqlite"])
+def store(request, tmp_path) -> CacheStore:
+    """Fixture providing each storage engine"""
+    return create_store(request.param, str(tmp_path))
+
+def test_store_round_trip(store: CacheStore, sample_gallery_data: Dict[str, Any]) -> None:
+    """Test that every storage engine reads back what it wrote"""
+    size = store.write(1, 1000.0, sample_gallery_data)
+    store.write(2, 2000.0, {"title": "夏のおもいで"})
+
+    assert store.read(1) == (1000.0, sample_gallery_data, size)
+    assert store.read(2)[1] == {"title": "夏のおもいで"}
+    assert store.read(3) is None
+    assert sorted(gallery_id for gallery_id, _, _ in store.entries()) == [1, 2]
+
+    assert store.delete_older_than(1500.0) == 1
+    assert store.read(1) is None
+    store.delete(2)
+    assert list(store.entries()) == []
+
+def test_cache_over_sqlite(tmp_path, sample_gallery_data: Dict[str, Any]) -> None:
+    """Test that the cache behaves the same on the SQLite store"""
+    cache = GalleryCache(cache_dir=str(tmp_path), store=SqliteStore(str(tmp_path / "galleries.db")))
+    cache.set(1, sample_gallery_data)
+    cache.set(2, sample_gallery_data, cached_at=time.time() - Settings.CACHE_DURATION - Settings.CACHE_MAX_STALE - 1)
+    cache.memory.clear()
+
+    assert cache.get(1) == sample_gallery_data
+    cache.cleanup_expired()
+    assert cache.lookup(2) is None
+    assert cache.stats()["backend"] == "sqlite"
+
+def test_migrate_directory_to_sqlite(tmp_path, sample_gallery_data: Dict[str, Any]) -> None:
+    """Test that the migration copies live entries and skips expired and corrupt ones"""
+    files = FileStore(str(tmp_path))
+    files.write(1, time.time(), sample_gallery_data)
+    files.write(2, time.time() - Settings.CACHE_DURATION - Settings.CACHE_MAX_STALE - 1, sample_gallery_data)
+    (tmp_path / "3.json").write_text("{broken")
+    database = SqliteStore(str(tmp_path / "galleries.db"))
+
+    assert migrate(files, database) == 1
+    assert database.read(1)[1] == sample_gallery_data
+    assert database.read(2) is None
+
+class SlowStore(FileStore):
+    """File store whose reads take as long as on a network-attached disk"""
+
+    def read(self, gallery_id: int):
+        time.sleep(0.05)
+        return super().read(gallery_id)
+
+def test_reads_do_not_serialize(tmp_path, sample_gallery_data: Dict[str, Any]) -> None:
+    """Test that slow reads of different galleries overlap instead of queueing"""
+    cache = GalleryCache(cache_dir=str(tmp_path), memory_bytes=0, store=SlowStore(str(tmp_path)))
+    for gallery_id in range(1, 9):
+        cache.set(gallery_id, sample_gallery_data)
+
+    def read_all(threads: int) -> float:
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            assert all(executor.map(cache.get, range(1, 9)))
+        return time.monotonic() - started
+
+    serial = read_all(1)
+    parallel = read_all(8)
+
+    # Eight reads take about one read's time with eight threads, eight with one
+    assert parallel < serial / 3
+
+def test_concurrent_readers_and_writers(gallery_cache: GalleryCache) -> None:
+    """Test that readers only ever see complete entries while writers replace them"""
+    gallery_cache.memory = MemoryCache(0)
+    versions = [{"version": version, "pages": list(range(2000))} for version in range(4)]
+    gallery_cache.set(1, versions[0])
+    stop = threading.Event()
+    errors = []
+
+    def write(version: int) -> None:
+        while not stop.is_set():
+            assert gallery_cache.set(1, versions[version])
+
+    def read() -> None:
+        for _ in range(300):
+            data = gallery_cache.get(1)
+            if data not in versions:
+                errors.append(data)
+
+    writers = [threading.Thread(target=write, args=(version,)) for version in range(1, 4)]
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    for thread in writers + readers:
+        thread.start()
+    for thread in readers:
+        thread.join()
+    stop.set()
+    for thread in writers:
+        thread.join()
+
+    assert errors == []
+    assert not [name for name in os.listdir(gallery_cache.cache_dir) if name.endswith('.tmp')]
+
+def test_sweep_runs_beside_writers(gallery_cache: GalleryCache, sample_gallery_data: Dict[str, Any]) -> None:
+    """Test that the sweep removes old files by time without holding up other galleries"""
+    old = time.time() - Settings.CACHE_DURATION - Settings.CACHE_MAX_STALE - 1
+    for gallery_id in range(1, 6):
+        gallery_cache.set(gallery_id, sample_gallery_data, cached_at=old)
+    gallery_cache.set(6, sample_gallery_data)
+
+    # While the sweep waits on one gallery's writer, other galleries are read and written
+    with gallery_cache._lock_for(3):
+        sweep = threading.Thread(target=gallery_cache.cleanup_expired)
+        sweep.start()
+        time.sleep(0.1)
+        assert gallery_cache.get(6) == sample_gallery_data
+        assert gallery_cache.set(7, sample_gallery_data)
+        assert sweep.is_alive()
+    sweep.join()
+
+    assert sorted(name for name in os.listdir(gallery_cache.cache_dir) if name.endswith('.json')) == ["6.json", "7.json"]
+
+class GatedStore(FileStore):
+    """File store whose reads can be held between reading an entry and returning it"""
+
+    def __init__(self, cache_dir: str):
+        super().__init__(cache_dir)
+        self.gated = False
+        self.read_done = threading.Event()
+        self.proceed = threading.Event()
+
+    def read(self, gallery_id: int):
+        stored = super().read(gallery_id)
+        if self.gated:
+            self.read_done.set()
+            assert self.proceed.wait(5)
+        return stored
+
+@pytest.mark.parametrize("change", ["set", "delete"])
+def test_reader_does_not_promote_replaced_entry(
+    tmp_path,
+    sample_gallery_data: Dict[str, Any],
+    change: str
+) -> None:
+    """Test that an entry read from disk before a write or removal is not put back in memory after it"""
+    store = GatedStore(str(tmp_path))
+    cache = GalleryCache(cache_dir=str(tmp_path), store=store)
+    old = {**sample_gallery_data, "version": "old"}
+    new = {**sample_gallery_data, "version": "new"}
+    cache.set(1, old)
+    cache.memory.clear()
+
+    store.gated = True
+    reader = threading.Thread(target=cache.lookup, args=(1,))
+    reader.start()
+    assert store.read_done.wait(5)
+    store.gated = False
+    if change == "set":
+        cache.set(1, new)
+    else:
+        cache.delete(1)
+    store.proceed.set()
+    reader.join()
+
+    expected = new if change == "set" else None
+    held = cache.memory.get(1)
+    assert (held.data if held else None) == expected
+    assert cache.get(1) == expected
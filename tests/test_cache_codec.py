@@ -0,0 +1,84 @@
+import json
+import pytest
+
+from src.core.cache_codec import CacheCodec, train_dictionary
+from src.core.cache_store import FileStore, SqliteStore
+
+zstandard = pytest.importorskip("zstandard")
+
+def gallery_record(gallery_id: int) -> bytes:
+    """Serialize a cache entry shaped like a real gallery"""
+    data = {
+        "id": gallery_id,
+        "media_id": str(900000 + gallery_id * 7),
+        "title": {"english": f"Gallery {gallery_id}", "japanese": f"作品 {gallery_id}", "pretty": f"Gallery {gallery_id}"},
+        "tags": [
+            {"id": tag, "type": "tag", "name": f"tag {tag}", "url": f"/tag/tag-{tag}/", "count": tag * 13}
+            for tag in range(gallery_id % 7, gallery_id % 7 + 12)
+        ],
+        "images": {"pages": [
+            {
+                "t": "j", "w": 1280, "h": 1800 + page % 3,
+                "url": f"https://i.nhentai.net/galleries/{900000 + gallery_id * 7}/{page}.jpg",
+                "thumbnail": f"https://t.nhentai.net/galleries/{900000 + gallery_id * 7}/{page}t.jpg"
+            }
+            for page in range(1, 20 + gallery_id % 30)
+        ]},
+        "pdf_status": "unavailable"
+    }
+    return json.dumps({"cached_at": 1700000000.0 + gallery_id, "data": data}, ensure_ascii=False).encode("utf-8")
+
+def test_plain_entries_pass_through() -> None:
+    """Test that entries are stored as JSON when compression is off"""
+    codec = CacheCodec(compress=False)
+    record = gallery_record(1)
+
+    assert codec.encode(record) is record
+    assert codec.decode(record) is record
+
+def test_dictionary_round_trip_and_retrain(tmp_path) -> None:
+    """Test that entries written with an older dictionary stay readable after retraining"""
+    dictionary_dir = str(tmp_path / "dictionaries")
+    samples = [gallery_record(gallery_id) for gallery_id in range(300)]
+    first_id = train_dictionary(samples[:150], dictionary_dir, size=16384)
+    codec = CacheCodec(dictionary_dir, compress=True)
+    assert codec.dictionary_id == first_id
+
+    record = gallery_record(1000)
+    encoded = codec.encode(record)
+    assert len(encoded) * 5 < len(record)
+    assert len(encoded) < len(CacheCodec(compress=True).encode(record))
+
+    second_id = train_dictionary(samples[150:], dictionary_dir, size=16384)
+    restarted = CacheCodec(dictionary_dir, compress=True)
+    assert restarted.dictionary_id == second_id != first_id
+    assert restarted.decode(encoded) == record
+    assert restarted.decode(record) == record
+
+def test_unreadable_entries_raise_value_error(tmp_path, mocker) -> None:
+    """Test that entries of an unknown version or missing dictionary are reported as corrupt"""
+    codec = CacheCodec(str(tmp_path), compress=True)
+    encoded = codec.encode(gallery_record(1))
+
+    with pytest.raises(ValueError):
+        codec.decode(encoded[:3] + b"\x09" + encoded[4:])
+    with pytest.raises(ValueError):
+        codec.decode(encoded[:4] + (12345).to_bytes(4, "little") + encoded[8:])
+    mocker.patch("src.core.cache_codec.zstandard", None)
+    with pytest.raises(ValueError):
+        codec.decode(encoded)
+
+@pytest.mark.parametrize("store_type", [FileStore, SqliteStore])
+def test_stores_read_both_formats(store_type, tmp_path) -> None:
+    """Test that a store switched to compression still reads entries written before"""
+    path = str(tmp_path) if store_type is FileStore else str(tmp_path / "galleries.db")
+    data = json.loads(gallery_record(5))["data"]
+    store_type(path, codec=CacheCodec(compress=False)).write(1, 1000.0, data)
+
+    compressed = store_type(path, codec=CacheCodec(compress=True))
+    size = compressed.write(2, 2000.0, data)
+
+    assert compressed.read(1)[:2] == (1000.0, data)
+    assert compressed.read(2) == (2000.0, data, size)
+    if store_type is FileStore:
+        assert (tmp_path / "1.json").stat().st_size > 3 * (tmp_path / "2.json").stat().st_size
@@ -1,6 +1,9 @@
+import json
+import base64
 import pytest
 from unittest.mock import MagicMock, patch
 from src.core.cookie_manager import CookieManager
+from src.core.browser_response import BrowserResponse
 from src.config.settings import Settings
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
@@ -22,8 +25,13 @@ def mock_driver(mock_element):
     driver = MagicMock()
     driver.page_source = "<html><body>Test content</body></html>"
     
-    # Mock find_element to return our mock element
-    driver.find_element.return_value = mock_element
+    # Mock find_element to return our mock element, with no challenge form
+    def mock_find_element(by, value):
+        if by == By.ID and value == 'challenge-form':
+            return None
+        return mock_element
+    
+    driver.find_element.side_effect = mock_find_element
     
     # Mock execute_script for fingerprinting and readyState
     def mock_execute_script(script):
@@ -71,31 +79,79 @@ def test_cookie_manager_initialization(cookie_manager, mock_driver):
     assert cookie_manager.driver == mock_driver
     assert cookie_manager.target == Settings.WEB_TARGET
     assert cookie_manager._renewing is False
-    assert cookie_manager.renewal_interval == 30
+    assert cookie_manager.refresher.running is True
 
 @pytest.mark.parametrize("challenge_present,expected_result", [
     (False, True),  # No challenge case
     (True, True),   # Challenge present but solved
 ])
-def test_ensure_valid_cookies(cookie_manager, mock_driver, challenge_present, expected_result):
+def test_ensure_valid_cookies(cookie_manager, mock_driver, mock_element, challenge_present, expected_result, mocker):
     """Test that cookie manager can establish a valid session"""
+    # Skip the challenge solver's fixed waits
+    mocker.patch('src.core.cookie_manager.time.sleep')
+    
     # Setup mock behavior for find_element
     def mock_find_element(by, value):
         if by == By.ID and value == 'challenge-form':
             return MagicMock() if challenge_present else None
-        return MagicMock()  # Return mock element for other queries
+        return mock_element  # Return mock element for other queries
     
     mock_driver.find_element.side_effect = mock_find_element
     
     # Setup mock behavior for execute_script
     mock_driver.execute_script.return_value = 'complete'
     
+    # Validation only runs once a fetch has marked the session stale
+    cookie_manager.session_health.mark_stale("HTTP 403")
+    mock_driver.get.reset_mock()
+    
     is_valid = cookie_manager.ensure_valid_cookies()
+    assert cookie_manager.session_health.is_stale is False
     assert is_valid is expected_result
     
     # Verify driver interactions
     mock_driver.get.assert_called_with(Settings.WEB_TARGET)
 
+def test_ensure_valid_cookies_skips_browser_when_healthy(cookie_manager, mock_driver):
+    """Test that a healthy session is trusted without a page load"""
+    cookie_manager.session_health.mark_healthy()
+    mock_driver.get.reset_mock()
+    
+    assert cookie_manager.ensure_valid_cookies() is True
+    mock_driver.get.assert_not_called()
+
+def test_ensure_valid_cookies_harvests_expired_clearance(cookie_manager, mocker):
+    """Test that an expired clearance is replaced even if no fetch failed"""
+    cookie_manager.session_health.mark_healthy()
+    cookie_manager.cookies = [{'name': 'cf_clearance', 'value': 'old', 'expiry': time.time() - 1}]
+    harvest = mocker.patch.object(cookie_manager, 'harvest_cookies', return_value=True)
+    
+    assert cookie_manager.ensure_valid_cookies() is True
+    harvest.assert_called_once()
+
+def test_import_cookies_swaps_jar(cookie_manager):
+    """Test that renewed cookies replace the jar instead of mutating it"""
+    old_jar = cookie_manager.session.cookies
+    old_jar.set('cf_clearance', 'old', domain='.nhentai.net')
+    
+    cookie_manager._import_cookies(
+        [{'name': 'cf_clearance', 'value': 'new', 'domain': '.nhentai.net', 'path': '/', 'expiry': 2000000000}],
+        'agent',
+        time.time()
+    )
+    
+    assert old_jar.get('cf_clearance') == 'old'
+    assert cookie_manager.session.cookies.get('cf_clearance') == 'new'
+    assert cookie_manager.session_expiry() == 2000000000.0
+
+def test_fetch_marks_session_stale_on_403(cookie_manager, mocker):
+    """Test that a forbidden response marks the session stale"""
+    response = MagicMock(status_code=403, text="Forbidden", headers={})
+    mocker.patch.object(cookie_manager.session, 'get', return_value=response)
+    
+    assert cookie_manager.fetch(f"{Settings.WEB_TARGET}/g/1") is response
+    assert cookie_manager.session_health.is_stale is True
+
 def test_session_renewal(cookie_manager, mock_driver):
     """Test that cookie manager can renew session"""
     # Force a session renewal
@@ -111,24 +167,224 @@ def test_session_renewal(cookie_manager, mock_driver):
     # Verify browser was reinitialized
     mock_driver.quit.assert_called()
 
+def test_standby_renewal_keeps_old_browser_until_replaced(cookie_manager, mock_driver, mocker):
+    """Test that standby renewal verifies a new browser before quitting the old one"""
+    mocker.patch.object(Settings, 'BROWSER_STANDBY', True)
+    recycle_all = mocker.patch.object(cookie_manager.pool, 'recycle_all')
+    launches = []
+    mocker.patch.object(
+        cookie_manager.pool,
+        '_factory',
+        side_effect=lambda: launches.append(mock_driver.quit.called) or MagicMock()
+    )
+    
+    assert cookie_manager._renew_session() is True
+    
+    recycle_all.assert_not_called()
+    # The old browser was still running while its replacement launched
+    assert launches == [False]
+    mock_driver.quit.assert_called()
+    assert cookie_manager.driver is not mock_driver
+
 @pytest.mark.parametrize("test_url,expected_content", [
     (Settings.WEB_TARGET, "<html><body>Test content</body></html>"),
     ("https://test.com", "<html><body>Test content</body></html>"),
 ])
 def test_get_request(cookie_manager, mock_driver, test_url, expected_content):
     """Test that cookie manager can handle get requests"""
-    content = cookie_manager.get(test_url)
-    assert content == expected_content
+    response = cookie_manager.get(test_url)
+    assert response.status_code == 200
+    assert response.text == expected_content
     mock_driver.get.assert_called_with(test_url)
 
+def test_get_captures_network_response(cookie_manager, mock_driver):
+    """Test that the real status, headers and body are read from DevTools events"""
+    url = f"{Settings.WEB_TARGET}/g/999999999/"
+    event = {
+        "message": {
+            "method": "Network.responseReceived",
+            "params": {
+                "requestId": "42",
+                "type": "Document",
+                "response": {
+                    "url": url,
+                    "status": 404,
+                    "headers": {"content-type": "text/html; charset=utf-8"}
+                }
+            }
+        }
+    }
+    mock_driver.get_log.side_effect = [[], [{"message": json.dumps(event)}]]
+    mock_driver.execute_cdp_cmd.return_value = {
+        "body": base64.b64encode("<h1>404 – Not Found</h1>".encode()).decode(),
+        "base64Encoded": True
+    }
+    
+    response = cookie_manager.get(url)
+    
+    assert response.status_code == 404
+    assert response.ok is False
+    assert response.headers["Content-Type"] == "text/html; charset=utf-8"
+    assert response.text == "<h1>404 – Not Found</h1>"
+    mock_driver.execute_cdp_cmd.assert_called_with('Network.getResponseBody', {'requestId': '42'})
+
+def test_get_lifts_blocking_for_challenge(cookie_manager, mock_driver, mocker):
+    """Test that a challenge served to a blocked page load is retried with blocking lifted"""
+    url = f"{Settings.WEB_TARGET}/g/1/"
+    challenge = BrowserResponse(
+        url=url,
+        status_code=403,
+        headers={'cf-mitigated': 'challenge'},
+        content=b"<title>Just a moment...</title>"
+    )
+    page = BrowserResponse(url=url, status_code=200, content=b"<html>gallery</html>")
+    mocker.patch.object(cookie_manager, '_capture_response', side_effect=[challenge, page])
+    export = mocker.patch.object(cookie_manager, '_export_cookies')
+    mock_driver.get.reset_mock()
+    mock_driver.execute_cdp_cmd.reset_mock()
+    
+    response = cookie_manager.get(url)
+    
+    assert response is page
+    assert mock_driver.get.call_count == 2
+    blocked_urls = [
+        c.args[1]['urls'] for c in mock_driver.execute_cdp_cmd.call_args_list
+        if c.args[0] == 'Network.setBlockedURLs'
+    ]
+    # Lifted for the retry, then restored
+    assert blocked_urls == [[], cookie_manager.request_blocker.patterns]
+    export.assert_called_once_with(mock_driver)
+
 def test_multiple_requests(cookie_manager, mock_driver):
     """Test that cookie manager can handle multiple requests"""
     # Make multiple requests to test session stability
     for _ in range(3):
-        content = cookie_manager.get(Settings.WEB_TARGET)
-        assert content == "<html><body>Test content</body></html>"
+        response = cookie_manager.get(Settings.WEB_TARGET)
+        assert response.text == "<html><body>Test content</body></html>"
         mock_driver.get.assert_called_with(Settings.WEB_TARGET)
         time.sleep(0.1)  # Small delay between requests
 
+def test_cookies_exported_to_session(mock_driver, mock_webdriver_wait):
+    """Test that browser cookies are copied into the HTTP session"""
+    mock_driver.get_cookies.return_value = [
+        {'name': 'cf_clearance', 'value': 'token', 'domain': '.nhentai.net', 'path': '/', 'expiry': 2000000000}
+    ]
+    with patch('undetected_chromedriver.Chrome', return_value=mock_driver):
+        manager = CookieManager()
+    
+    assert manager.session.cookies.get('cf_clearance') == 'token'
+    assert manager.session.headers['User-Agent'] == manager.browser_data['user_agent']
+    assert manager.last_harvest > 0
+
+def test_shared_session_skips_browser_launch(mock_driver):
+    """Test that a worker adopts a session published by another worker"""
+    mock_driver.get_cookies.return_value = [
+        {'name': 'cf_clearance', 'value': 'shared', 'domain': '.nhentai.net', 'path': '/', 'expiry': 2000000000}
+    ]
+    with patch('undetected_chromedriver.Chrome', return_value=mock_driver) as chrome:
+        CookieManager()
+        assert chrome.call_count == 1
+        
+        second = CookieManager()
+        assert chrome.call_count == 1
+    
+    assert second.driver is None
+    assert second.session.cookies.get('cf_clearance') == 'shared'
+    assert second.session_health.is_stale is False
+
+def test_fetch_uses_http_session(cookie_manager, mock_driver, mocker):
+    """Test that fetches go over the HTTP session when no challenge is served"""
+    response = MagicMock(status_code=200, text="<html>gallery</html>", headers={})
+    mocker.patch.object(cookie_manager.session, 'get', return_value=response)
+    mock_driver.get.reset_mock()
+    
+    assert cookie_manager.fetch(f"{Settings.WEB_TARGET}/g/1") is response
+    mock_driver.get.assert_not_called()
+
+def test_fetch_harvests_cookies_on_challenge(cookie_manager, mock_driver, mocker):
+    """Test that a challenge response brings the browser back before retrying"""
+    challenge = MagicMock(
+        status_code=403,
+        text="<html><title>Just a moment...</title></html>",
+        headers={'cf-mitigated': 'challenge'}
+    )
+    response = MagicMock(status_code=200, text="<html>gallery</html>", headers={})
+    mocker.patch.object(cookie_manager.session, 'get', side_effect=[challenge, response])
+    mock_driver.get.reset_mock()
+    
+    assert cookie_manager.fetch(f"{Settings.WEB_TARGET}/g/1") is response
+    mock_driver.get.assert_called_with(Settings.WEB_TARGET)
+
+def test_browser_uses_persistent_profile(mock_driver):
+    """Test that browsers launch from a locked profile that records its clearance"""
+    mock_driver.get_cookies.return_value = [
+        {'name': 'cf_clearance', 'value': 'token', 'domain': '.nhentai.net', 'path': '/', 'expiry': 2000000000}
+    ]
+    with patch('undetected_chromedriver.Chrome', return_value=mock_driver) as chrome:
+        manager = CookieManager()
+    
+    user_data_dir = chrome.call_args.kwargs['user_data_dir']
+    assert user_data_dir.startswith(Settings.BROWSER_PROFILE_DIR)
+    profile = manager._driver_profiles[id(mock_driver)]
+    assert profile.metadata.clearance_expires_at == 2000000000.0
+    assert profile.metadata.clean_exit is False
+    
+    manager.pool.close()
+    mock_driver.quit.assert_called()
+    assert profile.metadata.clean_exit is True
+    assert manager._driver_profiles == {}
+
+def test_renewal_after_rejection_clears_profile_cookies(mock_driver):
+    """Test that a renewal caused by a rejected session does not reuse the profile's clearance"""
+    mock_driver.get_cookies.return_value = [
+        {'name': 'cf_clearance', 'value': 'token', 'domain': '.nhentai.net', 'path': '/', 'expiry': 2000000000}
+    ]
+    with patch('undetected_chromedriver.Chrome', return_value=mock_driver):
+        manager = CookieManager()
+        mock_driver.execute_cdp_cmd.reset_mock()
+        
+        # Healthy renewals restart from the recorded clearance
+        manager.pool.recycle_all()
+        manager._warm_browsers()
+        cleared = [c for c in mock_driver.execute_cdp_cmd.call_args_list if c.args[0] == 'Network.clearBrowserCookies']
+        assert cleared == []
+        
+        manager.session_health.mark_stale("challenge")
+        manager.pool.recycle_all()
+        manager._warm_browsers()
+    
+    cleared = [c for c in mock_driver.execute_cdp_cmd.call_args_list if c.args[0] == 'Network.clearBrowserCookies']
+    assert len(cleared) == 1
+    manager.pool.close()
+
+def test_background_warmup(mock_driver):
+    """Test that startup can defer the browser launch to a background thread"""
+    with patch('undetected_chromedriver.Chrome', return_value=mock_driver) as chrome:
+        manager = CookieManager(warm_up=False)
+        assert manager.is_ready is False
+        chrome.assert_not_called()
+        
+        manager.start_warmup().join(timeout=5)
+    
+    assert manager.is_ready is True
+    assert manager.driver == mock_driver
+
+def test_failed_startup_warmup_falls_back_to_background():
+    """Test that a failing warm-up at startup is retried in the background instead of raising"""
+    attempts = []
+    
+    def warm_up(manager):
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("chromedriver crashed")
+        manager.ready.set()
+    
+    with patch.object(CookieManager, '_warm_up', autospec=True, side_effect=warm_up):
+        manager = CookieManager()
+        assert manager.ready.wait(5)
+    
+    assert len(attempts) == 2
+    assert manager.warmup_error is None
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"]) 
\ No newline at end of file
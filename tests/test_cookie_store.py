@@ -0,0 +1,67 @@
+import os
+import time
+import threading
+import pytest
+
+from src.core.cookie_store import CookieStore
+
+@pytest.fixture
+def store(tmp_path) -> CookieStore:
+    """Fixture to create a cookie store in a temporary directory"""
+    return CookieStore(str(tmp_path / "session.json"), ttl=60)
+
+def test_publish_and_load(store: CookieStore) -> None:
+    """Test that published cookies are readable with their clearance expiry"""
+    expiry = int(time.time()) + 3600
+    cookies = [{'name': 'cf_clearance', 'value': 'token', 'expiry': expiry}]
+
+    published = store.publish(cookies, "test-agent")
+    record = store.load()
+
+    assert record is not None
+    assert record.cookies == cookies
+    assert record.user_agent == "test-agent"
+    assert record.expires_at == expiry
+    assert record.published_at == published.published_at
+    assert record.publisher == os.getpid()
+
+def test_fallback_expiry(store: CookieStore) -> None:
+    """Test that sessions without a clearance cookie expire after the TTL"""
+    record = store.publish([{'name': 'csrftoken', 'value': 'x'}], "test-agent")
+    assert time.time() + 55 < record.expires_at <= time.time() + 60
+
+def test_expired_session_is_ignored(store: CookieStore) -> None:
+    """Test that expired clearance is not handed out"""
+    store.publish([{'name': 'cf_clearance', 'value': 'old', 'expiry': time.time() - 1}], "test-agent")
+    assert store.load() is None
+
+def test_missing_or_corrupt_file(store: CookieStore) -> None:
+    """Test that a missing or unreadable session file yields nothing"""
+    assert store.load() is None
+    with open(store.path, 'w') as f:
+        f.write("{not json")
+    assert store.load() is None
+
+def test_solver_lock_is_exclusive(store: CookieStore) -> None:
+    """Test that a second solver waits and then gives up"""
+    holding = threading.Event()
+    release = threading.Event()
+
+    def hold():
+        # A separate file handle behaves like another worker process
+        with store.solver_lock(timeout=1) as acquired:
+            assert acquired
+            holding.set()
+            release.wait(5)
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    holding.wait(5)
+
+    with store.solver_lock(timeout=0.3) as acquired:
+        assert acquired is False
+
+    release.set()
+    holder.join(timeout=5)
+    with store.solver_lock(timeout=0.3) as acquired:
+        assert acquired is True
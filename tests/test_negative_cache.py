@@ -0,0 +1,78 @@
+import time
+
+from src.core.negative_cache import NegativeCache, MISSING, FAILED
+
+def test_lookup_and_expiry(mocker) -> None:
+    """Test that results are found until their TTL passes"""
+    cache = NegativeCache(missing_ttl=60, failed_ttl=10)
+    for gallery_id in (30, 10, 20):
+        cache.add(gallery_id, MISSING)
+    cache.add(15, FAILED)
+
+    assert list(cache._ids) == [10, 15, 20, 30]
+    assert cache.get(20) == MISSING
+    assert cache.get(15) == FAILED
+    assert cache.get(25) is None
+
+    mocker.patch('src.core.negative_cache.time.time', return_value=time.time() + 30)
+    assert cache.get(15) is None
+    assert cache.get(10) == MISSING
+    assert cache.stats() == {"entries": 3, "hits": 3, "failing": 0}
+
+def test_repeated_failures() -> None:
+    """Test that a gallery is remembered once it fails often enough in a row"""
+    cache = NegativeCache(max_failures=3)
+
+    assert not cache.record_failure(7)
+    assert not cache.record_failure(7)
+    cache.discard(7)
+    assert not cache.record_failure(7)
+    assert not cache.record_failure(7)
+    assert cache.record_failure(7)
+    assert cache.get(7) == FAILED
+
+def test_snapshot_survives_restart(tmp_path) -> None:
+    """Test that results are reloaded from the snapshot file"""
+    path = str(tmp_path / "negative.bin")
+    cache = NegativeCache(path, missing_ttl=60)
+    cache.add(5, MISSING)
+    cache.add(3, MISSING)
+    cache.prune()
+
+    reloaded = NegativeCache(path)
+    assert reloaded.get(3) == MISSING
+    assert reloaded.get(5) == MISSING
+
+    (tmp_path / "negative.bin").write_bytes(b"garbage")
+    assert NegativeCache(path).get(3) is None
+
+def test_workers_merge_snapshots(tmp_path) -> None:
+    """Test that workers sharing a snapshot keep each other's results"""
+    path = str(tmp_path / "negative.bin")
+    first = NegativeCache(path, missing_ttl=60)
+    second = NegativeCache(path, missing_ttl=60)
+    first.add(1, MISSING)
+    second.add(2, MISSING)
+    first.save(force=True)
+    second.save(force=True)
+
+    reloaded = NegativeCache(path)
+    assert reloaded.get(1) == MISSING
+    assert reloaded.get(2) == MISSING
+    # Saving also picks up what the other workers saved
+    assert second.get(1) == MISSING
+
+def test_discard_survives_restart(tmp_path) -> None:
+    """Test that a discarded result is removed from the snapshot, not restored from it"""
+    path = str(tmp_path / "negative.bin")
+    cache = NegativeCache(path, missing_ttl=60)
+    cache.add(4, MISSING)
+    cache.add(6, MISSING)
+    cache.save(force=True)
+
+    cache.discard(4)
+    cache.save(force=True)
+
+    reloaded = NegativeCache(path)
+    assert reloaded.get(4) is None
+    assert reloaded.get(6) == MISSING
@@ -0,0 +1,30 @@
+import os
+import sys
+import subprocess
+import pytest
+from unittest.mock import MagicMock
+
+from src.core.process_memory import driver_pid, driver_rss, process_tree_rss
+
+pytestmark = pytest.mark.skipif(not os.path.isdir('/proc'), reason="requires /proc")
+
+def test_process_tree_includes_children():
+    """Test that the memory of child processes is counted"""
+    own = process_tree_rss(os.getpid())
+    child = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(5)'])
+    try:
+        assert own > 0
+        assert process_tree_rss(os.getpid()) > own
+    finally:
+        child.kill()
+        child.wait()
+
+def test_driver_rss_uses_browser_pid():
+    """Test that the browser pid exposed by undetected Chrome is preferred"""
+    driver = MagicMock(browser_pid=os.getpid())
+    assert driver_pid(driver) == os.getpid()
+    assert driver_rss(driver) > 0
+
+def test_driver_without_pid():
+    """Test that drivers without a known process report no memory"""
+    assert driver_rss(MagicMock()) is None
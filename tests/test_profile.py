@@ -0,0 +1,106 @@
+import os
+import json
+import time
+import sqlite3
+import pytest
+
+from src.core.profile import METADATA_FILE, ProfileManager
+
+AGENT = "test-agent"
+CLEARANCE = [{"name": "cf_clearance", "value": "token", "expiry": time.time() + 3600}]
+
+@pytest.fixture
+def manager(tmp_path):
+    """Fixture providing a profile manager rooted in a temporary directory"""
+    return ProfileManager(str(tmp_path / "profiles"), compact_interval=3600, max_size_mb=100)
+
+def write(path, content=b"x"):
+    """Create a file with its parent directories"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(content)
+
+def test_concurrent_browsers_get_separate_profiles(manager):
+    """Test that a locked profile is not handed out twice"""
+    first = manager.acquire(AGENT)
+    second = manager.acquire(AGENT)
+    assert first.path != second.path
+
+    first.release()
+    third = manager.acquire(AGENT)
+    assert third.path == first.path
+
+def test_clearance_reused_after_restart(manager):
+    """Test that a profile remembers its clearance across releases"""
+    profile = manager.acquire(AGENT)
+    profile.record_clearance(CLEARANCE, AGENT)
+    profile.release()
+
+    restarted = ProfileManager(manager.root)
+    profile = restarted.acquire(AGENT)
+    assert profile.has_valid_clearance(AGENT) is True
+    assert profile.has_valid_clearance("other-agent") is False
+    assert profile.has_valid_clearance(AGENT, margin=7200) is False
+    assert restarted.stats()["clearance_reuses"] == 1
+
+def test_crashed_profile_with_corrupt_files_is_reset(manager):
+    """Test that a profile left by a crash is wiped when Chrome's files are damaged"""
+    profile = manager.acquire(AGENT)
+    profile.record_clearance(CLEARANCE, AGENT)
+    write(os.path.join(profile.path, "Default", "Preferences"), b'{"truncated":')
+    write(os.path.join(profile.path, "SingletonLock"))
+    # Simulate a crash: the lock is dropped without a clean release
+    profile._handle.close()
+
+    profile = manager.acquire(AGENT)
+    assert not os.path.exists(os.path.join(profile.path, "Default", "Preferences"))
+    assert not os.path.exists(os.path.join(profile.path, "SingletonLock"))
+    assert profile.metadata.clearance_expires_at is None
+    assert manager.stats()["resets"] == 1
+
+def test_crashed_profile_with_intact_files_is_kept(manager):
+    """Test that an unclean exit alone does not discard a healthy profile"""
+    profile = manager.acquire(AGENT)
+    profile.record_clearance(CLEARANCE, AGENT)
+    write(os.path.join(profile.path, "Local State"), json.dumps({}).encode())
+    cookies = os.path.join(profile.path, "Default", "Network", "Cookies")
+    os.makedirs(os.path.dirname(cookies))
+    with sqlite3.connect(cookies) as db:
+        db.execute("CREATE TABLE cookies (name TEXT)")
+    profile._handle.close()
+
+    profile = manager.acquire(AGENT)
+    assert os.path.exists(cookies)
+    assert profile.has_valid_clearance(AGENT) is True
+    assert manager.stats()["resets"] == 0
+
+def test_compaction_keeps_cookies(manager):
+    """Test that caches are removed from an oversized profile and cookies survive"""
+    profile = manager.acquire(AGENT)
+    cache = os.path.join(profile.path, "Default", "Cache", "data_0")
+    cookies = os.path.join(profile.path, "Default", "Network", "Cookies")
+    write(cache, b"0" * 1024)
+    write(cookies)
+    profile.release()
+
+    manager.max_size = 512
+    manager.acquire(AGENT)
+    assert not os.path.exists(cache)
+    assert os.path.exists(cookies)
+    assert manager.stats()["compactions"] == 2
+
+    with open(os.path.join(profile.path, METADATA_FILE)) as f:
+        assert json.load(f)["compacted_at"] > 0
+
+def test_rejected_clearance_is_forgotten(manager):
+    """Test that a clearance can be dropped when the profile is acquired"""
+    profile = manager.acquire(AGENT)
+    profile.record_clearance(CLEARANCE, AGENT)
+    profile.release()
+
+    profile = manager.acquire(AGENT, reuse_clearance=False)
+    assert profile.has_valid_clearance(AGENT) is False
+    assert manager.stats()["clearance_reuses"] == 0
+    profile.release()
+
+    assert manager.acquire(AGENT).metadata.clearance_expires_at is None
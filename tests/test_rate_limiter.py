@@ -0,0 +1,26 @@
+import time
+
+from src.core.rate_limiter import RateLimiter
+
+def test_burst_then_spacing():
+    """Test that a burst is served at once and later requests are spaced out"""
+    limiter = RateLimiter(rate=20, burst=2)
+    started = time.monotonic()
+    for _ in range(4):
+        assert limiter.acquire() is True
+    elapsed = time.monotonic() - started
+
+    # Two tokens were available, the other two refill at 20 per second
+    assert 0.08 <= elapsed < 0.5
+    assert limiter.stats()["acquired"] == 4
+
+def test_timeout():
+    """Test that acquire gives up when no token arrives in time"""
+    limiter = RateLimiter(rate=1, burst=1)
+    assert limiter.acquire(timeout=0) is True
+    assert limiter.acquire(timeout=0.05) is False
+
+def test_disabled():
+    """Test that a zero rate never waits"""
+    limiter = RateLimiter(rate=0)
+    assert all(limiter.acquire(timeout=0) for _ in range(100))
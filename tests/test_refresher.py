@@ -0,0 +1,58 @@
+import time
+import threading
+
+from src.core.refresher import SessionRefresher
+
+def test_next_refresh_before_expiry():
+    """Test that the refresh is scheduled within the lead and jitter window"""
+    expires_at = time.time() + 3600
+    refresher = SessionRefresher(lambda: expires_at, lambda: True, lead=300, jitter=60, retry=10)
+
+    due = refresher.next_refresh_at()
+    assert expires_at - 360 <= due <= expires_at - 300
+    # Jitter is stable for the same expiry
+    assert refresher.next_refresh_at() == due
+
+def test_no_refresh_without_session():
+    """Test that nothing is scheduled before a session exists"""
+    refresher = SessionRefresher(lambda: None, lambda: True)
+    assert refresher.next_refresh_at() is None
+
+def test_refreshes_in_background():
+    """Test that a due session is refreshed and the new expiry rescheduled"""
+    session = {"expires_at": time.time() + 1}
+    refreshed = threading.Event()
+
+    def refresh():
+        session["expires_at"] = time.time() + 3600
+        refreshed.set()
+        return True
+
+    refresher = SessionRefresher(lambda: session["expires_at"], refresh, lead=5, jitter=0, retry=0.1)
+    refresher.start()
+    try:
+        assert refreshed.wait(2)
+        time.sleep(0.2)
+        stats = refresher.stats()
+        assert stats["refreshes"] == 1
+        assert stats["next_refresh_at"] > time.time() + 3000
+    finally:
+        refresher.stop()
+
+def test_failed_refresh_is_retried_after_interval():
+    """Test that failures back off for the retry interval instead of spinning"""
+    calls = []
+    refresher = SessionRefresher(
+        lambda: time.time(),
+        lambda: calls.append(time.time()) or False,
+        lead=0,
+        jitter=0,
+        retry=0.2
+    )
+    refresher.start()
+    time.sleep(0.5)
+    refresher.stop()
+
+    assert 2 <= len(calls) <= 4
+    assert refresher.stats()["failures"] == len(calls)
+    assert all(b - a >= 0.19 for a, b in zip(calls, calls[1:]))
@@ -0,0 +1,100 @@
+import time
+import threading
+import pytest
+
+from src.core.renewal import RenewalCoordinator
+from src.core.single_flight import SingleFlight, SingleFlightTimeout
+
+def wait_for(condition, timeout=5.0):
+    """Poll until a condition holds or the timeout passes"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+def test_single_flight_shares_result():
+    """Test that concurrent callers for one key share a single execution"""
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+    results = []
+
+    def work():
+        calls.append(1)
+        release.wait(5)
+        return "done"
+
+    threads = [
+        threading.Thread(target=lambda: results.append(flight.do("key", work, timeout=5)))
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    assert wait_for(lambda: flight.stats()["coalesced"] == 4)
+    release.set()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert calls == [1]
+    assert results == ["done"] * 5
+    assert flight.stats()["executions"] == 1
+    assert flight.stats()["in_flight"] == 0
+
+def test_single_flight_waiter_timeout():
+    """Test that a waiter gives up after its deadline"""
+    flight = SingleFlight()
+    release = threading.Event()
+    leader = threading.Thread(target=lambda: flight.do("key", lambda: release.wait(5)))
+    leader.start()
+    assert wait_for(lambda: flight.in_flight("key"))
+
+    with pytest.raises(SingleFlightTimeout):
+        flight.do("key", lambda: None, timeout=0.05)
+
+    release.set()
+    leader.join(timeout=5)
+    assert flight.stats()["timeouts"] == 1
+
+def test_single_flight_propagates_errors():
+    """Test that the leader's exception is raised to the caller"""
+    flight = SingleFlight()
+
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError, match="boom"):
+        flight.do("key", fail)
+    assert not flight.in_flight("key")
+
+def test_coordinator_counts_renewals_and_failures():
+    """Test that renewal outcomes and durations are recorded"""
+    outcomes = iter([True, False])
+    coordinator = RenewalCoordinator(lambda: next(outcomes), wait_timeout=1)
+
+    assert coordinator.renew() is True
+    assert coordinator.renew() is False
+
+    stats = coordinator.stats()
+    assert stats["renewals"] == 2
+    assert stats["failures"] == 1
+    assert stats["in_progress"] is False
+    assert stats["last_success"] > 0
+
+def test_coordinator_waiters_get_real_outcome():
+    """Test that callers arriving during a renewal receive its outcome"""
+    release = threading.Event()
+    coordinator = RenewalCoordinator(lambda: release.wait(5) and False, wait_timeout=5)
+    results = []
+
+    threads = [threading.Thread(target=lambda: results.append(coordinator.renew())) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    assert wait_for(lambda: coordinator.stats()["coalesced_waiters"] == 2)
+    release.set()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert results == [False, False, False]
+    assert coordinator.stats()["renewals"] == 1
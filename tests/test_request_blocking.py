@@ -0,0 +1,55 @@
+from unittest.mock import MagicMock, call
+
+from src.core.request_blocking import RequestBlocker, RESOURCE_TYPE_PATTERNS
+
+def test_patterns_combine_types_and_urls():
+    """Test that resource types and URL patterns form the blocklist"""
+    blocker = RequestBlocker(url_patterns=['*ads.example.com*'], resource_types=['font'], enabled=True)
+
+    assert '*ads.example.com*' in blocker.patterns
+    for pattern in RESOURCE_TYPE_PATTERNS['font']:
+        assert pattern in blocker.patterns
+    assert '*.css*' not in blocker.patterns
+
+def test_challenge_resources_never_blocked():
+    """Test that patterns targeting Cloudflare's challenge are dropped"""
+    blocker = RequestBlocker(
+        url_patterns=['*challenges.cloudflare.com*', '*/cdn-cgi/*'],
+        resource_types=[],
+        enabled=True
+    )
+    assert not any('cloudflare' in p or 'cdn-cgi' in p for p in blocker.patterns)
+
+def test_apply_and_suspend():
+    """Test that blocking is lifted during challenges and restored afterwards"""
+    driver = MagicMock()
+    blocker = RequestBlocker(url_patterns=[], resource_types=['image'], enabled=True)
+
+    with blocker.suspended(driver):
+        driver.execute_cdp_cmd.assert_called_once_with('Network.setBlockedURLs', {'urls': []})
+
+    assert driver.execute_cdp_cmd.call_args_list[-2:] == [
+        call('Network.enable', {}),
+        call('Network.setBlockedURLs', {'urls': blocker.patterns})
+    ]
+
+def test_disabled_blocker_leaves_driver_alone():
+    """Test that a disabled blocker sends no DevTools commands"""
+    driver = MagicMock()
+    blocker = RequestBlocker(enabled=False)
+
+    blocker.apply(driver)
+    with blocker.suspended(driver):
+        pass
+    driver.execute_cdp_cmd.assert_not_called()
+
+def test_navigation_timings():
+    """Test that navigation timings are reported per blocking state"""
+    blocker = RequestBlocker(enabled=True)
+    blocker.record(0.2, blocked=True)
+    blocker.record(0.4, blocked=True)
+    blocker.record(1.0, blocked=False)
+
+    stats = blocker.stats()
+    assert stats["blocked"] == {"navigations": 2, "average_ms": 300.0}
+    assert stats["unblocked"] == {"navigations": 1, "average_ms": 1000.0}
@@ -40,8 +40,9 @@ def create_app() -> Flask:
         'DEBUG': Settings.DEBUG
     })
     
-    # Initialize services
-    cookie_manager = CookieManager()
+    # Initialize services; the browser session is warmed up in the background
+    cookie_manager = CookieManager(warm_up=False)
+    cookie_manager.start_warmup()
     gallery_cache = GalleryCache(Settings.GALLERY_CACHE_DIR)
     
     # Initialize R2 storage if configured